@@ -1,16 +1,19 @@
 import os
 import sys
+import json
+import time
+import threading
 import tkinter as tk
 from tkinter import ttk
-from tkinter import scrolledtext
-import serial.tools.list_ports
-from serial import Serial
 import xml.etree.ElementTree as ET
-import csv
-import threading
 import datetime
 import db_loader
-from QR_Scanner import barcode_scanner
+from outbox import close_outboxes
+from journal import close_journals
+from ui_dispatcher import UIDispatcher, UI_FRAME_RATE
+from log_view import LogBuffer, LogView, MAX_LOG_LINES
+from monitor_core import Station, StationListener, load_station_config, STATION_CONFIG_FILE
+from port_discovery import discover, get_port_cache, KIND_BENCH, KIND_SCANNER
 
 # Function to get the path to the icon file, works for both script and EXE
 def resource_path(relative_path):
@@ -56,8 +59,20 @@ class ToolTip:
             self.tip_window.destroy()
             self.tip_window = None
 
+STARTUP_REPORT_ENV = "FAST_MONITOR_STARTUP_REPORT"  # File to append startup milestones to (benchmarks/bench_startup.py)
+
+def report_startup(event):  # Append {"event", "time"} to the startup report file, if one is set
+    path = os.environ.get(STARTUP_REPORT_ENV)
+    if not path:
+        return
+    try:
+        with open(path, "a") as report:
+            report.write(json.dumps({"event": event, "time": time.time()}) + "\n")
+    except OSError as e:
+        print(f"Error writing startup report: {e}")
+
 class SerialMonitor:
-    def __init__(self, master):
+    def __init__(self, master, stations=None):
         self.master = master    # Initialize the main window
         self.master.title("FAST-Serial Monitor") # Set window title
         self.master.geometry("1280x720")    # Set initial window size
@@ -70,86 +85,190 @@ class SerialMonitor:
         # self.master.attributes("-toolwindow", True)  # Set window to be a tool window (no minimize/maximize buttons)
         # self.master.attributes("-type", "dialog")  # Set window type to dialog (no taskbar button)
 
-        self.captured_messages = []  # List to store message tuples
-
-        self.master.protocol("WM_DELETE_WINDOW", self.on_close)  # Handle window close event
-
         # Set the window icon (this icon will appear in the title bar)
         set_window_icon(self.master, resource_path("fast.ico"))  # Set the icon for the window
-        # Set the icon for the application (this icon will appear in the taskbar)
-        icon_path = resource_path("fast.ico")  # Get icon path for both .exe and script
-
-        self.create_widgets()   # Call the method to create widgets
-
-        # Flag to indicate if the serial connection is active
-        self.connection_active = False  
-
-        self.manual_header = [ "Serial_Number",
-                               "LED_status",
-                               "VCC_AVERAGE", 
-                               "PLUS_AVERAGE", 
-                               "MINUS_AVERAGE",
-                               "BATTERY_AVERAGE", 
-                               "BUCK_AVERAGE",
-                               "VCC",
-                               "PLUS_VOLT", 
-                               "MINUS_VOLT",
-                               "BATTERY_VOLT", 
-                               "BUCK_VOLT",
-                               "RASPBERRY_PI", 
-                               "RASPBERRY_PI_RUN", 
-                               "SCREEN_1", 
-                               "SCREEN_2", 
-                               "SCREEN_3", 
-                               "SCREEN_4", 
-                               "SCREEN_5",
-                               "SCREEN_6",
-                                "Status" ]  # Define the manual header for the CSV file
-        self.header = self.manual_header  # Set the header to manual header by default
-
-        # Initialize result_dict with "null"
-        self.result_dict = {key: "null" for key in self.manual_header}
 
         # Get the folder where the .exe is running
         base_path = os.path.dirname(os.path.abspath(__file__))
+        self.base_path = base_path
+
+        if stations is None:
+            stations = load_station_config(os.path.join(base_path, STATION_CONFIG_FILE))
+
+        # All widget updates from the reader threads go through this queue (shared by every station)
+        self.ui = UIDispatcher(self.master, fps=UI_FRAME_RATE)
+
+        self.master.grid_rowconfigure(0, weight=1)
+        self.master.grid_columnconfigure(0, weight=1)
+
+        self.serial_loop = None    # Created on first use by a station with "transport": "async"
+        self.discovery = None      # Thread identifying benches and scanners on the serial ports
+
+        self.stations = []
+        if len(stations) == 1:
+            # Single bench: same layout as before, no tabs
+            frame = ttk.Frame(self.master)
+            frame.grid(row=0, column=0, sticky="nsew")
+            self.stations.append(StationPanel(self, frame, stations[0], base_path, file_suffix=""))
+        else:
+            # One tab per bench/scanner pair
+            self.notebook = ttk.Notebook(self.master)
+            self.notebook.grid(row=0, column=0, sticky="nsew")
+            for index, config in enumerate(stations):
+                frame = ttk.Frame(self.notebook)
+                self.notebook.add(frame, text=config.get("name", f"Station {index + 1}"))
+                self.stations.append(StationPanel(self, frame, config, base_path, file_suffix=f"_S{index + 1}"))
 
-        # Define file paths
-        self.csv_path = os.path.join(base_path, 'AM60.csv')
-        self.txt_path = os.path.join(base_path, 'captured_messages.txt')
+        self.ui.start()
+
+        # The window is drawn before the idle callbacks run: record it, then load the database driver in the background
+        self.first_frame = False
+        self.master.after_idle(self.on_window_shown)
 
         # Bind close event
         self.master.protocol("WM_DELETE_WINDOW", self.on_close)
-    
-    def refresh_ports(self):
-        # Clear the current port list and re-populate
-        self.port_combobox.set('')  # Clear the current selection
-        self.port_combobox_scan.set('')  # Clear the current selection
-        self.populate_ports(parent=self.top_frame)  # Re-populate the port combobox with the new list of available ports
-        self.populate_ports_scan(parent=self.top_frame)  # Re-populate the scanner port combobox with the new list of available ports
+
+    def on_window_shown(self):
+        report_startup("window")
+        self.discover_ports()   # Known devices come from ports.json at once, new ones are probed in the background
+        db_loader.preload()     # Import mysql.connector now rather than on the first insert
+
+    def discover_ports(self, force=False):  # Enumerate and identify the serial ports once for all stations (runs on the Tk thread)
+        if self.discovery is not None and self.discovery.is_alive():
+            return
+        # Ports a station has selected (from its config or by hand) or is connected to are not opened for probing
+        skip = {port for station in self.stations for port in station.selected_ports()}
+        cache = get_port_cache(self.base_path)
+
+        def run():
+            try:
+                found = discover(cache, skip=skip, force=force)   # force: ignore ports.json, probe every free port
+            except Exception as e:
+                print(f"Port discovery failed: {e}")
+                return
+            self.ui.call(self.on_ports_discovered, found)
+
+        self.discovery = threading.Thread(target=run, name="port-discovery", daemon=True)
+        self.discovery.start()
+
+    def on_ports_discovered(self, found):   # Give each station the port list and the first free bench/scanner
+        taken = {port for station in self.stations for port in station.selected_ports()}
+        for station in self.stations:
+            taken |= station.show_ports(found, taken)
+
+    def on_first_frame(self):   # Called by the first station to store a frame
+        if not self.first_frame:
+            self.first_frame = True
+            report_startup("first_frame")
+
+    def get_serial_loop(self):  # Shared asyncio loop for stations using the async transport
+        if self.serial_loop is None:
+            from async_serial import SerialEventLoop    # asyncio is only loaded when a station needs it
+            self.serial_loop = SerialEventLoop()
+        return self.serial_loop
 
     def on_close(self):
+        for station in self.stations:
+            station.close()     # Disconnect and remove the station's temporary files
+
+        if self.serial_loop is not None:
+            self.serial_loop.stop()
+
+        close_outboxes()        # Unsent records stay in outbox.db for the next start
+        close_journals()        # Flush the raw frame journal
+        db_loader.close_pool()  # Close the pooled database connections
+
+        self.ui.stop()  # Stop the UI drain loop
+        self.master.destroy()  # Close the Tkinter window
+
+class StationPanel(StationListener):
+    # Tk front end for one monitor_core.Station; all capture/parse/persist work happens in the Station
+    def __init__(self, app, frame, config, base_path, file_suffix=""):
+        self.app = app
+        self.ui = app.ui    # Shared UI dispatcher
+        self.frame = frame  # Tab (or main frame) this station draws into
+        self.station = Station(config, base_path, file_suffix=file_suffix, listener=self)
+        self.listening = False  # True while the scanner reads parts by itself (scan_mode continuous/motion)
+        self.discovered_ports = set()   # Ports the port discovery selected (not configured or picked by hand)
+        self.log_history_path = os.path.join(base_path, f'log_history{file_suffix}.txt')  # Older log lines paged out of memory
+
+        self.create_widgets()   # Call the method to create widgets
+
+        # Pre-select the ports from the station config
+        if config.get("bench_port"):
+            self.port_combobox.set(config["bench_port"])
+        if config.get("scanner_port"):
+            self.port_combobox_scan.set(config["scanner_port"])
+        if config.get("baud"):
+            self.baud_combobox.set(str(config["baud"]))
+        if config.get("auto_connect") and config.get("bench_port"):
+            self.frame.after_idle(self.connect)     # Connect once the window is up
+
+    def refresh_ports(self, event=None):
+        # Enumerate the ports again (for all stations); newly plugged devices are identified and assigned.
+        # Shift+click identifies every free port again, e.g. after swapping devices between ports.
+        if event is not None and self.refresh_button.instate(["disabled"]):
+            return "break"  # The binding fires on a disabled button too
+        force = event is not None and bool(event.state & 0x0001)
+        self.app.discover_ports(force=force)
+        return "break" if event is not None else None
+
+    def selected_ports(self):   # Ports this station uses or is set up to use
+        return {port for port in (self.port_combobox.get(), self.port_combobox_scan.get()) if port}
+
+    def show_ports(self, found, taken):  # Update the port lists from a discovery (runs on the Tk thread)
+        devices = [port.device for port in found]
+        kinds = {port.device: port for port in found}
+        # Identified devices of the right kind first in each list
+        self.port_combobox["values"] = sorted(devices, key=lambda d: kinds[d].kind != KIND_BENCH)
+        self.port_combobox_scan["values"] = sorted(devices, key=lambda d: kinds[d].kind != KIND_SCANNER)
+        if self.station.connection_active:
+            return set()
+
+        assigned = set()
+        for combobox in (self.port_combobox, self.port_combobox_scan):
+            # A discovered device that went away is unplugged; configured ports (ptys, virtual ports,
+            # devices not enumerated yet) are left alone
+            if combobox.get() in self.discovered_ports and combobox.get() not in devices:
+                self.discovered_ports.discard(combobox.get())
+                combobox.set('')
+        if not self.port_combobox.get():
+            bench = next((p for p in found if p.kind == KIND_BENCH and p.device not in taken), None)
+            if bench is not None:
+                self.port_combobox.set(bench.device)
+                self.baud_combobox.set(str(bench.baud))
+                assigned.add(bench.device)
+                self.discovered_ports.add(bench.device)
+        if not self.port_combobox_scan.get():
+            scanner = next((p for p in found if p.kind == KIND_SCANNER and p.device not in taken | assigned), None)
+            if scanner is not None:
+                self.port_combobox_scan.set(scanner.device)
+                assigned.add(scanner.device)
+                self.discovered_ports.add(scanner.device)
+
+        identified = [f"{p.kind} on {p.device}" for p in found if p.kind]
+        self.log_text.insert(tk.END, f"Found {', '.join(identified)}\n" if identified else
+                             f"{len(found)} serial port(s), no bench or scanner identified\n")
+        return assigned
+
+    def close(self):
     # Ensure disconnection before closing the app
-        if self.connection_active:
+        if self.station.connection_active:
             self.disconnect()
+        self.station.close_archive()    # Write the records the archive still buffers
 
-        try:
-            os.chmod(self.csv_path, 0o666)
-            os.remove(self.csv_path)
-        except Exception as e:
-            print(f"Failed to delete CSV: {e}")
+        self.station.remove_files()
 
+        self.log_text.buffer.close()
         try:
-            os.chmod(self.txt_path, 0o666)
-            os.remove(self.txt_path)
+            os.remove(self.log_history_path)
         except Exception as e:
-            print(f"Failed to delete TXT: {e}")
-
-        self.master.destroy()  # Close the Tkinter window
+            print(f"Failed to delete log history: {e}")
 
-    def create_widgets(self):  # Method to create the widgets in the main window
+    def create_widgets(self):  # Method to create the widgets in the station frame
         # ========== Set up the grid layout ==========
         # ========== Top Frame (Row 0) - Buttons and Controls ==========
-        self.top_frame = ttk.Frame(self.master)
+        self.top_frame = ttk.Frame(self.frame)
         self.top_frame.grid(row=0, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
 
         # Port and Baud Rate
@@ -168,6 +287,8 @@ class SerialMonitor:
         # Refresh button
         self.refresh_button = ttk.Button(self.top_frame, text="⟳", width=3, command=self.refresh_ports)
         self.refresh_button.grid(row=0, column=4, padx=(10, 10))
+        self.refresh_button.bind("<Shift-Button-1>", self.refresh_ports)
+        ToolTip(self.refresh_button, text="FIND PORTS AGAIN (SHIFT+CLICK: IDENTIFY ALL PORTS AGAIN)")
 
         # Baud rate selection
         self.baud_combobox_label = ttk.Label(self.top_frame, width=15, text="Select Baud Rate:")     
@@ -187,13 +308,17 @@ class SerialMonitor:
         self.scan_button = ttk.Button(self.top_frame, text="Scan", command=self.scan)
         self.scan_button.grid(row=0, column=9, padx=5)
 
+        # Per-station throughput and latency (frame complete -> stored)
+        self.latency_label = ttk.Label(self.top_frame, text=self.station.latency.summary())
+        self.latency_label.grid(row=0, column=10, padx=(15, 5))
+
        # ========== Bottom Frame (Second Row) ========== 
-        self.bottom_frame = ttk.Frame(self.master)
+        self.bottom_frame = ttk.Frame(self.frame)
         self.bottom_frame.grid(row=1, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="nsew")
 
-        self.master.grid_rowconfigure(1, weight=1)
-        self.master.grid_columnconfigure(0, weight=1)
-        self.master.grid_columnconfigure(1, weight=1)
+        self.frame.grid_rowconfigure(1, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(1, weight=1)
 
         # Left Column - Log Area
         self.left_frame = ttk.Frame(self.bottom_frame)
@@ -204,7 +329,9 @@ class SerialMonitor:
         self.log_label = ttk.Label(self.left_frame, text="Scan Result", font=("Helvetica", 10, "bold"))
         self.log_label.grid(row=0, column=0, sticky="w", pady=(0, 2))
 
-        self.log_text = scrolledtext.ScrolledText(self.left_frame, wrap=tk.WORD, height=25, width=90)
+        # Only the visible lines are rendered, older lines are paged out to the log history file
+        log_buffer = LogBuffer(max_lines=MAX_LOG_LINES, history_path=self.log_history_path)
+        self.log_text = LogView(self.left_frame, buffer=log_buffer, height=25, width=90)
         self.log_text.grid(row=1, column=0, sticky="nsew")
         self.left_frame.grid_rowconfigure(1, weight=1)
         self.left_frame.grid_columnconfigure(0, weight=1)
@@ -222,15 +349,13 @@ class SerialMonitor:
         self.right_frame.grid_rowconfigure(1, weight=1)
         self.right_frame.grid_columnconfigure(0, weight=1)
 
-    def populate_ports(self, parent):   # Method to populate the combobox with available serial ports
-        ports = [port.device for port in serial.tools.list_ports.comports()]    # Get a list of available serial ports
-        self.port_combobox = ttk.Combobox(parent, values=ports, state="readonly")  # Create a combobox for selecting ports
+    def populate_ports(self, parent):   # Method to create the bench port combobox, filled in by the port discovery
+        self.port_combobox = ttk.Combobox(parent, values=[], state="readonly")  # Create a combobox for selecting ports
         self.port_combobox.grid(row=0, column=1, pady=5, padx=(10, 10))      # Place it in the grid
         ToolTip(self.port_combobox_label, text="COM PORT FOR TEST BANCH")  # Add tooltip to the port label
 
-    def populate_ports_scan(self, parent):   # Method to populate the combobox with available serial ports
-        ports = [port.device for port in serial.tools.list_ports.comports()]    # Get a list of available serial ports
-        self.port_combobox_scan = ttk.Combobox(parent, values=ports, state="readonly")  # Create a combobox for selecting ports
+    def populate_ports_scan(self, parent):   # Method to create the scanner port combobox, filled in by the port discovery
+        self.port_combobox_scan = ttk.Combobox(parent, values=[], state="readonly")  # Create a combobox for selecting ports
         self.port_combobox_scan.grid(row=0, column=3, pady=5, padx=(2, 0))      # Place it in the grid
         ToolTip(self.port_combobox_label_scan, text="COM PORT FOR QR SCANNER")  # Add tooltip to the port label
 
@@ -238,8 +363,9 @@ class SerialMonitor:
         port = self.port_combobox.get() # Get the selected port from the combobox
         baud = int(self.baud_combobox.get())    # Get the selected baud rate from the combobox
         try:    
-            self.ser = Serial(port, baud, timeout=1)    # Create a Serial object with the selected port and baud rate
+            serial_loop = self.app.get_serial_loop() if self.station.use_async else None
             self.log_text.delete(1.0, tk.END)   # Clear the log text area
+            self.station.connect(port, baud, serial_loop)   # Open the port and start the reader
             self.log_text.insert(tk.END, f"Connected to {port} at {baud} baud\n")   # Insert connection message into the log text area
             self.disconnect_button["state"] = tk.NORMAL # Enable the disconnect button
             self.connect_button["state"] = tk.DISABLED  # Disable the connect button
@@ -248,265 +374,118 @@ class SerialMonitor:
             self.refresh_button["state"] = tk.DISABLED      # Disable the refresh button
             self.scan_button["state"] = tk.NORMAL  # Enable the scan button
             self.baud_combobox["state"] = tk.DISABLED  # Enable the refresh button
-
-            self.connection_active = True   # Set the flag to True to indicate connection is active
-
-            self.thread = threading.Thread(target=self.read_from_port)  # Create a thread to read data from the port
-            self.thread.start() # Start the thread
+            scanner_port = self.port_combobox_scan.get()
+            if scanner_port and (self.station.scanner_profile or self.station.scan_mode != "manual"):
+                # Profile and listener talk to the scanner, which may be slow or silent: keep the window responsive
+                self.scan_button["state"] = tk.DISABLED
+                threading.Thread(target=self.start_scanner, args=(scanner_port,), name="scanner-setup",
+                                 daemon=True).start()
 
         except Exception as e:  # Handle any exceptions that occur during connection
             self.log_text.insert(tk.END, f"Error: {str(e)}\n")  # Insert error message into the log text area
 
-    def disconnect(self):   # Method to disconnect from the serial port
-        self.connection_active = False  # Set the flag to False to stop the reading thread
-        if hasattr(self, 'ser') and self.ser.is_open:   # Check if the serial object exists and is open
-            self.ser.close()    # Close the serial connection
+    def start_scanner(self, scanner_port):  # Runs on a worker thread, see connect()
+        listening = self.station.start_scanner(scanner_port)
+        self.ui.call(self.on_scanner_ready, listening)
 
-        if hasattr(self, 'thread') and self.thread.is_alive():
-            self.thread.join(timeout=1)  # Wait max 2 seconds to prevent freezing
+    def on_scanner_ready(self, listening):  # Runs on the Tk thread once the scanner is set up
+        if not self.station.connection_active:
+            self.station.close_scanner()    # Disconnected meanwhile
+            return
+        # In continuous/motion mode on_scanned shows each new serial number, the Scan button stays off
+        self.listening = listening
+        self.scan_button["state"] = tk.DISABLED if listening else tk.NORMAL
+
+    def disconnect(self):   # Method to disconnect from the serial port
+        self.station.disconnect()   # Stop the reader and close the port
+        self.listening = False
 
         self.connect_button["state"] = tk.NORMAL    # Enable the connect button
         self.port_combobox["state"] = tk.NORMAL  # Enable the port combobox 
         self.disconnect_button["state"] = tk.DISABLED   # Disable the disconnect button
-        self.log_text.insert(tk.END, "Disconnected\n")  # Insert disconnection message into the log text area
-        self.log_text.see(tk.END)  # Scroll to the end of the log text area
+        self.ui.log(self.log_text, "Disconnected\n")  # Queued so it lands after any text still pending from the reader
         self.refresh_button.config(state="enabled")  # Enable the refresh button
         self.baud_combobox.config(state="enabled")  # Enable the baud comebox button
         self.port_combobox_scan["state"] = tk.NORMAL  # Disable the port combobox
 
-    def scan(self):   # Method to disconnect from the serial port
+    def set_scan_state(self, state):  # Enable/disable the scan button (runs on the Tk thread)
+        self.scan_button["state"] = tk.DISABLED if self.listening else state
+
+    def scan(self):   # Method to scan the serial number with the QR scanner
         self.log_text.see(tk.END)  # Scroll to the end of the log text area
 
         selected_port = self.port_combobox_scan.get()  # Get the selected port for QR scanner
         if selected_port:
-            scanned_barcode = barcode_scanner(selected_port)  # Pass the selected port to the scanner function
-            if scanned_barcode:  # If barcode was scanned successfully
-                self.result_dict = {key: "null" for key in self.manual_header}  # Reset result_dict to "null" for all keys
-                self.result_dict["Serial_Number"] = scanned_barcode  # Update with scanned barcode
-                dummy_timestamp = "null"  # Use a dummy timestamp
-                self.store_data_in_csv(dummy_timestamp, self.result_dict)   # Store the data in CSV
-
-            # If there was a previous valid message, append it to the log
-            # This is useful for keeping track of the last scanned barcode
-            if hasattr(self, 'last_scanned_barcode'):
-                prev_barcode_entry = f"Serial No is : {self.last_scanned_barcode}\n"
-                self.last_valid_message = prev_barcode_entry + self.last_valid_message  # Append to previous log
-
-            # move previous valid message to latest_text
-            self.latest_text.configure(state='normal')
-            self.latest_text.delete("1.0", tk.END)
-            self.latest_text.insert(tk.END, self.last_valid_message)  # Insert the last valid message into the latest_text area
-            self.latest_text.configure(state='disabled')
-            
-            # Clear the log text area and insert the scanned barcode
-            self.log_text.delete("1.0", tk.END)  # Clear the log text area
-            self.log_text.insert(tk.END, f"Serial No is : {scanned_barcode}\n")
-
-            if scanned_barcode:
-                self.last_scanned_barcode = scanned_barcode # Store the last scanned barcode
-            else:
-                self.log_text.insert(tk.END, "No barcode scanned.\n")       
-                self.last_scanned_barcode = ""  # Reset last scanned barcode
-
-            
-
+            if self.station.use_async:
+                # Scan on the shared event loop and show the result when it arrives, the UI stays responsive
+                self.scan_button["state"] = tk.DISABLED
+                future = self.app.get_serial_loop().submit(self.station.scan_async(selected_port))
+                future.add_done_callback(self.on_scan_done)
+                return
+            scanned_barcode = self.station.scan(selected_port)  # Read the barcode and start a new record with it
+            self.show_scan_result(scanned_barcode)
         else:
             self.log_text.insert(tk.END, "No port selected for scanner.\n")
 
-    def read_from_port(self):  # Method to read data from the serial port in a separate thread
-        buffer = ""  # Temporary buffer for incoming data
-        self.last_valid_message = ""  # Variable to store the last valid message
-        start_marker = "START"  # Define start and end markers for messages
-        end_marker = "STOP"  # Define start and end markers for messages
-        self.log_text.insert(tk.END, "Reading from port...\n")  # Insert reading message into the log text area
+    def on_scan_done(self, future):  # Called on the event loop thread when scan_async finishes
+        try:
+            scanned_barcode = future.result()
+        except Exception as e:
+            print(f"Scanner error: {e}")
+            scanned_barcode = ""
+        self.ui.call(self.show_scan_result, scanned_barcode, True)
+
+    def show_scan_result(self, scanned_barcode, from_async=False):  # Show a scanned serial number (runs on the Tk thread)
+        if from_async:
+            self.scan_button["state"] = tk.NORMAL
+            self.station.set_serial_number(scanned_barcode)
+
+        # If there was a previous valid message, append it to the log
+        # This is useful for keeping track of the last scanned barcode
+        if hasattr(self, 'last_scanned_barcode'):
+            prev_barcode_entry = f"Serial No is : {self.last_scanned_barcode}\n"
+            self.station.last_valid_message = prev_barcode_entry + self.station.last_valid_message  # Append to previous log
+
+        # move previous valid message to latest_text
+        self.latest_text.configure(state='normal')
+        self.latest_text.delete("1.0", tk.END)
+        self.latest_text.insert(tk.END, self.station.last_valid_message)  # Insert the last valid message into the latest_text area
+        self.latest_text.configure(state='disabled')
+        
+        # Clear the log text area and insert the scanned barcode
+        self.log_text.delete("1.0", tk.END)  # Clear the log text area
+        self.log_text.insert(tk.END, f"Serial No is : {scanned_barcode}\n")
+
+        if scanned_barcode:
+            self.last_scanned_barcode = scanned_barcode # Store the last scanned barcode
+        else:
+            self.log_text.insert(tk.END, "No barcode scanned.\n")       
+            self.last_scanned_barcode = ""  # Reset last scanned barcode
 
-        while self.connection_active:
-            try:
-                line = self.ser.readline().decode("utf-8", errors="ignore")  # Read line
+    # ----- StationListener: called from the reader thread / event loop, only queue UI work -----
+    def on_chunk(self, station, chunk, frames, was_in_frame, in_frame):  # Queue the raw text and START/STOP state for the UI
+        if frames or (in_frame and not was_in_frame):
+            if not was_in_frame:
                 timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Get current timestamp
-                if line:
-                    buffer += line  # Append line to buffer
-                    if start_marker in line:
-                        self.scan_button["state"] = tk.DISABLED  # Enable the scan button
-                        self.log_text.insert(tk.END, f"Time :- {timestamp}\n")  # Show new message in log_text
-                    if end_marker in line:
-                        self.scan_button["state"] = tk.NORMAL  # Enable the scan button
-                        # Show new message in log_text
-                    self.log_text.insert(tk.END, line)  # Insert the line into the log text area
-                    self.log_text.see(tk.END)  # Scroll to the end of the log text area
-
-                    # Check for complete message between START and END
-                    if start_marker in buffer and end_marker in buffer:
-                        # Extract the message between START and END markers
-                        start_index = buffer.find(start_marker)
-                        end_index = buffer.find(end_marker) + len(end_marker)
-
-                        full_message = buffer[start_index:end_index].strip()
-                        log_entry = f"[{timestamp}]\n{full_message}\n"
-
-                        if os.path.exists(self.txt_path):
-                            os.system(f'attrib -h "{self.txt_path}"')   # Unhide the file after writing
-                            os.system(f'attrib -r "{self.txt_path}"')  # Set file permissions to write
-
-                        # Store or log the message
-                        with open(self.txt_path, "w") as file:
-                            file.write(log_entry)
-                        
-                        os.system(f'attrib +r "{self.txt_path}"')   # Make the file read-only
-                        os.system(f'attrib +h "{self.txt_path}"')   # Hide the file after writing
-
-                        if not self.save_message_exact(full_message, timestamp):
-                            buffer = buffer[end_index:]
-                            continue  # Skip to the next iteration if the message is not valid
-
-                        self.log_text.see(tk.END)  # Scroll to the end of the log text area
-
-                        # Update last_valid_message to the new message (this is the last good message now)
-                        self.last_valid_message = f"[{timestamp}]\n{full_message}"
-
-                        buffer = buffer[end_index:]
+                self.ui.log(self.log_text, f"Time :- {timestamp}\n")  # Show new message in log_text
+            self.ui.call(self.set_scan_state, tk.DISABLED if in_frame else tk.NORMAL)
+        self.ui.log(self.log_text, chunk.decode("utf-8", errors="ignore"))  # Queue the raw text for the log text area
 
-            except Exception as e:
-                if self.connection_active:
-                    self.log_text.insert(tk.END, f"Error reading from port: {str(e)}\n")
-                break
- 
-    def save_message_exact(self, full_message, timestamp):  # Method to save the message to a CSV file
-
-        for key in self.manual_header:
-            if key == "Serial_Number" and self.result_dict.get(key, "null") not in ["null", ""]:
-            # If the column is "Serial_Number" and it already has a valid value, keep it intact
-                continue
-            self.result_dict[key] = "null"  # Set all other columns to "null"
-
-        # Split the full message into individual lines
-        split_message = [part.strip() for part in full_message.splitlines() if part.strip()]
-
-        # Filter out any comment lines (those starting with /* and ending with */)
-        filtered_message = [part for part in split_message if not (part.startswith("/*") and part.endswith("*/"))]
-
-        # If the filtered message is empty (meaning the whole message was a comment), skip it
-        if not filtered_message:
-            return False  # Signal to skip
-        
-         # Ensure result_dict exists from scan step
-        if not hasattr(self, "result_dict"):
-            self.result_dict = {key: "null" for key in self.manual_header}
-
-
-        # Fixed line-to-header mapping (exact match)
-        fixed_lines_map = {
-            "LED is not OK": ("LED_status", "0"),
-            "LED is OK": ("LED_status", "1"),
-            "Vcc Volt is not OK !": ("VCC", "0"),
-            "Vcc Volt is OK !": ("VCC", "1"),
-            "Plus 5 Volt is not OK": ("PLUS_VOLT", "0"),
-            "Plus 5 Volt is OK": ("PLUS_VOLT", "1"),
-            "Minus 5 volt is not OK": ("MINUS_VOLT", "0"),
-            "Minus 5 volt is OK": ("MINUS_VOLT", "1"),
-            "bat is not OK": ("BATTERY_VOLT", "0"),
-            "bat is OK": ("BATTERY_VOLT", "1"),
-            "buck is not OK": ("BUCK_VOLT", "0"),
-            "buck is OK": ("BUCK_VOLT", "1"),
-            "Raspberry pi is not working !": ("RASPBERRY_PI", "0"),
-            "raspberry pi is OK": ("RASPBERRY_PI", "1"),
-            "raspberry pi is running": ("RASPBERRY_PI_RUN", "1"),
-        }
-
-        lines = [line.strip() for line in full_message.splitlines() if line.strip()]
-        screen_count = 0  # Initialize screen count for each message
-
-        for line in lines:
-            if line.startswith("Vcc_avg ="):
-                self.result_dict["VCC_AVERAGE"] = line.split("=", 1)[1].strip()
-            elif line.startswith("plus_5_avg ="):
-                self.result_dict["PLUS_AVERAGE"] = line.split("=", 1)[1].strip()
-            elif line.startswith("min_5_avg ="):
-                self.result_dict["MINUS_AVERAGE"] = line.split("=", 1)[1].strip()
-            elif line.startswith("bat_avg ="):
-                self.result_dict["BATTERY_AVERAGE"] = line.split("=", 1)[1].strip()
-            elif line.startswith("buck_avg ="):
-                self.result_dict["BUCK_AVERAGE"] = line.split("=", 1)[1].strip()
-            elif "screen is working ok" in line.lower() or "screen is not ok" in line.lower():          # Check if the line contains "screen is working ok" or "screen is not ok"
-                # Assign values to Screen_1, Screen_2, etc., depending on how many screens are being processed
-                screen_key = f"SCREEN_{screen_count + 1}"
-                self.result_dict[screen_key] = "1" if "working ok" in line.lower() else "0"
-                screen_count += 1
-
-            elif line in fixed_lines_map:
-                header, value = fixed_lines_map[line]
-                self.result_dict[header] = value
-
-        # Error check 1: Serial number is null
-        if self.result_dict.get("Serial_Number", "null") == "null":
-            print("ERROR: Please scan Serial number")
-
-        # Error check 2: More than 5 nulls from col 3 to col 15
-        keys_3_to_15 = self.manual_header[1:16]  # Skip timestamp (assumed separate), take 2nd to 15th headers
-        null_count = sum(1 for key in keys_3_to_15 if self.result_dict.get(key, "null") == "null")
-
-        if null_count > 2:
-            print("ERROR: More than 2 missing values in diagnostic range (cols 3–15)")
-            print("Please Reset Controller and try again")
-
-        # Status check based on LED status and volt statuses (cols 3 and 9–15)
-        status_check_keys = [
-            "LED status",       # Column 3
-            "VCC",              # Column 9
-            "PLUS_VOLT",        # Column 10
-            "MINUS_VOLT",       # Column 11
-            "BATTERY_VOLT",     # Column 12
-            "BUCK_VOLT",        # Column 13
-            "RASPBERRY_PI",     # Column 14
-            "RASPBERRY_PI_RUN",  # Column 15
-            "SCREEN_1"          # Column 16
-        ]
-
-        status_values = [self.result_dict.get(k, "null") for k in status_check_keys]
-        if "0" in status_values:
-            self.result_dict["Status"] = "BAD"
-        elif all(val == "1" for val in status_values):
-            self.result_dict["Status"] = "GOOD"
-
-        # Now, call store_data_in_csv to save this data in CSV
-        self.store_data_in_csv(timestamp, self.result_dict)
-
-        os.system(f'attrib -h -r "{self.csv_path}"')  # Unhide and unlock the file before writing
-
-        success, message = db_loader.load_csv_to_db(self.csv_path)  # Call the function to load data into the database
-        if success:
-            os.system(f'attrib +h +r "{self.csv_path}"')  # Unhide and unlock the file before writing
-            return True  # Signal success
-        else:
-            os.system(f'attrib +h +r "{self.csv_path}"')  # Unhide and unlock the file before writing
-            self.log_text.insert(tk.END, f"Database error: {message}\n")
-            return False  # Signal failure
-        
-        # return True  # Signal success
-        
-    def store_data_in_csv(self, timestamp, result_dict): 
-        # Use self.result_dict if none is passed
-        if result_dict is None:
-            result_dict = self.result_dict
-
-        if os.path.exists(self.csv_path):
-            os.system(f'attrib -h "{self.csv_path}"')  # Unhide the file before writing'
-            os.system(f'attrib -r "{self.csv_path}"')  # Set file permissions to write
-
-        # Always open in write mode to overwrite previous content
-        with open(self.csv_path, mode="w", newline="") as file:
-            writer = csv.writer(file)
-            # If the file doesn't exist, write the header
-            writer.writerow(["Timestamp"] + self.manual_header)
-            # Then write the new row
-            writer.writerow([timestamp] + [result_dict.get(key, "null") for key in self.manual_header])
-        
-        os.system(f'attrib +r "{self.csv_path}"')  # Make the file read-only
-        os.system(f'attrib +h "{self.csv_path}"')   # Hide the file after writing
+    def on_stored(self, station, full_message, timestamp, stored, record):
+        self.app.on_first_frame()
+        self.ui.call(self.latency_label.configure, {"text": station.latency.summary()})
+
+    def on_message(self, station, text):
+        self.ui.log(self.log_text, text)
+
+    def on_scanned(self, station, barcode):
+        self.ui.call(self.show_scan_result, barcode)
 
 if __name__ == "__main__":  # Main function to run the application
     root = tk.Tk()  # Create the main window
     # Set the window icon (make sure this is before mainloop)
     set_window_icon(root, "fast.ico")
-    app = SerialMonitor(root)   # Create an instance of the SerialMonitor class
+    # Optional station config path as the first argument (default: stations.json next to the script)
+    stations = load_station_config(sys.argv[1]) if len(sys.argv) > 1 else None
+    app = SerialMonitor(root, stations)   # Create an instance of the SerialMonitor class
     root.mainloop() # Start the Tkinter main loop to run the application
@@ -5,12 +5,12 @@ a = Analysis(
     ['AM60_TB_FAST.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('schemas', 'schemas')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['pandas', 'numpy'],  # Only db_loader.load_csv_to_db uses pandas, and the app never calls it
     noarchive=False,
     optimize=0,
 )
@@ -1,38 +1,384 @@
 # from de2120_barcode_scanner import DE2120BarcodeScanner as DE2120
 from scanner_lib import DE2120BarcodeScanner as DE2120
+from scanner_profile import apply_profile
+from port_discovery import device_key
+import threading
 import time
 import serial
 from serial.tools import list_ports
 
-def barcode_scanner(port_name):
-    # Create a DE2120 object
-    scanner = DE2120(port_name)
-    buffer = b""  # Initialize an empty byte buffer for barcode data
+SCANNER_BAUD = 115200
+SCAN_TIMEOUT = 5.0      # Seconds from the scan trigger to the end of the barcode
+CHAR_TIMEOUT = 0.5      # Longest gap between two characters of a barcode
+TERMINATORS = b"\r\n"   # The DE2120 ends every barcode with CR/LF
+STRAY = TERMINATORS + b"\x06\x15"    # Skipped before a barcode: CR/LF and late ACK/NACK of earlier commands
+
+# Listener (continuous / motion) mode
+SCAN_MODE_MANUAL = "manual"         # Scan button triggers one read (default)
+SCAN_MODE_CONTINUOUS = "continuous" # Scanner reads all the time (SCMCNT), repeats follow CNTALW
+SCAN_MODE_MOTION = "motion"         # Scanner reads when something moves in front of it (SCMMDH)
+SCAN_MODES = (SCAN_MODE_MANUAL, SCAN_MODE_CONTINUOUS, SCAN_MODE_MOTION)
+# CNTALW setting -> seconds between outputs of a code held in front of the scanner (0: output once)
+REPEAT_INTERVALS = {0: 0.0, 1: 0.05, 2: 0.5, 3: 1.0}
+DEBOUNCE_MARGIN = 0.5   # A code seen again within its repeat interval + this is the same presentation
+MOTION_DEBOUNCE = 1.0   # Same for motion mode, which has no repeat setting
+LISTEN_POLL = 0.1       # Seconds a listener read blocks, how fast stop_listening() takes effect
+RECONNECT_DELAY = 1.0   # Seconds between attempts to reopen a listening scanner's port
+
+
+class TappedSerial(serial.Serial):
+    """
+        serial.Serial that hands every chunk it reads to tap(data), so a
+        capture holds exactly what the scanner sent: barcodes, ACK/NACK
+        answers and stray CR/LF alike.
+    """
+
+    tap = None
+
+    def read(self, size=1):
+        data = super().read(size)
+        if data and self.tap is not None:
+            self.tap(data)
+        return data
+
+
+class ScannerSession:
+    """
+        Long-lived connection to one DE2120 scanner.
+
+        The port is opened once, on the first scan, and reused
+        for every scan after that. A serial error closes the port and the
+        scan is retried once on a freshly opened one, so unplugging and
+        replugging the scanner needs no restart.
+
+        :param port_name: scanner port, e.g. COM4 or /dev/ttyACM0
+        :param baudrate: scanner baud rate
+        :param timeout: seconds from the scan trigger to the end of the barcode
+        :param char_timeout: longest gap between two characters of a barcode
+    """
+
+    def __init__(self, port_name, baudrate=SCANNER_BAUD, timeout=SCAN_TIMEOUT, char_timeout=CHAR_TIMEOUT):
+        self.port_name = port_name
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.char_timeout = char_timeout
+        self.scanner = None
+        self._lock = threading.Lock()   # One scan at a time per port
+        self.opens = 0
+        self.scans = 0
+        self.profile_cache = None       # scanner_profile.ProfileCache set by configure()
+        self.device = None              # Cache key of the scanner, see port_discovery.device_key
+        self.on_raw = None              # Called with every chunk read from the port (capture recording)
+
+        self.mode = SCAN_MODE_MANUAL
+        self._subscribers = []
+        self._listener = None           # Thread reading barcodes in continuous/motion mode
+        self._listening = threading.Event()
+        self._stop = threading.Event()
+        self.debounce = 0.0
+        self._last_code = None
+        self._last_seen = 0.0
+        self.repeats = 0                # Barcodes dropped as repeats of the same presentation
+
+    @property
+    def is_open(self):
+        return self.scanner is not None and self.scanner.hard_port.is_open
+
+    def open(self):
+        """
+            Open the port if it is not open yet.
+
+            :return: the scanner
+            :rtype: scanner_lib.DE2120BarcodeScanner
+        """
+        if not self.is_open:
+            port = TappedSerial(self.port_name, self.baudrate, timeout=1)
+            port.tap = self._tap
+            self.scanner = DE2120(hard_port=port)
+            self.opens += 1
+        return self.scanner
+
+    def scan(self):
+        """
+            Trigger one scan and wait for the barcode.
+
+            :return: the barcode, empty string if nothing was read
+            :rtype: str
+        """
+        if self._listening.is_set():
+            raise RuntimeError(f"Scanner on {self.port_name} is in {self.mode} mode, barcodes arrive by themselves")
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    scanner = self.open()
+                    scanner.hard_port.reset_input_buffer()   # Drop anything left over from an earlier scan
+                    decoded = read_barcode(scanner, self.timeout, self.char_timeout)
+                    self.scans += 1
+                    return decoded
+                except TypeError:   # send_command got no ACK/NACK at all (ord(b'')): nothing answers on this port
+                    self._close_port()
+                    print(f"No answer from the scanner on {self.port_name}")
+                    return ""
+                except (serial.SerialException, OSError) as e:
+                    self._close_port()
+                    if attempt:
+                        print(f"Serial error: {e}")
+            return ""
+
+    def _tap(self, data):
+        on_raw = self.on_raw
+        if on_raw is not None:
+            on_raw(data)
+
+    def _close_port(self):
+        if self.scanner is not None:
+            try:
+                self.scanner.hard_port.close()
+            except (serial.SerialException, OSError):
+                pass
+            self.scanner = None
+
+    def subscribe(self, callback):
+        """
+            :param callback: called as callback(barcode) from the listener
+                thread for every new barcode (queue.Queue.put works too)
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def listen(self, mode=SCAN_MODE_CONTINUOUS, repeat_interval=2, sensitivity=20):
+        """
+            Switch the scanner to continuous or motion reading and pass every
+            barcode to the subscribers from a background thread. A code that
+            keeps coming while the part stays in front of the scanner is
+            reported once: repeats within the CNTALW interval (plus
+            DEBOUNCE_MARGIN) of the previous sighting are dropped.
 
-    scanner.start_scan()  # Start scanning for barcodes
+            :param mode: SCAN_MODE_CONTINUOUS or SCAN_MODE_MOTION
+            :param repeat_interval: CNTALW setting 0-3 for continuous mode
+                (0 once, 1 no interval, 2 every 0.5 s, 3 every 1 s)
+            :param sensitivity: MDTTHR setting for motion mode (15, 20, 30, 50 or 100)
+        """
+        if mode not in (SCAN_MODE_CONTINUOUS, SCAN_MODE_MOTION):
+            raise ValueError(f"Listen mode must be {SCAN_MODE_CONTINUOUS!r} or {SCAN_MODE_MOTION!r}")
+        if repeat_interval not in REPEAT_INTERVALS:
+            raise ValueError(f"repeat_interval must be one of {list(REPEAT_INTERVALS)}")
+        self.stop_listening()
+        self.mode = mode
+        self.repeat_interval = repeat_interval
+        self.sensitivity = sensitivity
+        self.debounce = (REPEAT_INTERVALS[repeat_interval] if mode == SCAN_MODE_CONTINUOUS else MOTION_DEBOUNCE) \
+            + DEBOUNCE_MARGIN
+        with self._lock:
+            self._start_mode()     # Fails here (not in the thread) if the port cannot be opened
+        self._stop.clear()
+        self._listening.set()
+        self._listener = threading.Thread(target=self._listen, name=f"scanner-{self.port_name}", daemon=True)
+        self._listener.start()
 
+    def configure(self, profile, cache=None, force=False):
+        """
+            Apply a configuration profile (see scanner_profile.SETTINGS) as
+            one pipelined batch. With a cache only settings that differ from
+            what this scanner last acknowledged are sent.
+
+            :param profile: {setting: value}
+            :param cache: scanner_profile.ProfileCache
+            :param force: send every setting regardless of the cache
+            :return: applied, skipped, refused and unanswered settings
+            :rtype: scanner_profile.ProfileResult
+        """
+        with self._lock:
+            scanner = self.open()
+            if cache is not None and self.device is None:
+                self.device = device_key(self.port_name)
+            self.profile_cache = cache
+            scanner.hard_port.reset_input_buffer()
+            return apply_profile(scanner, profile, cache, self.device, force)
+
+    def _apply(self, profile):
+        # Mode switches are always sent (the scanner may have been power cycled) but keep the cache current
+        return apply_profile(self.open(), profile, self.profile_cache, self.device, force=True)
+
+    def _start_mode(self):
+        self.open().hard_port.reset_input_buffer()
+        if self.mode == SCAN_MODE_CONTINUOUS:
+            result = self._apply({"reading_mode": self.mode, "repeat_interval": self.repeat_interval})
+        else:
+            result = self._apply({"reading_mode": self.mode, "motion_sensitivity": self.sensitivity})
+        if "reading_mode" in result.missing:
+            self._close_port()
+            raise serial.SerialException(f"No scanner answering on {self.port_name}")
+
+    def _listen(self):
+        buffer = bytearray()
+        while not self._stop.is_set():
+            try:
+                with self._lock:
+                    if not self.is_open:
+                        self._start_mode()
+                        buffer.clear()
+                    port = self.scanner.hard_port
+                    port_timeout = port.timeout
+                    port.timeout = LISTEN_POLL  # Short reads so stop_listening() takes effect quickly
+                    try:
+                        data = port.read(port.in_waiting or 1)
+                    finally:
+                        port.timeout = port_timeout     # Commands sent later wait for their ACK as usual
+            except (serial.SerialException, OSError, TypeError) as e:
+                print(f"Scanner {self.port_name}: {e}, reconnecting")
+                with self._lock:
+                    self._close_port()
+                self._stop.wait(RECONNECT_DELAY)
+                continue
+            if not data:
+                continue
+            buffer += data
+            for code in take_lines(buffer):
+                self._received(code)
+
+    def _received(self, code):
+        now = time.monotonic()
+        if code == self._last_code and now - self._last_seen < self.debounce:
+            self._last_seen = now   # Still the same presentation
+            self.repeats += 1
+            return
+        self._last_code, self._last_seen = code, now
+        self.scans += 1
+        for callback in list(self._subscribers):
+            try:
+                callback(code)
+            except Exception as e:
+                print(f"Scanner subscriber failed: {e}")
+
+    @property
+    def listening(self):
+        return self._listening.is_set()
+
+    def stop_listening(self):
+        """
+            Stop the listener thread and put the scanner back into manual trigger mode.
+        """
+        if not self._listening.is_set():
+            return
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(LISTEN_POLL * 5 + RECONNECT_DELAY)
+            self._listener = None
+        with self._lock:
+            if self.is_open:
+                try:
+                    self.scanner.hard_port.reset_input_buffer()
+                    self._apply({"reading_mode": SCAN_MODE_MANUAL})
+                except (serial.SerialException, OSError, TypeError):
+                    pass
+        self._listening.clear()
+        self.mode = SCAN_MODE_MANUAL
+
+    def close(self):
+        """
+            Put the scanner to sleep and close the port.
+        """
+        self.stop_listening()
+        with self._lock:
+            if self.is_open:
+                try:
+                    self.scanner.stop_scan()
+                except (serial.SerialException, OSError, TypeError):
+                    pass    # TypeError: no answer to the command
+            self._close_port()
+
+
+def take_lines(buffer):
+    """
+        Remove every complete line from buffer (bytearray of raw scanner
+        output), leaving an unfinished one in it.
+
+        :return: the barcodes on those lines, stray ACK/NACK bytes and empty lines dropped
+        :rtype: list
+    """
+    codes = []
+    while True:
+        end = next((i for i, byte in enumerate(buffer) if byte in TERMINATORS), None)
+        if end is None:
+            return codes
+        code = bytes(buffer[:end]).strip(STRAY).decode("utf-8", errors="ignore").strip()
+        del buffer[:end + 1]
+        if code:
+            codes.append(code)
+
+
+def read_barcode(scanner, timeout=SCAN_TIMEOUT, char_timeout=CHAR_TIMEOUT):
+    """
+        Trigger a scan on an open scanner and read the barcode it sends.
+
+        Reads whatever the port has in one go and blocks in the driver
+        between reads (no sleeping), so it returns as soon as the CR/LF
+        after the barcode arrives.
+
+        :param scanner: scanner_lib.DE2120BarcodeScanner with an open port
+        :param timeout: seconds from the scan trigger to the end of the barcode
+        :param char_timeout: longest gap between two characters once the barcode started
+        :return: the barcode, empty string if nothing was read in time
+        :rtype: str
+    """
+    port = scanner.hard_port
+    port_timeout = port.timeout
+    buffer = bytearray()  # Barcode bytes received so far
     try:
+        if not scanner.start_scan():  # Start scanning for barcodes
+            return ""
+        deadline = time.monotonic() + timeout
+        last_data = None
         while True:
-            
-            time.sleep(0.1)  # Small delay to allow scanner to scan
-
-            byte = scanner.read()
-            if byte:
-                time.sleep(0.1)  # Small delay to allow scanner to process data
-                if byte in [b'\r', b'\n']:  # End of barcode
-                    if buffer:
-                        decoded = buffer.decode('utf-8', errors='ignore').strip()
-                        print(f"Scanned barcode: {decoded}")
-                        buffer = b""  # Clear buffer for next scan
-                        scanner.stop_scan()  # Stop scanning
-                        return decoded  # Return the scanned barcode
-                else:
-                    buffer += byte
-            else:
-                break  # No data this moment; wait quietly
-    except serial.SerialException as e:
-        print(f"Serial error: {e}")
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-
-    return buffer.decode('utf-8', errors='ignore').strip()  # Return the scanned barcode as a string
+            now = time.monotonic()
+            limit = deadline if last_data is None else min(deadline, last_data + char_timeout)
+            if now >= limit:
+                return buffer.decode('utf-8', errors='ignore').strip()  # No terminator in time, return what came
+            port.timeout = limit - now  # The read blocks until data arrives or the limit is reached
+            data = port.read(port.in_waiting or 1)
+            if not data:
+                continue
+            buffer += data.lstrip(STRAY) if not buffer else data
+            if not buffer:
+                continue
+            last_data = time.monotonic()
+            end = next((i for i, byte in enumerate(buffer) if byte in TERMINATORS), None)
+            if end is not None:  # End of barcode
+                decoded = buffer[:end].decode('utf-8', errors='ignore').strip()
+                print(f"Scanned barcode: {decoded}")
+                port.write(b"^_^" + scanner.COMMAND_STOP_SCAN.encode() + b".")  # Not waiting for the ACK, it is skipped later
+                return decoded
+    finally:
+        port.timeout = port_timeout
+
+
+_sessions = {}      # port name -> ScannerSession
+_sessions_lock = threading.Lock()
+
+def get_session(port_name):
+    """
+        :return: the shared session for port_name, created on first use
+        :rtype: ScannerSession
+    """
+    with _sessions_lock:
+        if port_name not in _sessions:
+            _sessions[port_name] = ScannerSession(port_name)
+        return _sessions[port_name]
+
+def close_sessions():
+    """
+        Close every scanner session.
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+def barcode_scanner(port_name):
+    # Scan one barcode on port_name, reusing the port opened by an earlier scan
+    return get_session(port_name).scan()
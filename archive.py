@@ -0,0 +1,396 @@
+import argparse
+import array
+import csv
+import datetime
+import json
+import math
+import os
+import queue
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+
+ARCHIVE_MAGIC = b"FSMARC1\n"    # File signature + format version
+ARCHIVE_EXTENSION = ".farc"
+ARCHIVE_DIR = "archive"         # Default folder, next to the station's other files
+ARCHIVE_BATCH = 256             # Records per block
+ARCHIVE_FLUSH_INTERVAL = 10.0   # Seconds a record may wait for its block to fill
+ARCHIVE_MAX_BYTES = 64 * 1024 * 1024    # A day's file is continued in a new part past this size
+COMPRESSION_LEVEL = 6
+
+# Column types. Nulls ("null" in the record, or values that do not convert) are NaN / INT8_NULL / length -1
+TIMESTAMP = "timestamp"     # float64 epoch seconds
+FLOAT = "float"             # float64
+INT8 = "int8"               # -127..127, pass/fail flags
+STR = "str"                 # UTF-8
+COLUMN_TYPES = (TIMESTAMP, FLOAT, INT8, STR)
+INT8_NULL = -128
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_HEADER_LENGTH = struct.Struct("<I")        # Length of the JSON file header
+_BLOCK_HEADER = struct.Struct("<III")       # Rows, uncompressed length, compressed length
+_COLUMN_LENGTH = struct.Struct("<I")        # Bytes of one encoded column inside a block
+_ARRAY_CODES = {TIMESTAMP: "d", FLOAT: "d", INT8: "b"}
+_SWAP = sys.byteorder != "little"           # Files are little endian
+
+
+class ResultArchive:
+    """
+        Append-only archive of every parsed record, kept in compressed
+        columnar files that rotate daily (and past max_bytes).
+
+        Records are converted and written by a background thread in blocks
+        of batch_size records (or after flush_interval seconds). Inside a
+        block each column is stored as one typed array (floats, int8 flags,
+        or length-prefixed strings) and the block is zlib compressed, so
+        similar values sit together and compress well.
+
+        Files are named <prefix>_<YYYYMMDD>.farc, then <prefix>_<YYYYMMDD>_2.farc
+        and so on. A file cut short by a crash is trimmed to its last
+        complete block when it is next opened for appending.
+
+        :param directory: archive folder, created if needed
+        :param prefix: file name prefix, e.g. "AM60_S1"
+        :param columns: [(name, type)] with type from COLUMN_TYPES, not counting the timestamp
+        :param station: station name, stored in each file header
+        :param batch_size: records per block
+        :param flush_interval: longest time a record is held before its block is written
+        :param max_bytes: size at which a day's file continues in a new part
+    """
+
+    def __init__(self, directory, prefix, columns, station="", batch_size=ARCHIVE_BATCH,
+                 flush_interval=ARCHIVE_FLUSH_INTERVAL, max_bytes=ARCHIVE_MAX_BYTES):
+        for name, kind in columns:
+            if kind not in COLUMN_TYPES:
+                raise ValueError(f"Unknown column type {kind!r} for {name}, expected one of {COLUMN_TYPES}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.columns = [("Timestamp", TIMESTAMP)] + [(name, kind) for name, kind in columns]
+        self.station = station
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+
+        self._file = None
+        self._day = None    # Date of the open file
+        self.path = None
+        self.records = 0
+        self.blocks = 0
+        self.invalid = 0    # Values stored as null because they did not convert to the column type
+        self.errors = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="archive", daemon=True)
+        self._thread.start()
+
+    def submit(self, timestamp, record):
+        """
+            Queue a record for the archive. Returns immediately.
+
+            :param timestamp: "YYYY-mm-dd HH:MM:SS"
+            :param record: result record, copied so the caller can reuse it
+        """
+        self._queue.put((timestamp, dict(record)))
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if not pending else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()   # Flush interval elapsed
+            if item is None:
+                self._write(pending)
+                self._close_file()
+                return
+            if item:
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.append(item)
+                if len(pending) < self.batch_size:
+                    continue
+            self._write(pending)
+            pending = []
+
+    def _write(self, items):
+        # One block per day present in items (a batch may straddle midnight)
+        rows = []
+        for timestamp, record in items:
+            try:
+                moment = datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+            except (TypeError, ValueError):
+                moment = datetime.datetime.now()
+                self.invalid += 1
+            rows.append((moment, record))
+        while rows:
+            day = rows[0][0].date()
+            block = [row for row in rows if row[0].date() == day]
+            rows = [row for row in rows if row[0].date() != day]
+            try:
+                self._write_block(day, block)
+            except (OSError, ValueError, OverflowError) as e:
+                self.errors += 1
+                print(f"Archive write failed: {e}")
+                self._close_file()
+
+    def _write_block(self, day, rows):
+        if self._file is None or day != self._day or self._file.tell() >= self.max_bytes:
+            self._open(day)
+        raw = b"".join(self._encode_column(name, kind, rows) for name, kind in self.columns)
+        data = zlib.compress(raw, COMPRESSION_LEVEL)
+        self._file.write(_BLOCK_HEADER.pack(len(rows), len(raw), len(data)) + data)
+        self._file.flush()  # Complete blocks are readable while the archive is open
+        self.records += len(rows)
+        self.blocks += 1
+
+    def _encode_column(self, name, kind, rows):
+        if kind == TIMESTAMP:
+            data = array.array("d", [moment.timestamp() for moment, _ in rows])
+        elif kind == FLOAT:
+            data = array.array("d", [self._convert(record.get(name), float, math.nan) for _, record in rows])
+        elif kind == INT8:
+            values = [self._convert(record.get(name), int, INT8_NULL) for _, record in rows]
+            data = array.array("b", [v if -127 <= v <= 127 or v == INT8_NULL else self._out_of_range() for v in values])
+        else:
+            strings = [record.get(name) for _, record in rows]
+            encoded = [b"" if s is None or s == "null" else str(s).encode("utf-8") for s in strings]
+            lengths = array.array("i", [-1 if s is None or s == "null" else len(e) for s, e in zip(strings, encoded)])
+            if _SWAP:
+                lengths.byteswap()
+            payload = lengths.tobytes() + b"".join(encoded)
+            return _COLUMN_LENGTH.pack(len(payload)) + payload
+        if _SWAP:
+            data.byteswap()
+        payload = data.tobytes()
+        return _COLUMN_LENGTH.pack(len(payload)) + payload
+
+    def _convert(self, value, kind, null):
+        if value is None or value == "null":
+            return null
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            self.invalid += 1
+            return null
+
+    def _out_of_range(self):
+        self.invalid += 1
+        return INT8_NULL
+
+    def _open(self, day):
+        # Continue the day's last part if it has the same columns and room left, else start the next part
+        self._close_file()
+        header = {"columns": self.columns, "station": self.station, "created": time.time()}
+        part = 1
+        while True:
+            path = archive_path(self.directory, self.prefix, day, part)
+            if not os.path.exists(path):
+                break
+            next_path = archive_path(self.directory, self.prefix, day, part + 1)
+            if not os.path.exists(next_path):
+                try:
+                    existing, end = _scan(path)
+                except (OSError, ValueError):
+                    existing, end = None, 0
+                if existing is not None and existing["columns"] == [list(c) for c in self.columns] \
+                        and end < self.max_bytes:
+                    self._file = open(path, "r+b")
+                    self._file.truncate(end)    # Drop a block cut short by a crash
+                    self._file.seek(end)
+                    self._day = day
+                    self.path = path
+                    return
+            part += 1
+
+        encoded = json.dumps(header).encode("utf-8")
+        self._file = open(path, "wb")
+        self._file.write(ARCHIVE_MAGIC + _HEADER_LENGTH.pack(len(encoded)) + encoded)
+        self._day = day
+        self.path = path
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError as e:
+                print(f"Archive close failed: {e}")
+            self._file = None
+
+    def summary(self):
+        """
+            :return: one line with records/blocks written and the current file
+            :rtype: str
+        """
+        return (f"Archive: {self.records} records in {self.blocks} blocks | invalid values {self.invalid} | "
+                f"errors {self.errors} | {self.path or 'no file yet'}")
+
+    def close(self, timeout=5.0):
+        """
+            Write what is still pending and stop the archive thread.
+        """
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+def archive_path(directory, prefix, day, part=1):
+    """
+        :return: archive file for prefix and day, e.g. archive/AM60_S1_20250101.farc (part 2: ..._20250101_2.farc)
+        :rtype: str
+    """
+    suffix = "" if part == 1 else f"_{part}"
+    return os.path.join(directory, f"{prefix}_{day:%Y%m%d}{suffix}{ARCHIVE_EXTENSION}")
+
+
+def archive_files(directory, prefix=None):
+    """
+        :param prefix: only the files of this prefix (station), all if None
+        :return: archive files in directory, oldest first
+        :rtype: list
+    """
+    pattern = re.compile(rf"^{re.escape(prefix) if prefix else '.+'}_(\d{{8}})(?:_(\d+))?{re.escape(ARCHIVE_EXTENSION)}$")
+    found = []
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        match = pattern.match(name)
+        if match:
+            found.append((match.group(1), int(match.group(2) or 1), os.path.join(directory, name)))
+    return [path for _, _, path in sorted(found)]
+
+
+def _read_header(file, path):
+    if file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+        raise ValueError(f"Not an archive file: {path}")
+    (length,) = _HEADER_LENGTH.unpack(file.read(_HEADER_LENGTH.size))
+    return json.loads(file.read(length).decode("utf-8"))
+
+
+def _read_blocks(file):
+    # (rows, raw bytes) of every complete block; stops at a block cut short by a crash
+    while True:
+        header = file.read(_BLOCK_HEADER.size)
+        if len(header) < _BLOCK_HEADER.size:
+            return
+        rows, raw_length, length = _BLOCK_HEADER.unpack(header)
+        data = file.read(length)
+        if len(data) < length:
+            return
+        try:
+            raw = zlib.decompress(data)
+        except zlib.error:
+            return
+        if len(raw) != raw_length:
+            return
+        yield rows, raw, file.tell()
+
+
+def _scan(path):
+    # Header and end offset of the last complete block
+    with open(path, "rb") as file:
+        header = _read_header(file, path)
+        end = file.tell()
+        for _, _, end in _read_blocks(file):
+            pass
+    return header, end
+
+
+def _decode_column(kind, rows, payload):
+    if kind in _ARRAY_CODES:
+        data = array.array(_ARRAY_CODES[kind])
+        data.frombytes(payload)
+        if _SWAP:
+            data.byteswap()
+        if kind == INT8:
+            return [None if v == INT8_NULL else v for v in data]
+        if kind == FLOAT:
+            return [None if math.isnan(v) else v for v in data]
+        return [datetime.datetime.fromtimestamp(v) for v in data]
+    lengths = array.array("i")
+    lengths.frombytes(payload[:rows * lengths.itemsize])
+    if _SWAP:
+        lengths.byteswap()
+    values = []
+    offset = rows * lengths.itemsize
+    for length in lengths:
+        if length < 0:
+            values.append(None)
+        else:
+            values.append(payload[offset:offset + length].decode("utf-8"))
+            offset += length
+    return values
+
+
+def read_archive(path, columns=None):
+    """
+        Load an archive file column by column.
+
+        :param path: archive file
+        :param columns: names of the columns to load, all if None
+        :return: (header dict, {column name: list of values}); nulls are None,
+            timestamps datetime objects
+        :rtype: tuple
+    """
+    with open(path, "rb") as file:
+        header = _read_header(file, path)
+        names = [name for name, _ in header["columns"]]
+        wanted = names if columns is None else list(columns)
+        unknown = [name for name in wanted if name not in names]
+        if unknown:
+            raise ValueError(f"{path}: no column(s) {unknown}")
+        result = {name: [] for name in wanted}
+        for rows, raw, _ in _read_blocks(file):
+            offset = 0
+            for name, kind in header["columns"]:
+                (length,) = _COLUMN_LENGTH.unpack_from(raw, offset)
+                offset += _COLUMN_LENGTH.size
+                if name in result:
+                    result[name].extend(_decode_column(kind, rows, raw[offset:offset + length]))
+                offset += length
+    return header, result
+
+
+def export_csv(path, csv_path):
+    """
+        Write an archive file out as CSV, one row per record.
+
+        :return: number of records written
+        :rtype: int
+    """
+    header, columns = read_archive(path)
+    names = [name for name, _ in header["columns"]]
+    with open(csv_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(names)
+        rows = list(zip(*(columns[name] for name in names)))
+        for row in rows:
+            writer.writerow(["null" if value is None else value for value in row])
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect result archive files or export them as CSV.")
+    parser.add_argument("files", nargs="+", help="archive files (.farc)")
+    parser.add_argument("--csv", metavar="DIR", help="write each file as <name>.csv into DIR")
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        start = time.perf_counter()
+        header, columns = read_archive(path)
+        elapsed = time.perf_counter() - start
+        rows = len(next(iter(columns.values()), []))
+        size = os.path.getsize(path)
+        print(f"{path}: {rows} records, {len(header['columns'])} columns, {size / 1024:.1f} KiB "
+              f"({size / max(1, rows):.1f} bytes/record), loaded in {elapsed * 1000:.1f} ms")
+        if args.csv:
+            os.makedirs(args.csv, exist_ok=True)
+            csv_path = os.path.join(args.csv, os.path.splitext(os.path.basename(path))[0] + ".csv")
+            export_csv(path, csv_path)
+            print(f"  -> {csv_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+import asyncio
+import os
+import sys
+import threading
+
+try:
+    import termios
+    import tty
+except ImportError:     # Windows
+    termios = None
+
+READ_CHUNK_SIZE = 4096
+ACK = 0x06  # DE2120 command accepted
+NACK = 0x15 # DE2120 command rejected
+FALLBACK_READ_TIMEOUT = 0.05    # Poll interval of the pyserial fallback (seconds)
+
+
+class AsyncSerialPort:
+    """
+        Non-blocking serial port for asyncio.
+
+        On Linux the device is opened with O_NONBLOCK, switched to raw mode
+        with termios and watched with loop.add_reader(), so no thread and no
+        read timeout is involved. Anywhere else (or with use_fd=False) a
+        pyserial port is read from the default executor instead.
+
+        Use open_serial_port() to create one.
+    """
+
+    def __init__(self, port_name, baudrate, loop):
+        self.port_name = port_name
+        self.baudrate = baudrate
+        self.loop = loop
+        self._fd = None
+        self._ser = None
+        self._data = bytearray()
+        self._waiter = None
+        self._pending = None    # Executor read of the pyserial fallback, kept across timeouts
+        self._error = None
+        self._closed = False
+
+    def _open_fd(self):
+        speed = getattr(termios, f"B{self.baudrate}", None)
+        if speed is None:
+            raise ValueError(f"Unsupported baud rate: {self.baudrate}")
+        fd = os.open(self.port_name, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        try:
+            tty.setraw(fd)
+            attrs = termios.tcgetattr(fd)
+            attrs[2] |= termios.CLOCAL | termios.CREAD   # Ignore modem lines, enable receiver
+            attrs[4] = attrs[5] = speed                   # Input and output speed
+            termios.tcsetattr(fd, termios.TCSANOW, attrs)
+            termios.tcflush(fd, termios.TCIOFLUSH)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self.loop.add_reader(fd, self._on_readable)
+
+    def _open_pyserial(self):
+        import serial
+        self._ser = serial.Serial(self.port_name, self.baudrate, timeout=FALLBACK_READ_TIMEOUT)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            data = b""
+            self._error = e
+        if not data and self._error is None:
+            self._error = ConnectionError(f"{self.port_name} was closed")
+        if data:
+            self._data += data
+        if self._error is not None:
+            self.loop.remove_reader(self._fd)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def read(self):
+        """
+            Wait for data and return everything received so far.
+
+            :return: at least one byte
+            :rtype: bytes
+        """
+        while not self._data:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise ConnectionError(f"{self.port_name} was closed")
+            if self._ser is not None:
+                if self._pending is None:
+                    waiting = self._ser.in_waiting
+                    self._pending = self.loop.run_in_executor(None, self._ser.read, waiting or 1)
+                # Shielded: a timeout around read() leaves the executor read running and
+                # the next read() takes its bytes, instead of them being thrown away
+                try:
+                    self._data += await asyncio.shield(self._pending)
+                finally:
+                    if self._pending is not None and self._pending.done():
+                        self._pending = None
+                continue
+            self._waiter = self.loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+        data = bytes(self._data)
+        self._data.clear()
+        return data
+
+    def _unread(self, data):
+        # Put bytes back so the next read() returns them first
+        self._data[:0] = data
+
+    async def _read_before(self, deadline):
+        remaining = None if deadline is None else deadline - self.loop.time()
+        if remaining is not None and remaining <= 0:
+            return None
+        try:
+            return await asyncio.wait_for(self.read(), remaining)
+        except asyncio.TimeoutError:
+            return None
+
+    async def read_until(self, terminators=b"\r\n", timeout=None):
+        """
+            Read one line ended by any of the terminator bytes.
+
+            :param terminators: bytes, each one ends the line
+            :param timeout: overall timeout in seconds, None to wait forever
+            :return: the line without terminator, or everything received
+                if the timeout hits first
+            :rtype: bytes
+        """
+        received = bytearray()
+        deadline = None if timeout is None else self.loop.time() + timeout
+        while True:
+            chunk = await self._read_before(deadline)
+            if chunk is None:
+                return bytes(received)
+            start = 0
+            for index, byte in enumerate(chunk):
+                if byte not in terminators:
+                    continue
+                received += chunk[start:index]
+                if received:
+                    self._unread(chunk[index + 1:])
+                    return bytes(received)
+                start = index + 1   # Leading terminator left over from the previous line
+            received += chunk[start:]
+
+    async def read_response(self, timeout=1.0):
+        """
+            Wait for a DE2120 ACK/NACK byte, dropping anything before it.
+
+            :param timeout: seconds to wait
+            :return: True for ACK, False for NACK or timeout
+            :rtype: bool
+        """
+        deadline = self.loop.time() + timeout
+        while True:
+            chunk = await self._read_before(deadline)
+            if chunk is None:
+                return False
+            for index, byte in enumerate(chunk):
+                if byte in (ACK, NACK):
+                    self._unread(chunk[index + 1:])
+                    return byte == ACK
+
+    async def write(self, data):
+        """
+            Write bytes to the port.
+
+            :param data: bytes to send
+        """
+        if self._ser is not None:
+            await self.loop.run_in_executor(None, self._ser.write, data)
+            return
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self._fd, view)
+                view = view[written:]
+            except BlockingIOError:
+                await asyncio.sleep(0.001)  # Output buffer full, give the driver a moment
+
+    def close(self):
+        """
+            Close the port and wake up any pending read.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        if self._ser is not None:
+            self._ser.close()
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+
+async def open_serial_port(port_name, baudrate=115200, use_fd=None):
+    """
+        Open a serial port for asyncio.
+
+        :param port_name: device name, e.g. /dev/ttyUSB0 or COM3
+        :param baudrate: baud rate
+        :param use_fd: True to force the non-blocking fd backend, False to
+            force the pyserial fallback, None to pick automatically
+        :return: the open port
+        :rtype: AsyncSerialPort
+    """
+    if use_fd is None:
+        use_fd = termios is not None and sys.platform.startswith("linux")
+    port = AsyncSerialPort(port_name, baudrate, asyncio.get_running_loop())
+    if use_fd:
+        port._open_fd()
+    else:
+        await port.loop.run_in_executor(None, port._open_pyserial)
+    return port
+
+
+async def read_frames(port, framer, on_chunk, on_frame):
+    """
+        Feed a port into a FrameParser until the port is closed.
+
+        :param port: an open AsyncSerialPort
+        :param framer: FrameParser for this port
+        :param on_chunk: called with (chunk, frames, was_in_frame) for every
+            read, was_in_frame is the framer state before the chunk
+        :param on_frame: coroutine function called with each complete frame
+    """
+    while True:
+        chunk = await port.read()
+        was_in_frame = framer.in_frame
+        frames = framer.feed(chunk)
+        on_chunk(chunk, frames, was_in_frame)
+        for frame in frames:
+            await on_frame(frame)
+
+
+class SerialEventLoop:
+    """
+        One asyncio event loop in a background thread, shared by all ports.
+
+        Coroutines are handed over with submit() from any thread.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="serial-io", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """
+            Schedule a coroutine on the loop. Safe from any thread.
+
+            :param coro: the coroutine
+            :return: future with the coroutine's result
+            :rtype: concurrent.futures.Future
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, func, *args):
+        """
+            Run a plain function on the loop thread. Safe from any thread.
+        """
+        self.loop.call_soon_threadsafe(func, *args)
+
+    def stop(self):
+        """
+            Cancel running tasks and stop the loop thread.
+        """
+        def _cancel_all():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.call_soon(self.loop.stop)
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(_cancel_all)
+        self._thread.join(timeout=2)
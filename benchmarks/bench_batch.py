@@ -0,0 +1,99 @@
+"""
+Throughput/latency tradeoff of batched database inserts.
+
+Several simulated stations submit records at a fixed rate each to a
+db_loader.BatchInserter, backed by an in-process MySQL stand-in. For every
+(max_batch, max_delay) pair it reports rows/s, rows per commit and the p50/p99
+time from submit to commit:
+
+    python benchmarks/bench_batch.py
+    python benchmarks/bench_batch.py --stations 8 --rate 100 --sizes 1,20,100 --delays 0.01,0.1
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_loader
+from bench_pipeline import percentile
+from stand_ins import FakeMySQL
+
+STATEMENT = "INSERT INTO bench (timestamp, serial_number, status) VALUES (%s, %s, %s)"
+
+
+def run(args, max_batch, max_delay):
+    server = FakeMySQL(connect_delay=args.db_connect_ms / 1000.0, execute_delay=args.db_rtt_ms / 1000.0)
+    db_loader.mysql = types.SimpleNamespace(connector=server)
+    db_loader.close_pool()
+    batcher = db_loader.BatchInserter(max_batch=max_batch, max_delay=max_delay)
+    latencies = []
+    lock = threading.Lock()
+    per_station = max(1, int(args.rate * args.seconds))
+
+    def station(index):
+        start = time.perf_counter()
+        futures = []
+        for n in range(per_station):
+            due = start + n / args.rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            submitted = time.perf_counter()
+            future = batcher.submit(STATEMENT, ["2025-01-01 12:00:00", f"S{index}-{n}", "GOOD"])
+            future.add_done_callback(lambda f, t=submitted: record(f, t))
+            futures.append(future)
+        for future in futures:
+            future.result()
+
+    def record(future, submitted):
+        elapsed = time.perf_counter() - submitted
+        with lock:
+            latencies.append(elapsed)
+
+    threads = [threading.Thread(target=station, args=(i,)) for i in range(args.stations)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    db_loader.close_pool()
+
+    return {
+        "rows": server.rows,
+        "rows_per_sec": server.rows / elapsed if elapsed > 0 else 0.0,
+        "rows_per_commit": server.rows / server.commits if server.commits else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure batch size/delay against insert throughput and latency.")
+    parser.add_argument("--stations", type=int, default=4, help="concurrent producers")
+    parser.add_argument("--rate", type=float, default=200.0, help="records/s per station")
+    parser.add_argument("--seconds", type=float, default=2.0, help="length of each run")
+    parser.add_argument("--sizes", default="1,10,50,200", help="max_batch values, comma separated")
+    parser.add_argument("--delays", default="0.005,0.05", help="max_delay values in seconds, comma separated")
+    parser.add_argument("--db-connect-ms", type=float, default=5.0, help="simulated MySQL connect/handshake time")
+    parser.add_argument("--db-rtt-ms", type=float, default=0.5, help="simulated MySQL round trip per statement/commit")
+    args = parser.parse_args(argv)
+
+    offered = args.stations * args.rate
+    print(f"{args.stations} stations x {args.rate:g} records/s = {offered:g} records/s offered")
+    print(f"{'batch':>6} {'delay ms':>9} {'rows/s':>9} {'rows/commit':>12} {'p50 ms':>9} {'p99 ms':>9}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        for delay in [float(d) for d in args.delays.split(",")]:
+            result = run(args, size, delay)
+            print(f"{size:6d} {delay * 1000:9.1f} {result['rows_per_sec']:9.1f} {result['rows_per_commit']:12.1f} "
+                  f"{result['p50_ms']:9.3f} {result['p99_ms']:9.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Cost of the durable outbox and its catch-up rate after an outage.
+
+For each fsync mode it measures put() latency (what the persistence worker
+pays per record), then keeps the MySQL stand-in down while --records records
+pile up, brings it back and times the drain:
+
+    python benchmarks/bench_outbox.py
+    python benchmarks/bench_outbox.py --records 20000 --db-rtt-ms 1
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_loader
+import outbox
+from bench_pipeline import percentile
+from stand_ins import FakeMySQL
+
+STATEMENT = "INSERT INTO bench (timestamp, serial_number, status) VALUES (%s, %s, %s)"
+
+
+def run(args, sync):
+    server = FakeMySQL(connect_delay=args.db_connect_ms / 1000.0, execute_delay=args.db_rtt_ms / 1000.0)
+    server.down = True
+    db_loader.mysql = types.SimpleNamespace(connector=server)
+    db_loader.close_pool()
+
+    with tempfile.TemporaryDirectory() as directory:
+        box = outbox.Outbox(os.path.join(directory, outbox.OUTBOX_FILE), sync=sync,
+                            batch_size=args.batch, retry_interval=0.05)
+        latencies = []
+        for n in range(args.records):
+            start = time.perf_counter()
+            box.put(STATEMENT, ["2025-01-01 12:00:00", f"SN{n}", "GOOD"], "bench")
+            latencies.append(time.perf_counter() - start)
+
+        server.down = False     # Outage over
+        start = time.perf_counter()
+        box.wait_empty(timeout=300)
+        drain = time.perf_counter() - start
+        box.close()
+    db_loader.close_pool()
+
+    return {
+        "put_p50_ms": percentile(latencies, 50) * 1000,
+        "put_p99_ms": percentile(latencies, 99) * 1000,
+        "drain_per_sec": server.rows / drain if drain > 0 else 0.0,
+        "duplicates": server.rows - args.records,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure outbox put latency per fsync mode and catch-up rate.")
+    parser.add_argument("--records", type=int, default=5000, help="records queued during the simulated outage")
+    parser.add_argument("--batch", type=int, default=outbox.DRAIN_BATCH, help="records per executemany while draining")
+    parser.add_argument("--syncs", default="full,normal,off", help="fsync modes, comma separated")
+    parser.add_argument("--db-connect-ms", type=float, default=5.0, help="simulated MySQL connect/handshake time")
+    parser.add_argument("--db-rtt-ms", type=float, default=0.5, help="simulated MySQL round trip per statement/commit")
+    args = parser.parse_args(argv)
+
+    # Per-row inserts for comparison: two round trips (execute + commit) per record
+    per_row = 1000.0 / (2 * args.db_rtt_ms) if args.db_rtt_ms > 0 else float("inf")
+    print(f"{args.records} records queued during the outage; per-row inserts would catch up at ~{per_row:.0f}/s")
+    print(f"{'sync':7} {'put p50 ms':>11} {'put p99 ms':>11} {'drain/s':>10} {'duplicates':>11}")
+    for sync in args.syncs.split(","):
+        result = run(args, sync)
+        print(f"{sync:7} {result['put_p50_ms']:11.3f} {result['put_p99_ms']:11.3f} "
+              f"{result['drain_per_sec']:10.0f} {result['duplicates']:11d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
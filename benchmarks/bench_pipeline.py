@@ -0,0 +1,270 @@
+"""
+End-to-end benchmark of the capture pipeline, stage by stage:
+
+    frames  read_from_port-style chunked reads + FrameParser
+    parse   Station.save_message_exact (no database)
+    frame   Station.process_frame: raw frame journal, parse (no database)
+    csv     Station.store_data_in_csv (the optional CSV export, runs off the reader thread)
+    db      db_loader.insert_record (pooled connection) against an in-process MySQL stand-in
+
+For every stage, frame size and offered rate it reports frames/s, p50/p99
+latency per frame and peak Python memory. Results can be saved as a
+baseline and later runs compared against it:
+
+    python benchmarks/bench_pipeline.py --save-baseline
+    python benchmarks/bench_pipeline.py --compare
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_parser import FrameParser
+from simulators import bench_frame
+from journal import close_journals
+from stand_ins import FakeSerial, FakeMySQL
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+STAGES = ["frames", "parse", "frame", "csv", "db"]
+FRAME_SIZES = {"small": 0, "medium": 100, "large": 400}    # Extra debug lines per frame
+MEMORY_SAMPLE_FRAMES = 100  # Frames used for the (slow) tracemalloc pass
+TIMESTAMP = "2025-01-01 12:00:00"
+
+
+class SkipStage(Exception):
+    pass
+
+
+def make_frames(count, extra_lines, seed=1):
+    rng = random.Random(seed)
+    return [bench_frame(seq, rng, fail_rate=0.05, extra_lines=extra_lines) for seq in range(1, count + 1)]
+
+
+def parsed_record(station, frame):
+    # Parse one frame without writing anything (make_station turns persistence off), return the record
+    station.save_message_exact(frame.decode("utf-8", errors="ignore").strip(), TIMESTAMP)
+    return dict(station.result_dict)
+
+
+def make_station(directory):
+    try:
+        from monitor_core import Station
+    except ImportError as e:
+        raise SkipStage(f"monitor_core not importable: {e}")
+    station = Station({"name": "bench", "persist": False, "archive": False}, directory)
+    station.result_dict["Serial_Number"] = "AM60-BENCH"
+    return station
+
+
+# ----- Stages: each returns (per-frame function, list of items) -----
+def stage_frames(frames, args, directory):
+    noise = b"\r\n>> debug\r\n"
+    port = FakeSerial(b"".join(noise + frame for frame in frames), chunk_size=args.chunk_size)
+    framer = FrameParser()
+
+    def extract(_):
+        # Same loop as Station.read_from_port, until one frame comes out
+        while True:
+            chunk = port.read(port.in_waiting or 1)
+            if not chunk:
+                raise RuntimeError("ran out of data before a frame was complete")
+            if framer.feed(chunk):
+                return
+    return extract, frames
+
+
+def stage_parse(frames, args, directory):
+    station = make_station(directory)     # No CSV export, archive or database: parse only
+    messages = [frame.decode("utf-8", errors="ignore").strip() for frame in frames]
+    return (lambda message: station.save_message_exact(message, TIMESTAMP)), messages
+
+
+def stage_frame(frames, args, directory):
+    station = make_station(directory)
+    return station.process_frame, frames
+
+
+def stage_csv(frames, args, directory):
+    station = make_station(directory)
+    record = parsed_record(station, frames[0])
+    return (lambda _: station.store_data_in_csv(TIMESTAMP, record)), frames
+
+
+def stage_db(frames, args, directory):
+    try:
+        import db_loader
+    except ImportError as e:
+        raise SkipStage(f"db_loader not importable: {e}")
+    station = make_station(directory)
+    row = station.schema.row(TIMESTAMP, parsed_record(station, frames[0]))
+
+    server = FakeMySQL(connect_delay=args.db_connect_ms / 1000.0, execute_delay=args.db_rtt_ms / 1000.0)
+    db_loader.mysql = types.SimpleNamespace(connector=server)     # Local stand-in, no network
+    db_loader.close_pool()      # Start every run with a cold pool on the new stand-in
+    insert_sql = station.schema.insert_sql
+
+    def insert(_):
+        success, message = db_loader.insert_record(insert_sql, row)
+        if not success:
+            raise RuntimeError(message)
+    return insert, frames
+
+
+STAGE_FUNCTIONS = {"frames": stage_frames, "parse": stage_parse, "frame": stage_frame, "csv": stage_csv,
+                   "db": stage_db}
+
+
+# ----- Measurement -----
+@contextlib.contextmanager
+def quiet():
+    # The code under test prints diagnostics for every frame, keep them out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_timed(func, items, rate):
+    # rate None = back to back; otherwise item i is due at start + i / rate and
+    # its latency counts from that moment (so falling behind shows up as latency)
+    latencies = []
+    start = time.perf_counter()
+    for index, item in enumerate(items):
+        due = start + index / rate if rate else time.perf_counter()
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        func(item)
+        latencies.append(time.perf_counter() - due)
+    return latencies, time.perf_counter() - start
+
+
+def run_stage(stage, size, rate, args):
+    count = args.frames if rate is None else max(10, min(args.frames, int(rate * args.paced_seconds)))
+    frames = make_frames(count, FRAME_SIZES[size])
+    with tempfile.TemporaryDirectory() as directory, quiet():
+        func, items = STAGE_FUNCTIONS[stage](frames, args, directory)
+        latencies, elapsed = run_timed(func, items, rate)
+        close_journals()    # Before its temporary directory is removed
+
+    # Separate pass for memory, tracemalloc slows everything down
+    sample = frames[:MEMORY_SAMPLE_FRAMES]
+    with tempfile.TemporaryDirectory() as directory, quiet():
+        tracemalloc.start()
+        func, items = STAGE_FUNCTIONS[stage](sample, args, directory)
+        tracemalloc.reset_peak()
+        run_timed(func, items, None)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        close_journals()
+
+    return {
+        "frames": len(latencies),
+        "frame_bytes": sum(len(f) for f in frames) // len(frames),
+        "frames_per_sec": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_kib": peak / 1024.0,
+    }
+
+
+def compare(results, baseline, tolerance):
+    # A result regresses if throughput drops or p99 grows by more than tolerance
+    regressions = []
+    print(f"\n{'key':32} {'fps':>10} {'base':>10} {'p99 ms':>9} {'base':>9}")
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        flags = []
+        if result["frames_per_sec"] < base["frames_per_sec"] * (1 - tolerance):
+            flags.append("throughput")
+        if result["p99_ms"] > base["p99_ms"] * (1 + tolerance) and result["p99_ms"] - base["p99_ms"] > 0.05:
+            flags.append("p99")
+        if flags:
+            regressions.append((key, flags))
+        print(f"{key:32} {result['frames_per_sec']:10.1f} {base['frames_per_sec']:10.1f} "
+              f"{result['p99_ms']:9.3f} {base['p99_ms']:9.3f} {'REGRESSION: ' + ', '.join(flags) if flags else ''}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the capture pipeline stage by stage.")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma separated, from {STAGES}")
+    parser.add_argument("--sizes", default=",".join(FRAME_SIZES), help=f"comma separated, from {list(FRAME_SIZES)}")
+    parser.add_argument("--rates", default="max,200", help="offered frames/s, comma separated; 'max' = back to back")
+    parser.add_argument("--frames", type=int, default=500, help="frames per back-to-back run")
+    parser.add_argument("--paced-seconds", type=float, default=2.0, help="length of each paced run")
+    parser.add_argument("--chunk-size", type=int, default=64, help="bytes per serial read in the frames stage")
+    parser.add_argument("--db-connect-ms", type=float, default=5.0, help="simulated MySQL connect/handshake time")
+    parser.add_argument("--db-rtt-ms", type=float, default=0.5, help="simulated MySQL round trip per statement/commit")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE_PATH, help="save the results as the baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rates = [None if r.strip() == "max" else float(r) for r in args.rates.split(",")]
+    results = {}
+    skipped = {}
+
+    print(f"{'stage':7} {'size':7} {'rate':>6} {'bytes':>6} {'frames/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>9}")
+    for stage in args.stages.split(","):
+        for size in args.sizes.split(","):
+            for rate in rates:
+                if stage in skipped:
+                    continue
+                try:
+                    result = run_stage(stage, size, rate, args)
+                except SkipStage as e:
+                    skipped[stage] = str(e)
+                    print(f"{stage:7} skipped: {e}")
+                    continue
+                key = f"{stage}/{size}/{'max' if rate is None else int(rate)}"
+                results[key] = result
+                print(f"{stage:7} {size:7} {'max' if rate is None else int(rate):>6} {result['frame_bytes']:6d} "
+                      f"{result['frames_per_sec']:10.1f} {result['p50_ms']:9.3f} {result['p99_ms']:9.3f} {result['peak_kib']:9.1f}")
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "save_baseline", "compare")},
+        "skipped": skipped,
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                json.dump(report, file, indent=2)
+            print(f"Results written to {path}")
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Scan-to-result latency of the DE2120 scanner code against the scanner
+simulator (Linux/macOS, pseudo-terminal).
+
+    reopen   a new port per scan, closed afterwards (what barcode_scanner did before sessions)
+    session  one QR_Scanner.ScannerSession reused for every scan
+    listen   continuous mode: parts presented to the scanner, each held long
+             enough to be read several times; time from presenting a part to
+             the subscriber callback, repeats must be debounced
+    setters  configure PROFILE with one DE2120BarcodeScanner setter per setting
+    profile  the same profile as one pipelined batch (ScannerSession.configure)
+    cached   configure with the profile cache, as on every start after the first
+
+    python benchmarks/bench_scanner.py
+    python benchmarks/bench_scanner.py --scans 50 --decode-ms 20 --modes session,listen
+    python benchmarks/bench_scanner.py --scans 10 --command-ms 20 --modes setters,profile,cached
+"""
+import argparse
+import os
+import queue
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import QR_Scanner
+from bench_pipeline import percentile
+from scanner_profile import ProfileCache
+from simulators import ScannerSimulator
+
+MODES = ["reopen", "session", "listen", "setters", "profile", "cached"]
+PRESENT_INTERVAL = 0.3  # Seconds between parts in listen mode
+HOLD_TIME = 0.2         # Seconds each part stays in front of the scanner (4 reads at CNTALW1)
+PROFILE = {"reading_mode": "manual", "reading_area": 80, "light": False, "reticle": True, "image_flipping": False,
+           "decode_beep": True, "boot_beep": False, "buzzer_tone": 2, "transfer_code_id": False,
+           "symbologies_1d": False, "symbologies_2d": True}
+
+
+def configure_with_setters(scanner):
+    # What a station startup looked like with the library setters, one ACK round trip (and sleep) each
+    results = [scanner.enable_manual_trigger(), scanner.change_reading_area(80), scanner.light_off(),
+               scanner.reticle_on(), scanner.disable_image_flipping(), scanner.enable_decode_beep(),
+               scanner.disable_boot_beep(), scanner.change_buzzer_tone(2)]
+    scanner.hard_port.write(b"^_^CIDENA0.")
+    results.append(scanner.hard_port.read() == b"\x06")
+    results += [scanner.disable_all_1D(), scanner.enable_all_2D()]
+    return results.count(False)
+
+
+def run_configure(args, mode):
+    latencies = []
+    wrong = 0
+    with tempfile.TemporaryDirectory() as directory, \
+            ScannerSimulator(command_delay=args.command_ms / 1000.0) as device:
+        cache = ProfileCache(os.path.join(directory, "scanner_profiles.json")) if mode == "cached" else None
+        session = QR_Scanner.ScannerSession(device.port_name)
+        for _ in range(args.scans):
+            start = time.perf_counter()
+            if mode == "setters":
+                wrong += configure_with_setters(session.open())
+            else:
+                result = session.configure(PROFILE, cache)
+                wrong += len(result.nacked) + len(result.missing)
+            latencies.append(time.perf_counter() - start)
+        session.close()
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "opens": session.opens,
+        "wrong": wrong,
+    }
+
+
+def run_listen(args):
+    latencies = []
+    received = queue.Queue()
+    with ScannerSimulator(present_interval=PRESENT_INTERVAL, hold_time=HOLD_TIME) as device:
+        session = QR_Scanner.ScannerSession(device.port_name)
+        session.subscribe(lambda barcode: received.put((time.perf_counter(), barcode)))
+        session.listen(QR_Scanner.SCAN_MODE_CONTINUOUS, repeat_interval=1)
+        time.sleep(PRESENT_INTERVAL * (args.scans + 0.5))
+        session.close()
+    barcodes = []
+    while not received.empty():
+        when, barcode = received.get()
+        barcodes.append(barcode)
+        if barcode in device.presented:
+            latencies.append(when - device.presented[barcode])
+    expected = [f"AM60-{n + 1:06d}" for n in range(len(device.presented))]
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "opens": session.opens,
+        "wrong": sum(a != b for a, b in zip(barcodes, expected)) + abs(len(barcodes) - len(expected)),
+    }
+
+
+def run(args, mode):
+    if mode == "listen":
+        return run_listen(args)
+    if mode in ("setters", "profile", "cached"):
+        return run_configure(args, mode)
+    latencies = []
+    wrong = 0
+    with ScannerSimulator(decode_delay=args.decode_ms / 1000.0) as device:
+        session = QR_Scanner.ScannerSession(device.port_name)
+        for n in range(args.scans):
+            start = time.perf_counter()
+            barcode = session.scan()
+            latencies.append(time.perf_counter() - start)
+            if mode == "reopen":
+                session.close()
+            if barcode != f"AM60-{n + 1:06d}":
+                wrong += 1
+        session.close()
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "opens": session.opens,
+        "wrong": wrong,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure scan-to-result latency against the scanner simulator.")
+    parser.add_argument("--scans", type=int, default=20, help="scans per mode")
+    parser.add_argument("--decode-ms", type=float, default=50.0, help="simulated time from SCAN to barcode")
+    parser.add_argument("--command-ms", type=float, default=5.0, help="simulated time the scanner takes per setting")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma separated, from {MODES}")
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':8} {'p50 ms':>9} {'p99 ms':>9} {'opens':>6} {'wrong':>6}")
+    for mode in args.modes.split(","):
+        result = run(args, mode)
+        print(f"{mode:8} {result['p50_ms']:9.1f} {result['p99_ms']:9.1f} {result['opens']:6d} {result['wrong']:6d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Startup time of the monitor, to be tracked across builds.
+
+    import       time to import each entry module in a fresh interpreter, and
+                 which heavy packages (pandas, numpy, mysql, asyncio) it pulls in
+    window       launch -> main window drawn (needs a display)
+    first_frame  launch -> first frame from a simulated bench stored, for the
+                 window (needs a display) and for monitor_cli
+
+The window stages run the script by default, or a PyInstaller build:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --exe "dist/AM60_TB_FAST.exe" --output startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import simulators
+from AM60_TB_FAST import STARTUP_REPORT_ENV
+
+MODULES = ["AM60_TB_FAST", "monitor_cli", "monitor_core", "db_loader"]
+HEAVY_MODULES = ["pandas", "numpy", "mysql", "asyncio"]    # Must not be loaded before the window is up
+TIMEOUT = 60.0
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+class SkipStage(Exception):
+    pass
+
+
+def measure_import(module, repeat):
+    times = []
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result["ms"])
+        loaded = result["loaded"]
+    return {"ms": statistics.median(times), "loaded": loaded}
+
+
+def gui_command(args, config_path):
+    if args.exe:
+        return [args.exe, config_path]
+    return [sys.executable, os.path.join(ROOT, "AM60_TB_FAST.py"), config_path]
+
+
+def wait_for_event(report_path, event, process, deadline):
+    # Poll the startup report until the app appends event; returns its wall-clock time
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SkipStage(f"the monitor exited with code {process.returncode}")
+        if os.path.exists(report_path):
+            with open(report_path) as report:
+                for line in report:
+                    entry = json.loads(line)
+                    if entry["event"] == event:
+                        return entry["time"]
+        time.sleep(0.01)
+    raise SkipStage(f"no {event!r} within {TIMEOUT:.0f}s")
+
+
+def measure_gui(args, directory, bench):
+    if sys.platform != "win32" and not os.environ.get("DISPLAY"):
+        raise SkipStage("no display")
+    config = {"name": "Startup", "persist": False, "archive": False, "journal": False}
+    if bench is not None:
+        config.update({"bench_port": bench.port_name, "auto_connect": True})
+    config_path = os.path.join(directory, "stations.json")
+    with open(config_path, "w") as file:
+        json.dump({"stations": [config]}, file)
+    report_path = os.path.join(directory, "startup.jsonl")
+    if os.path.exists(report_path):
+        os.remove(report_path)
+
+    env = dict(os.environ, **{STARTUP_REPORT_ENV: report_path})
+    launched = time.time()
+    process = subprocess.Popen(gui_command(args, config_path), cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = launched + TIMEOUT
+        result = {"window_ms": (wait_for_event(report_path, "window", process, deadline) - launched) * 1000}
+        if bench is not None:
+            result["first_frame_ms"] = (wait_for_event(report_path, "first_frame", process, deadline) - launched) * 1000
+        return result
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def measure_cli(bench):
+    # monitor_cli prints one line per stored frame; time launch -> first such line
+    launched = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "monitor_cli.py"), "--port", bench.port_name,
+                                "--name", "Startup", "--dry-run", "--no-archive"],
+                               cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        for line in process.stdout:
+            if line.startswith("[Startup]") and (" stored " in line or " skipped " in line):
+                return {"first_frame_ms": (time.perf_counter() - launched) * 1000}
+            if time.perf_counter() - launched > TIMEOUT:
+                break
+        raise SkipStage(f"no stored frame within {TIMEOUT:.0f}s")
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time, time to window and time to first frame.")
+    parser.add_argument("--exe", help="PyInstaller build to launch instead of AM60_TB_FAST.py")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, the median is reported")
+    parser.add_argument("--frame-rate", type=float, default=50.0, help="simulated bench frames per second")
+    parser.add_argument("--output", help="write the results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {"python": platform.python_version(), "platform": platform.platform(), "exe": args.exe,
+               "imports": {}, "gui": None, "cli": None}
+
+    print(f"{'module':14} {'import ms':>10}  heavy modules loaded")
+    for module in MODULES:
+        result = measure_import(module, args.repeat)
+        results["imports"][module] = result
+        print(f"{module:14} {result['ms']:10.1f}  {', '.join(result['loaded']) or '-'}")
+
+    try:
+        bench = simulators.BenchSimulator(frame_rate=args.frame_rate).start()
+    except OSError as e:
+        bench = None
+        print(f"No simulated bench ({e}), first-frame times skipped")
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for target in ("gui", "cli"):
+                runs = []
+                try:
+                    for _ in range(args.repeat):
+                        if target == "gui":
+                            runs.append(measure_gui(args, directory, bench))
+                        elif bench is not None:
+                            runs.append(measure_cli(bench))
+                except SkipStage as e:
+                    print(f"{target:14} skipped: {e}")
+                    continue
+                if not runs:
+                    continue
+                results[target] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+                print(f"{target:14} " + "  ".join(f"{key} {value:.0f}" for key, value in results[target].items()))
+    finally:
+        if bench is not None:
+            bench.stop()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
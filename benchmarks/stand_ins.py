@@ -0,0 +1,119 @@
+import time
+
+
+class FakeSerial:
+    """
+        In-memory stand-in for serial.Serial: read() hands out the given
+        bytes in chunks of at most chunk_size, like a port whose in_waiting
+        never exceeds one chunk.
+    """
+
+    def __init__(self, data, chunk_size=64):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.position = 0
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk_size, len(self.data) - self.position)
+
+    def read(self, size=1):
+        size = min(size, self.chunk_size)
+        chunk = self.data[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.server = connection.server
+        self.rowcount = 0
+
+    def execute(self, statement, params=None):
+        self.connection.check()
+        time.sleep(self.server.execute_delay)
+        self.server.statements += 1
+        self.server.rows += 1
+        self.rowcount = 1
+
+    def executemany(self, statement, seq_of_params):
+        self.connection.check()
+        rows = list(seq_of_params)
+        time.sleep(self.server.execute_delay)     # One round trip for the whole batch
+        self.server.statements += 1
+        self.server.rows += len(rows)
+        self.rowcount = len(rows)
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeMySQL:
+    """
+        Stand-in for mysql.connector with configurable network costs.
+
+        :param connect_delay: seconds spent in connect() (TCP + auth handshake)
+        :param execute_delay: seconds per round trip (execute/executemany/commit)
+    """
+
+    class Error(Exception):
+        pass
+
+    def __init__(self, connect_delay=0.005, execute_delay=0.0005):
+        self.connect_delay = connect_delay
+        self.execute_delay = execute_delay
+        self.down = False       # True: connects fail and open connections drop (database outage)
+        self.connections = 0
+        self.statements = 0
+        self.commits = 0
+        self.rows = 0
+
+    def connect(self, **kwargs):
+        time.sleep(self.connect_delay)
+        if self.down:
+            raise FakeMySQL.Error("Can't connect to MySQL server")
+        self.connections += 1
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.open = True
+
+    def check(self):
+        if self.server.down:
+            self.open = False
+        if not self.open:
+            raise FakeMySQL.Error("Lost connection to MySQL server")
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.check()
+        time.sleep(self.server.execute_delay)
+        self.server.commits += 1
+
+    def rollback(self):
+        pass
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self.check()
+
+    def is_connected(self):
+        return self.open and not self.server.down
+
+    def close(self):
+        self.open = False
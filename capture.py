@@ -0,0 +1,164 @@
+import datetime
+import os
+import struct
+import threading
+import time
+
+CAPTURE_MAGIC = b"FSMCAP1\n"    # File signature + format version
+CAPTURE_EXTENSION = ".fcap"
+CHANNEL_BENCH = 0       # Raw bytes from the test bench port
+CHANNEL_SCANNER = 1     # Raw bytes from the QR scanner port (barcodes, ACK/NACK answers)
+
+_FILE_HEADER = struct.Struct("<dH")     # Wall clock start (epoch seconds), length of the station name
+_RECORD_HEADER = struct.Struct("<QBH")  # Nanoseconds since start (monotonic), channel, payload length
+_MAX_PAYLOAD = 0xFFFF
+FLUSH_INTERVAL = 1.0    # Seconds between flushes to disk while recording
+
+
+class CaptureRecorder:
+    """
+        Records every raw chunk read from a station's ports.
+
+        Each chunk is stored with the monotonic time since the recording
+        started, so a capture can later be replayed with its original timing.
+
+        :param path: capture file to create
+        :param station_name: stored in the file header
+    """
+
+    def __init__(self, path, station_name=""):
+        self.path = path
+        self._file = open(path, "wb", buffering=64 * 1024)
+        self._lock = threading.Lock()
+        self._start = time.monotonic_ns()
+        self._last_flush = time.monotonic()
+        self.records = 0
+        self.bytes = 0
+
+        name = station_name.encode("utf-8")[:_MAX_PAYLOAD]
+        self._file.write(CAPTURE_MAGIC + _FILE_HEADER.pack(time.time(), len(name)) + name)
+
+    def record(self, channel, data):
+        """
+            Append one chunk. Safe from any thread.
+
+            :param channel: CHANNEL_BENCH or CHANNEL_SCANNER
+            :param data: raw bytes
+        """
+        if not data:
+            return
+        elapsed = time.monotonic_ns() - self._start
+        with self._lock:
+            if self._file is None:
+                return
+            for offset in range(0, len(data), _MAX_PAYLOAD):
+                part = data[offset:offset + _MAX_PAYLOAD]
+                self._file.write(_RECORD_HEADER.pack(elapsed, channel, len(part)))
+                self._file.write(part)
+                self.records += 1
+            self.bytes += len(data)
+
+            now = time.monotonic()
+            if now - self._last_flush >= FLUSH_INTERVAL:
+                self._file.flush()
+                self._last_flush = now
+
+    def close(self):
+        """
+            Flush and close the capture file.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def new_capture_path(directory, station_name):
+    """
+        :return: a capture file name like captures/Bench_1_20250101_120000.fcap
+        :rtype: str
+    """
+    os.makedirs(directory, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() else "_" for c in station_name)
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(directory, f"{safe_name}_{stamp}{CAPTURE_EXTENSION}")
+
+
+def read_capture(path):
+    """
+        Iterate over the records of a capture file.
+
+        :param path: capture file
+        :return: generator of (seconds since start, channel, data)
+        :rtype: generator
+    """
+    with open(path, "rb") as file:
+        if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"Not a capture file: {path}")
+        _, name_length = _FILE_HEADER.unpack(file.read(_FILE_HEADER.size))
+        file.read(name_length)
+
+        while True:
+            header = file.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return  # End of file (or a record cut short by a crash)
+            elapsed, channel, length = _RECORD_HEADER.unpack(header)
+            data = file.read(length)
+            if len(data) < length:
+                return
+            yield elapsed / 1e9, channel, data
+
+
+def capture_info(path):
+    """
+        :return: (wall clock start as datetime, station name)
+        :rtype: tuple
+    """
+    with open(path, "rb") as file:
+        if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"Not a capture file: {path}")
+        started, name_length = _FILE_HEADER.unpack(file.read(_FILE_HEADER.size))
+        return datetime.datetime.fromtimestamp(started), file.read(name_length).decode("utf-8", errors="replace")
+
+
+class CaptureReplayer:
+    """
+        Feeds a capture back with its original timing.
+
+        :param path: capture file
+        :param speed: 1.0 for real time, 10.0 for ten times faster,
+            0 to replay as fast as possible
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+        self.stopped = threading.Event()
+
+    def replay(self, on_record):
+        """
+            Call on_record(channel, data) for every record, sleeping between
+            records to keep the capture's timing (scaled by speed).
+
+            :param on_record: callable taking (channel, data)
+            :return: (records replayed, seconds taken)
+            :rtype: tuple
+        """
+        count = 0
+        start = time.perf_counter()
+        for elapsed, channel, data in read_capture(self.path):
+            if self.stopped.is_set():
+                break
+            if self.speed > 0:
+                delay = elapsed / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    self.stopped.wait(delay)
+            on_record(channel, data)
+            count += 1
+        return count, time.perf_counter() - start
+
+    def stop(self):
+        """
+            Stop a replay running in another thread.
+        """
+        self.stopped.set()
@@ -0,0 +1,65 @@
+import queue
+import threading
+
+
+class CsvExporter:
+    """
+        Writes records to the CSV export off the reader thread.
+
+        The export file only ever holds the latest record, so when records
+        arrive faster than the disk keeps up only the newest pending one is
+        written and the older ones are counted as skipped.
+
+        :param write: callable taking (timestamp, record) that writes the file
+    """
+
+    def __init__(self, write):
+        self._write = write
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="csv-export", daemon=True)
+        self.written = 0
+        self.skipped = 0
+        self.errors = 0
+        self._thread.start()
+
+    def submit(self, timestamp, record):
+        """
+            Queue a record for export. Returns immediately.
+
+            :param timestamp: timestamp column value
+            :param record: result record, copied so the caller can reuse it
+        """
+        self._queue.put((timestamp, dict(record)))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            # Coalesce: anything queued behind this record supersedes it
+            while item is not None:
+                try:
+                    newer = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if newer is None:
+                    self._export(item)
+                    return
+                self.skipped += 1
+                item = newer
+            if item is None:
+                return
+            self._export(item)
+
+    def _export(self, item):
+        try:
+            self._write(*item)
+            self.written += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"CSV export failed: {e}")
+
+    def close(self, timeout=2.0):
+        """
+            Write what is still pending and stop the export thread.
+        """
+        self._queue.put(None)
+        self._thread.join(timeout)
@@ -1,38 +1,470 @@
-import pandas as pd
-import mysql.connector
 import os
 import sys
+import threading
+import time
+import concurrent.futures
+from latency_stats import LatencyStats
 
-TABLE_NAME = 'product_station3'
+TABLE_NAME = 'product_station3'  # Default target, product schemas name their own table
+POOL_SIZE = 2                   # Open connections kept for inserts (shared by all stations)
+HEALTH_CHECK_INTERVAL = 30.0    # Ping a connection before reuse after this many idle seconds
+CHECKOUT_TIMEOUT = 10.0         # Seconds to wait for a free pooled connection
+BATCH_SIZE = 50                 # Rows per executemany when batching
+BATCH_DELAY = 0.05              # Seconds a row may wait for its batch to fill
+WRITE_TIMEOUT = 30.0            # Seconds to wait for a queued row's batch to be written
+COMMIT_UNCONFIRMED = "Commit not confirmed"     # Message prefix: the connection was lost during the commit,
+                                                # the rows may or may not be in the table
 
-def load_csv_to_db(CSV_PATH):
+mysql = None    # The mysql package, imported on first use (or by preload()) to keep startup fast
+
+def connector():
+    """
+        :return: the mysql.connector module, imported on first call
+    """
+    global mysql
+    if mysql is None:
+        import mysql.connector
+    return mysql.connector
+
+def preload():
+    """
+        Import the MySQL driver in a background thread, so the first insert
+        does not pay for it. Call once the window is up.
+    """
+    threading.Thread(target=connector, name="db-preload", daemon=True).start()
+
+def connect():
+    return connector().connect(
+        host = "gitserver.local",
+        port = 3306,
+        user = "rawsas",
+        passwd = "gf{u!lr<AnSkU@=sMN?,",
+        database = "Fast_Product",
+        )
+
+class ConnectionPool:
+    """
+        Keeps a few MySQL connections open instead of connecting for every row.
+
+        Idle connections are pinged before reuse once they have been idle
+        longer than health_interval; dead ones are replaced transparently.
+        Each connection keeps one prepared cursor per statement, so the
+        INSERT is parsed by the server once per connection.
+
+        :param size: maximum number of open connections
+        :param health_interval: seconds of idleness after which a connection is pinged before use
+        :param checkout_timeout: seconds to wait for a free connection
+    """
+
+    def __init__(self, size=POOL_SIZE, health_interval=HEALTH_CHECK_INTERVAL, checkout_timeout=CHECKOUT_TIMEOUT):
+        self.size = size
+        self.health_interval = health_interval
+        self.checkout_timeout = checkout_timeout
+        self._idle = []         # (connection, cursors by statement, last used), most recent last
+        self._open = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self.connects = 0
+        self.reconnects = 0
+        self.checkout_time = LatencyStats(label="Checkouts")   # Waiting for (and health checking) a connection
+        self.execute_time = LatencyStats(label="Statements")   # Execute + commit
+
+    def _checkout(self):
+        start = time.perf_counter()
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise connector().Error("Connection pool is closed")
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    entry = None
+                    break
+                if not self._condition.wait(self.checkout_timeout):
+                    raise connector().Error("Timed out waiting for a database connection")
+
+        try:
+            if entry is None:
+                entry = self._new_entry()
+            elif time.monotonic() - entry[2] > self.health_interval and not self._healthy(entry[0]):
+                self._close_entry(entry)
+                self.reconnects += 1
+                entry = self._new_entry()
+        except Exception:
+            self._release(None)
+            raise
+        self.checkout_time.add(time.perf_counter() - start)
+        return entry
+
+    def _new_entry(self):
+        conn = connect()
+        self.connects += 1
+        return [conn, {}, time.monotonic()]
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except connector().Error:
+            return False
+
+    @staticmethod
+    def _close_entry(entry):
+        for cursor in entry[1].values():
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        try:
+            entry[0].close()
+        except Exception:
+            pass
+
+    def _release(self, entry):
+        # entry None: the connection was dropped, free its slot
+        with self._condition:
+            if entry is None or self._closed:
+                self._open -= 1
+                if entry is not None:
+                    self._close_entry(entry)
+            else:
+                entry[2] = time.monotonic()
+                self._idle.append(entry)
+            self._condition.notify()
+
+    def execute(self, statement, params):
+        """
+            Execute and commit one statement on a pooled connection. If the
+            connection turns out to be dead before the commit was sent it is
+            replaced and the statement retried once; a connection lost during
+            the commit is reported with a COMMIT_UNCONFIRMED message instead,
+            as the row may already be stored.
+
+            :param statement: SQL with %s placeholders
+            :param params: values for the placeholders
+            :return: (success, message)
+            :rtype: tuple
+        """
+        return self._run(statement, params, many=False)
+
+    def execute_many(self, statement, rows):
+        """
+            Insert several rows with one executemany and a single commit
+            (the driver sends an INSERT like this as one multi-row statement).
+            All rows are rolled back together on error.
+
+            :param statement: INSERT with %s placeholders
+            :param rows: list of value lists
+            :return: (success, message)
+            :rtype: tuple
+        """
+        return self._run(statement, rows, many=True)
+
+    def _run(self, statement, params, many):
+        for attempt in range(2):
+            try:
+                entry = self._checkout()
+            except connector().Error as err:
+                return False, f"Database connection failed: {err}"
+
+            start = time.perf_counter()
+            committing = False
+            try:
+                # executemany needs a plain cursor to be rewritten into one multi-row INSERT
+                key = (statement, many)
+                cursor = entry[1].get(key)
+                if cursor is None:
+                    cursor = entry[1][key] = entry[0].cursor() if many else entry[0].cursor(prepared=True)
+                if many:
+                    cursor.executemany(statement, params)
+                else:
+                    cursor.execute(statement, params)
+                committing = True
+                entry[0].commit()
+            except connector().Error as err:
+                if self._connection_lost(entry[0]):
+                    self._close_entry(entry)
+                    self._release(None)
+                    self.reconnects += 1
+                    if committing:  # The server may have committed before the link dropped, a retry could insert twice
+                        return False, f"{COMMIT_UNCONFIRMED}, connection lost: {err}"
+                    if attempt == 0:
+                        continue    # Nothing was committed, retry once on a fresh connection
+                    return False, f"Database connection lost: {err}"
+                try:
+                    entry[0].rollback()
+                except connector().Error:
+                    pass
+                self._release(entry)
+                return False, f"Error inserting data: {err}"
+            except Exception as err:   # E.g. a parameter the driver cannot convert: state unknown, replace the connection
+                self._close_entry(entry)
+                self._release(None)
+                return False, f"Error inserting data: {err}"
+            self.execute_time.add(time.perf_counter() - start)
+            self._release(entry)
+            return True, f"{len(params)} rows inserted" if many else "Data inserted successfully"
+
+    @staticmethod
+    def _connection_lost(conn):
+        try:
+            return not conn.is_connected()
+        except Exception:
+            return True
+
+    def summary(self):
+        """
+            :return: one line with connection counts and checkout/execute percentiles
+            :rtype: str
+        """
+        return (f"Connections: {self.connects} ({self.reconnects} reconnects) | "
+                f"{self.checkout_time.summary()} | {self.execute_time.summary()}")
+
+    def close(self):
+        """
+            Close all idle connections; connections in use are closed when released.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for entry in idle:
+            self._close_entry(entry)
+
+
+class BatchInserter:
+    """
+        Collects rows from any number of threads and inserts them in batches,
+        one executemany and one commit per batch. A batch is flushed as soon
+        as it holds max_batch rows or its oldest row has waited max_delay
+        seconds, whichever comes first.
+
+        If a batch fails for anything but a lost connection, its rows are
+        retried one by one so a single bad row does not fail the others.
+
+        :param pool: ConnectionPool to write with (default: the shared pool)
+        :param max_batch: rows per batch
+        :param max_delay: seconds a row may wait for its batch to fill
+    """
+
+    def __init__(self, pool=None, max_batch=BATCH_SIZE, max_delay=BATCH_DELAY):
+        self.pool = pool
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max_delay
+        self._pending = {}      # statement -> [(row, future)]
+        self._count = 0
+        self._oldest = None     # monotonic time the oldest pending row arrived
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="db-batch", daemon=True)
+        self._thread.start()
+
+        self.batches = 0
+        self.rows = 0
+        self.batch_time = LatencyStats(label="Flushes")     # executemany + commit per batch
+
+    def submit(self, statement, row):
+        """
+            Queue one row. Returns at once.
+
+            :param statement: INSERT with %s placeholders
+            :param row: values for the placeholders
+            :return: resolves to (success, message) once the row's batch is committed
+            :rtype: concurrent.futures.Future
+        """
+        future = concurrent.futures.Future()
+        with self._condition:
+            if self._stopping:
+                future.set_result((False, "Batch inserter is closed"))
+                return future
+            self._pending.setdefault(statement, []).append((row, future))
+            self._count += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if self._count >= self.max_batch or self._count == 1:
+                self._condition.notify()    # Full batch, or the timer has to start
+        return future
+
+    def insert(self, statement, row, timeout=WRITE_TIMEOUT):
+        """
+            Queue one row and wait until its batch is committed.
+
+            :param timeout: seconds to wait for the batch
+            :return: (success, message)
+            :rtype: tuple
+        """
+        return wait_result(self.submit(statement, row), timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._count >= self.max_batch or (self._stopping and self._count):
+                        break
+                    if self._stopping:
+                        return
+                    if self._oldest is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self._oldest + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batches = self._take()
+            for statement, items in batches:
+                try:
+                    self._write(statement, items)
+                except Exception as e:  # Keep the thread alive and never leave a caller waiting
+                    for _, future in items:
+                        if not future.done():
+                            future.set_result((False, str(e)))
+
+    def _take(self):
+        # Up to max_batch rows per statement; leftovers start a new batch
+        batches = []
+        for statement in list(self._pending):
+            items = self._pending[statement]
+            batches.append((statement, items[:self.max_batch]))
+            rest = items[self.max_batch:]
+            if rest:
+                self._pending[statement] = rest
+            else:
+                del self._pending[statement]
+        self._count = sum(len(items) for items in self._pending.values())
+        self._oldest = time.monotonic() if self._count else None
+        return batches
+
+    def _write(self, statement, items):
+        pool = self.pool or get_pool()
+        start = time.perf_counter()
+        success, message = pool.execute_many(statement, [row for row, _ in items])
+        self.batch_time.add(time.perf_counter() - start)
+        self.batches += 1
+
+        if success or len(items) == 1 or not message.startswith("Error inserting"):
+            if success:
+                self.rows += len(items)
+            for _, future in items:
+                future.set_result((success, message))
+            return
+
+        for row, future in items:  # Find the row(s) that broke the batch
+            result = pool.execute(statement, row)
+            if result[0]:
+                self.rows += 1
+            future.set_result(result)
+
+    def summary(self):
+        """
+            :return: one line with rows, batches and batch write percentiles
+            :rtype: str
+        """
+        average = self.rows / self.batches if self.batches else 0.0
+        return f"Rows: {self.rows} in {self.batches} batches ({average:.1f}/batch) | {self.batch_time.summary()}"
+
+    def close(self, timeout=10.0):
+        """
+            Write everything still pending and stop the batch thread.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+
+def wait_result(future, timeout=WRITE_TIMEOUT):
+    """
+        :param future: a BatchInserter.submit() future
+        :param timeout: seconds to wait
+        :return: the future's (success, message), a failure if it is not resolved in time
+        :rtype: tuple
+    """
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        return False, f"No result from the batch writer after {timeout:g} s"
+
+
+_pool = None
+_batcher = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+        :return: the shared connection pool, created on first use
+        :rtype: ConnectionPool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = ConnectionPool()
+        return _pool
+
+def get_batcher():
+    """
+        :return: the shared BatchInserter (BATCH_SIZE/BATCH_DELAY), created on first use
+        :rtype: BatchInserter
+    """
+    global _batcher
+    with _pool_lock:
+        if _batcher is None:
+            _batcher = BatchInserter()
+        return _batcher
+
+def stats():
+    """
+        :return: summary lines for the shared pool and batcher, if they were used
+        :rtype: list
+    """
+    lines = []
+    if _pool is not None and _pool.connects:
+        lines.append(f"Database: {_pool.summary()}")
+    if _batcher is not None:
+        lines.append(f"Batches: {_batcher.summary()}")
+    return lines
+
+def close_pool():
+    global _pool, _batcher
+    with _pool_lock:
+        batcher, _batcher = _batcher, None
+    if batcher is not None:
+        batcher.close()     # Writes what is still pending (outside the lock, it needs the pool)
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def insert_record(insert_sql, row):
+    """
+        Insert one parsed record on a pooled connection, no CSV or DataFrame in between.
+
+        :param insert_sql: INSERT statement with one placeholder per value (ProductSchema.insert_sql)
+        :param row: values in column order, None for SQL NULL
+        :return: (success, message)
+        :rtype: tuple
+    """
+    return get_pool().execute(insert_sql, row)
+
+def load_csv_to_db(CSV_PATH, table_name=TABLE_NAME):
     # Check if CSV file exists
     if not os.path.exists(CSV_PATH):
         print(f"CSV file not found: {CSV_PATH}")
         sys.exit()
+    import pandas as pd     # Only this legacy CSV path needs pandas; it is not loaded otherwise
     full_df = pd.read_csv(CSV_PATH)
     df = full_df.iloc[[0]]  # Only keep the second row (index 0 after skipping header)
     print(df)
 
-    # Connect to MySQL
-    try:
-        conn = mysql.connector.connect(
-            host = "gitserver.local",
-            port = 3306,
-            user = "rawsas",
-            passwd = "gf{u!lr<AnSkU@=sMN?,",
-            database = "Fast_Product",
-            )
-        cursor = conn.cursor()
-    except mysql.connector.Error as err:
-        return False, f"Database connection failed: {err}"
+    # Prepare column names and placeholders
+    columns = ', '.join(df.columns)
+    placeholders = ', '.join(['%s'] * len(df.columns))
 
-    try:
-        # Prepare column names and placeholders
-        columns = ', '.join(df.columns)
-        placeholders = ', '.join(['%s'] * len(df.columns))
-
-        """
+    """
     The columns and placeholders are dynamically generated based on the CSV file.
     # Manually define the placeholders and columns to match the CSV file
     columns = (
@@ -46,21 +478,7 @@ def load_csv_to_db(CSV_PATH):
 
     # The above is a manual definition of the columns and placeholders.
     """
-    
-        # Insert the single row
-        row = [str(x) for x in df.iloc[0]]
-        cursor.execute(
-            f'INSERT INTO {TABLE_NAME} ({columns.lower()}) VALUES ({placeholders})',
-            row
-        )
 
-        conn.commit()
-        return True, f"Data inserted successfully"
-    except mysql.connector.Error as err:
-        return False, f"Error inserting data: {err}"
-    finally:
-        # Close the cursor and connection
-        cursor.close()
-        conn.close()
-        del cursor
-        del conn
+    # Insert the single row on a pooled connection
+    row = [str(x) for x in df.iloc[0]]
+    return get_pool().execute(f'INSERT INTO {table_name} ({columns.lower()}) VALUES ({placeholders})', row)
@@ -0,0 +1,87 @@
+import contextlib
+import os
+import stat
+import sys
+
+# Keeps operators from editing or stumbling over the monitor's working files: read-only + hidden on
+# Windows (the same as attrib +r +h, but in-process), read-only on Linux/macOS where hiding is a
+# matter of the file name. Attributes are only written when they differ from what is wanted.
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    FILE_ATTRIBUTE_READONLY = 0x01
+    FILE_ATTRIBUTE_HIDDEN = 0x02
+    FILE_ATTRIBUTE_NORMAL = 0x80
+    INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+    PROTECTED = FILE_ATTRIBUTE_READONLY | FILE_ATTRIBUTE_HIDDEN
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _GetFileAttributesW = _kernel32.GetFileAttributesW
+    _GetFileAttributesW.argtypes = [wintypes.LPCWSTR]
+    _GetFileAttributesW.restype = wintypes.DWORD
+    _SetFileAttributesW = _kernel32.SetFileAttributesW
+    _SetFileAttributesW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD]
+    _SetFileAttributesW.restype = wintypes.BOOL
+
+    def _set_protected(path, protected):
+        attributes = _GetFileAttributesW(path)
+        if attributes == INVALID_FILE_ATTRIBUTES:
+            raise ctypes.WinError(ctypes.get_last_error())
+        wanted = attributes | PROTECTED if protected else attributes & ~PROTECTED
+        if wanted == attributes:
+            return False
+        if not _SetFileAttributesW(path, wanted or FILE_ATTRIBUTE_NORMAL):
+            raise ctypes.WinError(ctypes.get_last_error())
+        return True
+else:
+    _WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+    def _set_protected(path, protected):
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+        wanted = mode & ~_WRITE_BITS if protected else mode | stat.S_IWUSR
+        if wanted == mode:
+            return False
+        os.chmod(path, wanted)
+        return True
+
+
+def protect(path):
+    """
+        Make a file read-only (and hidden on Windows).
+
+        :return: True if the attributes had to be changed
+        :rtype: bool
+    """
+    return _set_protected(path, True)
+
+
+def unprotect(path):
+    """
+        Make a file writable (and visible on Windows) again.
+
+        :return: True if the attributes had to be changed
+        :rtype: bool
+    """
+    return _set_protected(path, False)
+
+
+@contextlib.contextmanager
+def writable(path):
+    """
+        Unprotect path (if it exists) for the duration of the block and
+        protect it again afterwards, like the attrib -h -r / +r +h pairs
+        around every write used to.
+
+            with writable(self.csv_path):
+                with open(self.csv_path, "w") as file:
+                    ...
+    """
+    if os.path.exists(path):
+        unprotect(path)
+    try:
+        yield path
+    finally:
+        if os.path.exists(path):
+            protect(path)
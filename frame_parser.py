@@ -0,0 +1,139 @@
+START_MARKER = b"START"
+STOP_MARKER = b"STOP"
+MAX_BUFFER_SIZE = 64 * 1024  # Largest partial frame we keep before resyncing (bytes)
+
+
+class FrameParser:
+    """
+        Incremental START/STOP framer for raw serial data.
+
+        Bytes are fed in whatever chunks the port delivers them. The parser
+        remembers how far it has already scanned, so every byte is looked at
+        only once no matter how the chunks are split.
+
+        Resync policy:
+          - Noise before a START marker is dropped.
+          - A new START seen before the STOP of the current frame means the
+            previous frame was truncated; it is dropped and the new frame is
+            used instead.
+          - If a frame grows past max_buffer without a STOP, the partial
+            frame is dropped and the parser waits for the next START.
+
+        :param start_marker: bytes that open a frame
+        :param end_marker: bytes that close a frame
+        :param max_buffer: maximum size of a partial frame in bytes
+    """
+
+    def __init__(self, start_marker=START_MARKER, end_marker=STOP_MARKER, max_buffer=MAX_BUFFER_SIZE):
+        if isinstance(start_marker, str):
+            start_marker = start_marker.encode()
+        if isinstance(end_marker, str):
+            end_marker = end_marker.encode()
+        if max_buffer < len(start_marker) + len(end_marker):
+            raise ValueError("max_buffer is smaller than the frame markers.")
+
+        self.start_marker = start_marker
+        self.end_marker = end_marker
+        self.max_buffer = max_buffer
+
+        self.buffer = bytearray()   # Bytes of the frame being assembled (always starts with START when in_frame)
+        self.in_frame = False       # True once a START has been seen and no STOP yet
+        self._scan_pos = 0          # Next position in buffer that has not been scanned yet
+
+        # Counters, useful to see how noisy a port is
+        self.frames = 0
+        self.dropped_bytes = 0
+        self.truncated_frames = 0
+        self.overflows = 0
+
+    def reset(self):
+        """
+            Drop any partial frame and start looking for a new START marker.
+        """
+        self.buffer.clear()
+        self.in_frame = False
+        self._scan_pos = 0
+
+    def feed(self, data):
+        """
+            Add a chunk of raw bytes and return every frame it completed.
+
+            :param data: bytes or bytearray read from the port
+            :return: list of complete frames, each one including its START
+                and STOP markers
+            :rtype: list of bytes
+        """
+        frames = []
+        if not data:
+            return frames
+
+        self.buffer += data
+
+        while True:
+            if not self.in_frame:
+                if not self._find_start():
+                    break
+            frame = self._find_end()
+            if frame is None:
+                break
+            frames.append(frame)
+
+        self._check_overflow()
+        return frames
+
+    def _find_start(self):
+        # Look for START from the last scanned position, drop the noise before it
+        index = self.buffer.find(self.start_marker, self._scan_pos)
+        if index < 0:
+            # Keep only a tail that could still be the beginning of a START marker
+            keep = len(self.start_marker) - 1
+            drop = max(len(self.buffer) - keep, 0)
+            if drop:
+                del self.buffer[:drop]
+                self.dropped_bytes += drop
+            self._scan_pos = 0
+            return False
+
+        if index:
+            del self.buffer[:index]
+            self.dropped_bytes += index
+        self.in_frame = True
+        self._scan_pos = len(self.start_marker)
+        return True
+
+    def _find_end(self):
+        # Look for STOP (or a new START that cuts the current frame short)
+        while True:
+            end_index = self.buffer.find(self.end_marker, self._scan_pos)
+            limit = end_index if end_index >= 0 else len(self.buffer)
+            restart_index = self.buffer.find(self.start_marker, self._scan_pos, limit)
+
+            if restart_index >= 0:
+                # Previous frame never got its STOP, resync on the new START
+                del self.buffer[:restart_index]
+                self.dropped_bytes += restart_index
+                self.truncated_frames += 1
+                self._scan_pos = len(self.start_marker)
+                continue
+
+            if end_index < 0:
+                # Everything except a possible partial marker at the end has been scanned
+                overlap = max(len(self.start_marker), len(self.end_marker)) - 1
+                self._scan_pos = max(len(self.start_marker), len(self.buffer) - overlap)
+                return None
+
+            end = end_index + len(self.end_marker)
+            frame = bytes(self.buffer[:end])
+            del self.buffer[:end]
+            self.in_frame = False
+            self._scan_pos = 0
+            self.frames += 1
+            return frame
+
+    def _check_overflow(self):
+        if len(self.buffer) <= self.max_buffer:
+            return
+        # Frame is too long to be real, throw it away and wait for the next START
+        self.dropped_bytes += len(self.buffer)
+        self.overflows += 1
+        self.reset()
@@ -0,0 +1,329 @@
+import argparse
+import collections
+import datetime
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+JOURNAL_FILE = "journal.fjr"    # Recent raw frames of all stations in base_path
+JOURNAL_MAGIC = b"FSMJRN1\n"    # File signature + format version
+JOURNAL_SIZE = 4 * 1024 * 1024  # Bytes preallocated for records (~8000 AM60 frames)
+FOLLOW_INTERVAL = 0.2           # Seconds between polls when following the journal
+
+# File layout: 64 byte header, then a ring of records. Each record is 8 byte aligned and starts with
+# a marker, a CRC32 over the rest of its header and its payload, then sequence number, wall clock
+# time, station id and payload length. A record that does not fit before the end of the ring is
+# written at the start instead, after a WRAP marker. Readers need no lock: a record that is being
+# (over)written fails its CRC and is treated as not there (yet).
+_FILE_HEADER = struct.Struct("<8sQQQ")      # Magic, ring capacity, write offset, next sequence number
+_HEADER_SIZE = 64
+_RECORD = struct.Struct("<IIQdHI2x")        # Marker, CRC32, sequence number, time, station id, payload length
+_RECORD_MARKER = 0x4C4E524A
+_WRAP_MARKER = 0x50415257
+_ALIGN = 8
+
+JournalRecord = collections.namedtuple("JournalRecord", "seq time station data")
+
+
+def station_id(name):
+    """
+        :return: the 16 bit id journal records of station name carry
+        :rtype: int
+    """
+    return zlib.crc32(name.encode("utf-8")) & 0xFFFF
+
+
+def _aligned(size):
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class _JournalView:
+    # Record decoding shared by the writer and the readers
+    def __init__(self, buffer, path):
+        self._buffer = buffer
+        self.path = path
+        magic, self.capacity, _, _ = _FILE_HEADER.unpack_from(buffer, 0)
+        if magic != JOURNAL_MAGIC or len(buffer) < _HEADER_SIZE + self.capacity:
+            raise ValueError(f"Not a journal file: {path}")
+
+    def _position(self):
+        # (write offset, next sequence number) as last published by the writer
+        _, _, head, seq = _FILE_HEADER.unpack_from(self._buffer, 0)
+        return head, seq
+
+    def _read(self, offset):
+        # Record at offset: a JournalRecord, "wrap", or None if there is no intact record there
+        if self.capacity - offset < _RECORD.size:
+            return "wrap"
+        start = _HEADER_SIZE + offset
+        marker, crc, seq, stamp, station, length = _RECORD.unpack_from(self._buffer, start)
+        if marker == _WRAP_MARKER:
+            return "wrap"
+        if marker != _RECORD_MARKER or length > self.capacity - offset - _RECORD.size:
+            return None
+        end = start + _RECORD.size + length
+        data = bytes(self._buffer[start + _RECORD.size:end])
+        if zlib.crc32(data, zlib.crc32(self._buffer[start + 8:start + _RECORD.size])) != crc:
+            return None
+        return JournalRecord(seq, stamp, station, data)
+
+    def _oldest(self):
+        # Offset of the oldest intact record: the ring start until the ring has wrapped once,
+        # then the first intact record after the write offset
+        first = self._read(0)
+        if first is None or (first != "wrap" and first.seq == 0):
+            return 0
+        head, _ = self._position()
+        for offset in range(head, self.capacity, _ALIGN):
+            record = self._read(offset)
+            if record == "wrap":
+                break
+            if record is not None:
+                return offset
+        return 0
+
+    def records(self, station=None):
+        """
+            Iterate over the records in the journal, oldest first.
+
+            :param station: only records of this station id (see station_id)
+            :return: generator of JournalRecord(seq, time, station, data)
+            :rtype: generator
+        """
+        offset = self._oldest()
+        last_seq = -1
+        wrapped = False
+        while True:
+            record = self._read(offset)
+            if record == "wrap":
+                if wrapped:
+                    return
+                offset, wrapped = 0, True
+                continue
+            if record is None or record.seq <= last_seq:
+                return  # End of the newest record, or back where we started
+            last_seq = record.seq
+            if station is None or record.station == station:
+                yield record
+            offset += _aligned(_RECORD.size + len(record.data))
+
+
+class MessageJournal(_JournalView):
+    """
+        Append-only ring journal of raw frames in a preallocated,
+        memory-mapped file. Appending copies the frame into the mapping,
+        so it costs the same whatever the history size, and the last
+        JOURNAL_SIZE bytes of frames survive a restart of the monitor.
+
+        Safe to share between stations (appends are serialized). Other
+        threads and processes can read or tail the file with JournalReader
+        without taking any lock.
+
+        :param path: journal file, created (or resized) if needed
+        :param size: ring capacity in bytes
+    """
+
+    def __init__(self, path, size=JOURNAL_SIZE):
+        size = _aligned(max(size, 64 * 1024))
+        self._lock = threading.Lock()
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        existing = self._file.read(_FILE_HEADER.size)
+        fresh = len(existing) < _FILE_HEADER.size or existing[:len(JOURNAL_MAGIC)] != JOURNAL_MAGIC \
+            or _FILE_HEADER.unpack(existing)[1] != size
+        if fresh:   # New file, or a different size: start over
+            self._file.truncate(0)
+            self._file.truncate(_HEADER_SIZE + size)
+            self._file.seek(0)
+            self._file.write(_FILE_HEADER.pack(JOURNAL_MAGIC, size, 0, 0))
+            self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), _HEADER_SIZE + size)
+        super().__init__(self._map, path)
+
+        self._head, self._seq = self._position()
+        # The header is updated after each record: pick up a record written just before a crash
+        record = self._read(self._head)
+        if record not in (None, "wrap") and record.seq == self._seq:
+            self._advance(self._head + _aligned(_RECORD.size + len(record.data)), record.seq + 1)
+        self.appended = 0
+        self.bytes = 0
+
+    def _advance(self, head, seq):
+        self._head, self._seq = head, seq
+        _FILE_HEADER.pack_into(self._map, 0, JOURNAL_MAGIC, self.capacity, head, seq)
+
+    def append(self, station, data, timestamp=None):
+        """
+            Add one frame. Frames longer than a quarter of the ring are cut.
+
+            :param station: station id (see station_id)
+            :param data: raw frame bytes
+            :param timestamp: epoch seconds, now if None
+            :return: sequence number of the record
+            :rtype: int
+        """
+        data = bytes(data[:self.capacity // 4])
+        size = _aligned(_RECORD.size + len(data))
+        stamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if self._map.closed:
+                raise ValueError("Journal is closed")
+            head, seq = self._head, self._seq
+            if head + size > self.capacity:
+                if self.capacity - head >= _RECORD.size:
+                    struct.pack_into("<I", self._map, _HEADER_SIZE + head, _WRAP_MARKER)
+                head = 0
+            start = _HEADER_SIZE + head
+            header = _RECORD.pack(0, 0, seq, stamp, station, len(data))
+            crc = zlib.crc32(data, zlib.crc32(header[8:]))
+            # Payload and fields first, marker last, so a reader never sees a complete-looking half record
+            self._map[start + _RECORD.size:start + _RECORD.size + len(data)] = data
+            self._map[start + 8:start + _RECORD.size] = header[8:]
+            struct.pack_into("<II", self._map, start, _RECORD_MARKER, crc)
+            self._advance(head + size, seq + 1)
+            self.appended += 1
+            self.bytes += len(data)
+        return seq
+
+    def close(self):
+        """
+            Write the mapping back to disk and close the file.
+        """
+        with self._lock:
+            if not self._map.closed:
+                self._map.flush()
+                self._map.close()
+                self._file.close()
+
+
+class JournalReader(_JournalView):
+    """
+        Read-only view of a journal file, for another thread or process.
+
+        :param path: journal file
+        :param from_start: True to return the whole recent history from
+            read_new(), False to return only frames appended from now on
+    """
+
+    def __init__(self, path, from_start=False):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        super().__init__(self._map, path)
+        head, self._next_seq = self._position()
+        self._offset = head
+        self.missed = 0     # Records overwritten before this reader got to them
+        if from_start:
+            self._resync()
+
+    def _resync(self):
+        self._offset = self._oldest()
+        record = self._read(self._offset)
+        if isinstance(record, JournalRecord):
+            self.missed += max(0, record.seq - self._next_seq)
+            self._next_seq = record.seq
+        else:
+            self._next_seq = 0
+
+    def read_new(self, station=None):
+        """
+            :param station: only records of this station id
+            :return: records appended since the last call, oldest first
+            :rtype: list
+        """
+        found = []
+        wrapped = False
+        while True:
+            record = self._read(self._offset)
+            if record == "wrap":
+                if wrapped:
+                    break
+                self._offset, wrapped = 0, True
+                continue
+            if record is None or record.seq < self._next_seq:
+                if self._position()[1] > self._next_seq and not found:
+                    self._resync()  # The writer lapped this reader, continue from the oldest record left
+                    if self._read(self._offset) is None:
+                        break
+                    continue
+                break
+            self.missed += record.seq - self._next_seq
+            self._next_seq = record.seq + 1
+            self._offset += _aligned(_RECORD.size + len(record.data))
+            if station is None or record.station == station:
+                found.append(record)
+        return found
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+_journals = {}      # path -> MessageJournal, one per file shared by all stations
+_journals_lock = threading.Lock()
+
+def get_journal(directory, size=JOURNAL_SIZE):
+    """
+        :param directory: folder of the journal file
+        :param size: ring capacity, used when the journal is first opened
+        :return: the shared journal for directory, opened on first use
+        :rtype: MessageJournal
+    """
+    path = os.path.abspath(os.path.join(directory, JOURNAL_FILE))
+    with _journals_lock:
+        if path not in _journals:
+            _journals[path] = MessageJournal(path, size)
+        return _journals[path]
+
+def close_journals():
+    """
+        Flush and close all open journals.
+    """
+    with _journals_lock:
+        journals = list(_journals.values())
+        _journals.clear()
+    for journal in journals:
+        journal.close()
+
+
+def _print_record(record, names):
+    moment = datetime.datetime.fromtimestamp(record.time).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    station = names.get(record.station, record.station)
+    print(f"#{record.seq} [{moment}] {station}")
+    print(record.data.decode("utf-8", errors="replace").strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print or follow the raw frames kept in a journal file.")
+    parser.add_argument("path", nargs="?", default=JOURNAL_FILE, help=f"journal file (default: {JOURNAL_FILE})")
+    parser.add_argument("--station", help="only frames of this station name")
+    parser.add_argument("--grep", help="only frames containing this text")
+    parser.add_argument("--last", type=int, help="only the last N matching frames")
+    parser.add_argument("--follow", action="store_true", help="keep printing new frames as they are appended")
+    args = parser.parse_args(argv)
+
+    reader = JournalReader(args.path, from_start=True)
+    station = station_id(args.station) if args.station else None
+    names = {station: args.station} if args.station else {}
+    needle = args.grep.encode("utf-8") if args.grep else None
+    try:
+        while True:
+            records = [r for r in reader.read_new(station) if needle is None or needle in r.data]
+            if args.last and not args.follow:
+                records = records[-args.last:]
+            for record in records:
+                _print_record(record, names)
+            if not args.follow:
+                break
+            time.sleep(FOLLOW_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import collections
+import threading
+
+LATENCY_WINDOW = 1000   # Number of recent samples used for the percentiles
+
+
+class LatencyStats:
+    """
+        Thread-safe latency counter over a sliding window of recent samples.
+
+        :param window: number of most recent samples kept for percentiles
+        :param label: what is counted, first word of summary()
+    """
+
+    def __init__(self, window=LATENCY_WINDOW, label="Frames"):
+        self.label = label
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """
+            Record one sample.
+
+            :param seconds: measured latency in seconds
+        """
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, pct):
+        """
+            :param pct: percentile between 0 and 100
+            :return: the latency in seconds at that percentile of the window,
+                None if no samples were recorded
+            :rtype: float
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def summary(self):
+        """
+            :return: short text like "Frames: 12 | p50 3.1 ms | p99 9.8 ms"
+            :rtype: str
+        """
+        p50 = self.percentile(50)
+        p99 = self.percentile(99)
+        if p50 is None:
+            return f"{self.label}: {self.count} | p50 - | p99 -"
+        return f"{self.label}: {self.count} | p50 {p50 * 1000:.1f} ms | p99 {p99 * 1000:.1f} ms"
@@ -0,0 +1,299 @@
+import collections
+import os
+import tkinter as tk
+import tkinter.font as tkfont
+from array import array
+from tkinter import ttk
+
+MAX_LOG_LINES = 5000        # Lines kept in memory before old ones are moved to disk
+TRIM_LOG_LINES = 1000       # How many lines are moved to disk at once when the cap is hit
+HISTORY_PAGE_LINES = 256    # Lines per on-disk history page (one file offset kept per page)
+HISTORY_PAGE_CACHE = 8      # Number of history pages kept in memory while scrolling
+MAX_HISTORY_BYTES = 16 * 1024 * 1024    # History file size at which its older half is dropped
+
+
+class LogBuffer:
+    """
+        Ring buffer of log lines with on-disk overflow.
+
+        The newest lines are kept in memory. When more than max_lines are
+        held, the oldest trim_lines are appended to the history file in one
+        write. Only one file offset per HISTORY_PAGE_LINES lines is kept, so
+        memory stays flat however long the monitor runs. Once the file
+        passes max_history_bytes its older half is dropped, so the disk use
+        stays bounded too (the capture file keeps the full record).
+
+        :param max_lines: number of lines kept in memory
+        :param trim_lines: number of lines moved to disk at once
+        :param history_path: file for older lines, None to discard them
+        :param max_history_bytes: history file size at which its oldest pages are dropped
+    """
+
+    def __init__(self, max_lines=MAX_LOG_LINES, trim_lines=TRIM_LOG_LINES, history_path=None,
+                 max_history_bytes=MAX_HISTORY_BYTES):
+        self.max_lines = max_lines
+        self.trim_lines = max(1, min(trim_lines, max_lines))
+        self.lines = collections.deque()
+        self.partial = ""           # Text after the last newline, shown as the last line
+
+        self.history_path = history_path
+        self.max_history_bytes = max_history_bytes
+        self.history_count = 0      # Number of lines in the history file
+        self.discarded = 0          # Number of lines dropped for good (line numbers start after them)
+        self._history = open(history_path, "w+b") if history_path else None
+        self._history_size = 0      # Bytes written to the history file
+        self._page_offsets = array("Q")
+        self._page_cache = collections.OrderedDict()
+
+    def __len__(self):
+        return self.history_count + len(self.lines) + (1 if self.partial else 0)
+
+    def append(self, text):
+        """
+            Add text to the log. Text does not need to end on a line break.
+
+            :param text: the text to add
+        """
+        text = self.partial + text.replace("\r", "")
+        parts = text.split("\n")
+        self.partial = parts.pop()
+        self.lines.extend(parts)
+
+        if len(self.lines) > self.max_lines:
+            self._spill(len(self.lines) - self.max_lines + self.trim_lines)
+
+    def clear(self):
+        """
+            Move everything to the history file. The in-memory buffer starts empty.
+        """
+        if self.partial:
+            self.lines.append(self.partial)
+            self.partial = ""
+        self._spill(len(self.lines))
+
+    def get_lines(self, start, count):
+        """
+            Return up to count lines starting at line number start.
+
+            :param start: first line number (0 is the oldest line still kept)
+            :param count: number of lines wanted
+            :return: the lines, older ones are read back from the history file
+            :rtype: list of str
+        """
+        start = max(0, start)
+        end = min(len(self), start + count)
+        result = []
+
+        # Part that lives in the history file
+        line = start
+        while line < min(end, self.history_count):
+            page, offset = divmod(line, HISTORY_PAGE_LINES)
+            page_lines = self._read_page(page)
+            taken = page_lines[offset:offset + min(end, self.history_count) - line]
+            if not taken:
+                break
+            result.extend(taken)
+            line += len(taken)
+
+        # Part that lives in memory
+        if end > self.history_count:
+            first = max(start, self.history_count) - self.history_count
+            last = end - self.history_count
+            memory_count = len(self.lines)
+            for index in range(first, min(last, memory_count)):
+                result.append(self.lines[index])
+            if last > memory_count:
+                result.append(self.partial)
+        return result
+
+    def close(self):
+        """
+            Close the history file.
+        """
+        if self._history is not None:
+            self._history.close()
+            self._history = None
+
+    def _spill(self, count):
+        count = min(count, len(self.lines))
+        if count <= 0:
+            return
+        if self._history is None:
+            # No history file, just drop the oldest lines
+            for _ in range(count):
+                self.lines.popleft()
+            self.discarded += count
+            return
+
+        first_page = self.history_count // HISTORY_PAGE_LINES   # Page that may have been partially filled
+        chunks = []
+        for _ in range(count):
+            if self.history_count % HISTORY_PAGE_LINES == 0:
+                self._page_offsets.append(self._history_size)
+            data = (self.lines.popleft() + "\n").encode("utf-8", errors="replace")
+            chunks.append(data)
+            self._history_size += len(data)
+            self.history_count += 1
+
+        self._history.seek(0, os.SEEK_END)
+        self._history.write(b"".join(chunks))     # One write per trim
+        self._page_cache.pop(first_page, None)   # It has grown, drop the cached copy
+        if self._history_size > self.max_history_bytes:
+            self._drop_oldest_pages()
+
+    def _drop_oldest_pages(self):
+        # Move the newest pages (about half the cap) to the start of the file and cut it there
+        keep_from = len(self._page_offsets) - 1     # Always keep the last, possibly partial, page
+        while keep_from > 0 and self._history_size - self._page_offsets[keep_from - 1] <= self.max_history_bytes // 2:
+            keep_from -= 1
+        if keep_from == 0:
+            return
+        base = self._page_offsets[keep_from]
+        read_at, write_at = base, 0
+        while read_at < self._history_size:
+            self._history.seek(read_at)
+            data = self._history.read(min(1024 * 1024, self._history_size - read_at))
+            self._history.seek(write_at)
+            self._history.write(data)
+            read_at += len(data)
+            write_at += len(data)
+        self._history.truncate(write_at)
+
+        dropped = keep_from * HISTORY_PAGE_LINES
+        self._page_offsets = array("Q", (offset - base for offset in self._page_offsets[keep_from:]))
+        self._history_size -= base
+        self._page_cache.clear()
+        self.history_count -= dropped
+        self.discarded += dropped
+
+    def _read_page(self, page):
+        if page in self._page_cache:
+            self._page_cache.move_to_end(page)
+            return self._page_cache[page]
+        if self._history is None or page >= len(self._page_offsets):
+            return []
+
+        start = self._page_offsets[page]
+        end = self._page_offsets[page + 1] if page + 1 < len(self._page_offsets) else self._history_size
+        self._history.flush()
+        self._history.seek(start)
+        lines = self._history.read(end - start).decode("utf-8", errors="replace").split("\n")[:-1]
+
+        self._page_cache[page] = lines
+        if len(self._page_cache) > HISTORY_PAGE_CACHE:
+            self._page_cache.popitem(last=False)
+        return lines
+
+
+class LogView(ttk.Frame):
+    """
+        Read-only log widget that only renders the lines in view.
+
+        Content lives in a LogBuffer; the Text widget only ever holds the
+        visible window, so inserting and scrolling cost the same after ten
+        lines or ten million. Offers insert(), see() and delete() like a
+        Text widget so it can replace a ScrolledText.
+
+        :param parent: parent widget
+        :param buffer: LogBuffer holding the content
+        :param height: visible lines
+        :param width: width in characters
+    """
+
+    def __init__(self, parent, buffer=None, height=25, width=90, **text_options):
+        super().__init__(parent)
+        self.buffer = buffer if buffer is not None else LogBuffer()
+        self.top = 0                # Line number shown at the top of the view
+        self.follow = True          # Stick to the newest line while new text arrives
+        self._visible_lines = height
+        self._render_id = None
+        self._discarded = self.buffer.discarded
+
+        # No wrapping (one buffer line is one view line); long lines are reached with the horizontal scrollbar
+        self.text = tk.Text(self, height=height, width=width, wrap=tk.NONE, state="disabled", **text_options)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.xscrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.xscrollbar.grid(row=1, column=0, sticky="ew")
+        self.text.configure(xscrollcommand=self.xscrollbar.set)
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.text.bind("<Configure>", self._on_resize)
+        self.text.bind("<MouseWheel>", self._on_mousewheel)    # Windows / macOS
+        self.text.bind("<Button-4>", lambda e: self.scroll(-3))  # Linux
+        self.text.bind("<Button-5>", lambda e: self.scroll(3))
+
+    # ----- Text-compatible API -----
+    def insert(self, index, text):
+        self.buffer.append(text)   # Only appending is supported, index is ignored
+        self._schedule_render()
+
+    def see(self, index):
+        if index == tk.END:
+            self.follow = True
+        self._schedule_render()
+
+    def delete(self, start, end=None):
+        self.buffer.clear()     # Old text stays reachable by scrolling up
+        self.follow = True
+        self._schedule_render()
+
+    # ----- Scrolling -----
+    def scroll(self, lines):
+        """
+            Move the view by a number of lines (negative is up).
+        """
+        self._set_top(self.top + lines)
+
+    def _set_top(self, top):
+        last_top = max(0, len(self.buffer) - self._visible_lines)
+        self.top = max(0, min(int(top), last_top))
+        self.follow = self.top >= last_top
+        self._schedule_render()
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self._set_top(float(args[0]) * len(self.buffer))
+        elif action == "scroll":
+            amount = int(args[0])
+            if args[1] == "pages":
+                amount *= self._visible_lines
+            self.scroll(amount)
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_resize(self, event):
+        linespace = tkfont.Font(font=self.text["font"]).metrics("linespace")
+        self._visible_lines = max(1, event.height // max(1, linespace))
+        self._schedule_render()
+
+    # ----- Rendering -----
+    def _schedule_render(self):
+        if self._render_id is None:
+            self._render_id = self.after_idle(self._render)
+
+    def _render(self):
+        self._render_id = None
+        total = len(self.buffer)
+        if self.follow:
+            self.top = max(0, total - self._visible_lines)
+        else:
+            self.top = max(0, self.top - (self.buffer.discarded - self._discarded))   # Keep the same lines in view
+        self._discarded = self.buffer.discarded
+
+        lines = self.buffer.get_lines(self.top, self._visible_lines)
+        left = self.text.xview()[0]     # Horizontal position survives the refill
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.text.configure(state="disabled")
+        self.text.xview_moveto(left)
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + len(lines)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,223 @@
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+import db_loader
+from monitor_core import Station, StationListener, load_station_config, STATION_CONFIG_FILE
+from product_schema import SchemaError
+from outbox import close_outboxes, stats as outbox_stats
+from journal import close_journals
+
+
+class ConsoleListener(StationListener):
+    # Prints station events to stdout instead of a window
+    def __init__(self, echo=False):
+        self.echo = echo    # Also print the raw bench output
+        self._lock = threading.Lock()
+
+    def on_chunk(self, station, chunk, frames, was_in_frame, in_frame):
+        if self.echo:
+            with self._lock:
+                sys.stdout.write(chunk.decode("utf-8", errors="ignore"))
+                sys.stdout.flush()
+
+    def on_stored(self, station, full_message, timestamp, stored, record):
+        result = "stored" if stored else "skipped"
+        self.print(station, f"{timestamp} {record.get('Serial_Number')} "
+                            f"{record.get('Status')} {result} | {station.latency.summary()}")
+
+    def on_message(self, station, text):
+        self.print(station, text.rstrip())
+
+    def on_scanned(self, station, barcode):
+        self.print(station, f"Serial No is : {barcode}")
+
+    def print(self, station, text):
+        with self._lock:
+            print(f"[{station.name}] {text}", flush=True)
+
+
+def close_database():
+    # Report the outbox and pooled connection metrics (if anything was stored), then close them
+    for line in outbox_stats() + db_loader.stats():
+        print(line)
+    close_outboxes()
+    db_loader.close_pool()
+    close_journals()
+
+
+def auto_ports(args, base_path):
+    # Fill in --port/--baud/--scanner-port from the port discovery (cached devices are not probed again)
+    from port_discovery import discover, get_port_cache, KIND_BENCH, KIND_SCANNER
+    found = discover(get_port_cache(base_path))
+    bench = next((port for port in found if port.kind == KIND_BENCH), None)
+    scanner = next((port for port in found if port.kind == KIND_SCANNER), None)
+    if bench is None:
+        return False
+    args.port, args.baud = bench.device, bench.baud
+    if scanner is not None and not args.scanner_port:
+        args.scanner_port = scanner.device
+    print(f"Bench on {bench.device} at {bench.baud} baud" + (f", scanner on {args.scanner_port}" if args.scanner_port else ""))
+    return True
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless FAST serial monitor: capture, parse and store bench results without a window.")
+    parser.add_argument("--config", help=f"station config file (default: {STATION_CONFIG_FILE} next to this script)")
+    parser.add_argument("--port", help="bench port for a single station, overrides --config; "
+                                       "'auto' for the first bench and scanner found by the port discovery")
+    parser.add_argument("--baud", type=int, default=115200, help="bench baud rate for --port (default: 115200)")
+    parser.add_argument("--scanner-port", help="QR scanner port for --port")
+    parser.add_argument("--scan-mode", choices=["manual", "continuous", "motion"],
+                        help="let the scanner read each presented part by itself (default: the station config, else manual)")
+    parser.add_argument("--name", default="Station 1", help="station name for --port")
+    parser.add_argument("--product", help="product schema name or file (default: the station config, else am60)")
+    parser.add_argument("--transport", choices=["thread", "async"], help="read ports with one thread each or one asyncio loop")
+    parser.add_argument("--echo", action="store_true", help="print the raw bench output")
+    parser.add_argument("--keep-files", action="store_true", help="do not delete the station's CSV export file on exit "
+                                                                 "(the journal, archive and outbox are always kept)")
+    parser.add_argument("--sync-db", action="store_true", help="store each record before reading on (no write-behind queue)")
+    parser.add_argument("--overflow", choices=["block", "drop_oldest", "drop_newest"], help="what to do when the write-behind queue is full")
+    parser.add_argument("--no-outbox", action="store_true", help="insert into MySQL directly instead of through the local outbox")
+    parser.add_argument("--outbox-sync", choices=["full", "normal", "off"], help="how hard the outbox fsyncs each record")
+    parser.add_argument("--db-batch", action="store_true", help="group database inserts of all stations into batches")
+    parser.add_argument("--csv-export", action="store_true", help="keep the latest record in the station's CSV file")
+    parser.add_argument("--no-journal", action="store_true", help="do not append raw frames to the journal")
+    parser.add_argument("--no-archive", action="store_true", help="do not append records to the local result archive")
+    parser.add_argument("--discover", action="store_true", help="identify benches and scanners on the serial ports and exit")
+    parser.add_argument("--dry-run", action="store_true", help="parse frames but do not write them to the database")
+    parser.add_argument("--record", metavar="DIR", help="record all raw port data to capture files in DIR")
+    parser.add_argument("--replay", metavar="FILE", help="replay a capture file through the parser and database instead of reading a port")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed: 1 real time, N for N times faster, 0 as fast as possible")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    base_path = os.path.dirname(os.path.abspath(__file__))
+
+    if args.replay:
+        return replay(args, base_path)
+    if args.discover:
+        from port_discovery import main as discover_main
+        return discover_main([])
+    if args.port == "auto" and not auto_ports(args, base_path):
+        print("No bench found on the serial ports.")
+        return 1
+
+    if args.port:
+        configs = [{"name": args.name, "bench_port": args.port, "scanner_port": args.scanner_port, "baud": args.baud}]
+    else:
+        configs = load_station_config(args.config or os.path.join(base_path, STATION_CONFIG_FILE))
+    for config in configs:
+        if args.transport:
+            config["transport"] = args.transport
+        if args.product:
+            config["product"] = args.product
+        if args.record:
+            config["record_dir"] = os.path.abspath(args.record)
+        if args.dry_run:
+            config["persist"] = False
+        if args.csv_export:
+            config["csv_export"] = True
+        if args.db_batch:
+            config["db_batch"] = True
+        if args.sync_db:
+            config["write_behind"] = False
+        if args.overflow:
+            config["persist_overflow"] = args.overflow
+        if args.no_outbox:
+            config["outbox"] = False
+        if args.outbox_sync:
+            config["outbox_sync"] = args.outbox_sync
+        if args.no_archive:
+            config["archive"] = False
+        if args.no_journal:
+            config["journal"] = False
+        if args.scan_mode:
+            config["scan_mode"] = args.scan_mode
+
+    listener = ConsoleListener(echo=args.echo)
+    serial_loop = None
+    stations = []
+    for index, config in enumerate(configs):
+        suffix = "" if len(configs) == 1 else f"_S{index + 1}"
+        try:
+            station = Station(config, base_path, file_suffix=suffix, listener=listener)
+        except SchemaError as e:
+            print(f"[{config.get('name', 'Station')}] Schema error: {e}")
+            continue
+        if not config.get("bench_port"):
+            listener.print(station, "No bench_port configured, skipping")
+            continue
+        if station.use_async and serial_loop is None:
+            from async_serial import SerialEventLoop
+            serial_loop = SerialEventLoop()
+        try:
+            station.connect(config["bench_port"], int(config.get("baud", 115200)), serial_loop)
+            listener.print(station, f"Connected to {config['bench_port']} at {config.get('baud', 115200)} baud")
+            stations.append(station)
+            if config.get("scanner_port"):
+                station.start_scanner(config["scanner_port"])
+        except Exception as e:
+            listener.print(station, f"Error: {e}")
+
+    if not stations:
+        print("No station could be started.")
+        return 1
+    if not args.dry_run:
+        db_loader.preload()     # Import the MySQL driver while waiting for the first frame
+
+    # Run until Ctrl+C / SIGTERM
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    while not stop.is_set():
+        stop.wait(0.5)
+
+    for station in stations:
+        if station.persist_worker is not None:
+            listener.print(station, station.persist_worker.summary())
+        station.disconnect()
+        if not args.keep_files:
+            station.remove_files()
+    if serial_loop is not None:
+        serial_loop.stop()
+    close_database()
+    return 0
+
+
+def replay(args, base_path):
+    # Feed a capture through a station and report throughput and latency
+    from capture import capture_info
+    started, name = capture_info(args.replay)
+    listener = ConsoleListener(echo=args.echo)
+    config = {"name": name or args.name, "persist": not args.dry_run, "archive": not (args.dry_run or args.no_archive)}
+    if args.product:
+        config["product"] = args.product
+    station = Station(config, base_path, file_suffix="_replay", listener=listener)
+    listener.print(station, f"Replaying capture from {started:%Y-%m-%d %H:%M:%S} at speed {args.speed or 'max'}")
+
+    try:
+        records, seconds = station.replay(args.replay, args.speed)
+        start = time.perf_counter()
+        station.wait_persisted()    # Include the frames still in the write-behind queue
+        seconds += time.perf_counter() - start
+        frames = station.latency.count
+        rate = frames / seconds if seconds > 0 else 0.0
+        listener.print(station, f"{records} records, {frames} frames in {seconds:.3f} s ({rate:.1f} frames/s) | {station.latency.summary()}")
+    finally:
+        # Also on Ctrl+C or an error: write what is still queued before the database is closed
+        station.close_persist_worker()
+        station.close_csv_export()
+        station.close_archive()
+        close_database()
+    if not args.keep_files:
+        station.remove_files()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,660 @@
+import os
+import csv
+import json
+import datetime
+import threading
+import time
+import concurrent.futures
+from serial import Serial
+import db_loader
+from frame_parser import FrameParser
+from latency_stats import LatencyStats
+from capture import CaptureRecorder, CaptureReplayer, new_capture_path, CHANNEL_BENCH, CHANNEL_SCANNER
+from product_schema import load_schema, DEFAULT_PRODUCT
+from csv_export import CsvExporter
+from file_protection import writable, unprotect
+from journal import get_journal, station_id, JOURNAL_SIZE
+from archive import ResultArchive, ARCHIVE_DIR, ARCHIVE_MAX_BYTES
+from outbox import get_outbox
+from persist_worker import PersistWorker, PERSIST_QUEUE_SIZE, OVERFLOW_BLOCK, OVERFLOW_POLICIES
+
+STATION_CONFIG_FILE = "stations.json"  # Optional list of bench/scanner pairs to monitor
+
+def load_station_config(path):
+    """
+        Load the stations to monitor from a JSON file like
+        {"stations": [{"name": "Bench 1", "bench_port": "COM3", "scanner_port": "COM4", "baud": 115200}]}
+
+        :param path: path of the config file
+        :return: list of station dicts, one default station if the file is missing
+        :rtype: list
+    """
+    if not os.path.exists(path):
+        return [{"name": "Station 1"}]
+    try:
+        with open(path, "r") as file:
+            stations = json.load(file).get("stations", [])
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Error reading station config: {e}")
+        return [{"name": "Station 1"}]
+    return stations or [{"name": "Station 1"}]
+
+class StationListener:
+    """
+        Receives events from a Station. Every method is a no-op here;
+        front ends (GUI, CLI) override the ones they need. Methods are
+        called from the reader thread, event loop or persistence worker,
+        never the UI thread.
+    """
+
+    def on_chunk(self, station, chunk, frames, was_in_frame, in_frame):
+        """Raw bytes were read. was_in_frame/in_frame are the framer state before and after the chunk."""
+
+    def on_stored(self, station, full_message, timestamp, stored, record):
+        """A frame's result is known; stored is False if it was skipped, dropped or the database failed. record is the frame's parsed result."""
+
+    def on_message(self, station, text):
+        """A status or error line meant for the operator."""
+
+    def on_scanned(self, station, barcode):
+        """A continuous/motion mode scanner read a new part; barcode is already the Serial_Number."""
+
+class Station:
+    """
+        One bench/scanner pair: serial capture, frame parsing and persistence,
+        with no GUI dependency.
+
+        :param config: station dict from stations.json
+        :param base_path: folder for the station's files
+        :param file_suffix: appended to the file names so stations never share a file
+        :param listener: StationListener that is told about chunks, frames and errors
+    """
+
+    def __init__(self, config, base_path, file_suffix="", listener=None):
+        self.config = config
+        self.name = config.get("name", "Station")
+        self.base_path = base_path
+        self.listener = listener if listener is not None else StationListener()
+
+        self.captured_messages = []  # List to store message tuples
+        self.last_valid_message = ""  # Variable to store the last valid message
+        self.latency = LatencyStats()  # Frame complete -> stored
+
+        # Product schema: result columns, line rules, pass/fail columns and target table
+        # ("product": "am60" or a schema file path in the config)
+        self.schema = load_schema(config.get("product", DEFAULT_PRODUCT), search_dirs=[base_path])
+
+        # Define file paths (one set per station so benches never share a file)
+        self.csv_path = os.path.join(base_path, f'{self.schema.file_prefix}{file_suffix}.csv')
+
+        # Flag to indicate if the serial connection is active
+        self.connection_active = False
+        self.closing = False    # Set while disconnect() shuts the workers down, no new ones are started then
+
+        # "async" reads the ports from a shared asyncio loop instead of one thread per port
+        self.use_async = config.get("transport", "thread") == "async"
+
+        # "persist": false parses frames without writing them to the database (load tests, dry runs)
+        self.persist = config.get("persist", True)
+
+        # "db_batch": true groups direct inserts into executemany batches (db_loader.BATCH_SIZE / BATCH_DELAY);
+        # the outbox always sends in batches
+        self.db_batch = config.get("db_batch", False)
+
+        # Write-behind: the reader only queues records, a worker thread stores them ("write_behind": false to wait
+        # for the database instead). When "persist_queue" records are pending, "persist_overflow" decides:
+        # "block" (wait up to persist_worker.BLOCK_TIMEOUT), "drop_oldest" or "drop_newest"
+        self.write_behind = config.get("write_behind", True)
+        self.persist_queue = int(config.get("persist_queue", PERSIST_QUEUE_SIZE))
+        self.persist_overflow = config.get("persist_overflow", OVERFLOW_BLOCK)
+        if self.persist_overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"persist_overflow must be one of {OVERFLOW_POLICIES}")
+        self.persist_worker = None
+
+        # Records go to a local SQLite outbox (base_path/outbox.db) first and are sent to MySQL from there,
+        # so nothing is lost while the database is unreachable ("outbox": false to insert directly).
+        # "outbox_sync": "full", "normal" or "off" sets how hard the outbox fsyncs (see outbox.SYNC_MODES)
+        self.use_outbox = config.get("outbox", True)
+        self.outbox_sync = config.get("outbox_sync", "normal")
+        self.outbox = None
+
+        # "csv_export": true keeps the latest record in the CSV file, written off the reader thread
+        self.csv_export = config.get("csv_export", False)
+        self.csv_exporter = None
+
+        # Raw frames are appended to a memory-mapped ring journal shared by the stations in base_path
+        # (journal.fjr, "journal_mb" big, default 4), tagged with "station_id" (default: derived from the name).
+        # "journal": false turns it off
+        self.use_journal = config.get("journal", True)
+        self.journal_size = int(config.get("journal_mb", JOURNAL_SIZE / (1024 * 1024)) * 1024 * 1024)
+        self.station_id = int(config.get("station_id", station_id(self.name)))
+        self.journal = None
+
+        # Every parsed record is also appended to a local columnar archive (archive.py), rotated daily and at
+        # "archive_max_mb"; "archive_dir" (default base_path/archive) sets the folder, "archive": false turns it off
+        self.use_archive = config.get("archive", True)
+        self.archive_dir = os.path.join(base_path, config.get("archive_dir", ARCHIVE_DIR))
+        self.archive_max_bytes = int(config.get("archive_max_mb", ARCHIVE_MAX_BYTES / (1024 * 1024)) * 1024 * 1024)
+        self.archive_prefix = f"{self.schema.file_prefix}{file_suffix}"
+        self.archive = None
+
+        self.scanner_session = None     # QR_Scanner.ScannerSession of the last scanner port used
+        # "scan_timeout": seconds from the scan trigger to the barcode, "scan_char_timeout": longest gap
+        # between two characters of a barcode (QR_Scanner.SCAN_TIMEOUT / CHAR_TIMEOUT when not set)
+        self.scan_timeout = config.get("scan_timeout")
+        self.scan_char_timeout = config.get("scan_char_timeout")
+        # "scan_mode": "manual" (Scan button), "continuous" or "motion" (the scanner reads parts as they
+        # are presented); "scan_repeat" is the CNTALW setting 0-3 and "scan_sensitivity" the MDTTHR one
+        self.scan_mode = config.get("scan_mode", "manual")
+        self.scan_repeat = int(config.get("scan_repeat", 2))
+        self.scan_sensitivity = int(config.get("scan_sensitivity", 20))
+        # "scanner_profile": DE2120 settings applied when the station connects, e.g. {"light": false,
+        # "reading_area": 80} (names in scanner_profile.SETTINGS); only changed settings are sent
+        self.scanner_profile = config.get("scanner_profile") or {}
+
+        # Raw capture of everything read from the ports, enabled with "record_dir" in the config
+        self.recorder = None
+        self.replayer = None
+
+        self.manual_header = list(self.schema.columns)  # Define the manual header for the CSV file
+        self.header = self.manual_header  # Set the header to manual header by default
+
+        self.parser = self.schema.parser
+
+        # Initialize result_dict with "null"
+        self.result_dict = self.parser.new_record()
+
+    def connect(self, port, baud, serial_loop=None):
+        """
+            Open the bench port and start reading it.
+
+            :param port: bench port name
+            :param baud: baud rate
+            :param serial_loop: SerialEventLoop, required when the station uses the async transport
+        """
+        if self.use_async:
+            # Open on the shared event loop, the port is then read by a coroutine instead of a thread
+            from async_serial import open_serial_port   # asyncio is only loaded for async stations
+            async_port = serial_loop.submit(open_serial_port(port, baud)).result(timeout=5)
+            self.async_port = async_port
+            self.serial_loop = serial_loop
+        else:
+            self.ser = Serial(port, baud, timeout=1)    # Create a Serial object with the selected port and baud rate
+
+        self.connection_active = True   # Set the flag to True to indicate connection is active
+
+        if self.config.get("record_dir"):
+            self.start_recording(os.path.join(self.base_path, self.config["record_dir"]))
+
+        if self.use_async:
+            self.reader_task = serial_loop.submit(self.read_from_port_async(async_port))
+        else:
+            self.thread = threading.Thread(target=self.read_from_port, name=f"reader-{self.name}", daemon=True)  # Create a thread to read data from the port
+            self.thread.start() # Start the thread
+
+    def disconnect(self):
+        """
+            Stop reading and close the bench port.
+        """
+        self.connection_active = False  # Set the flag to False to stop the reading thread
+        self.closing = True
+        try:
+            if hasattr(self, 'ser') and self.ser.is_open:   # Check if the serial object exists and is open
+                self.ser.close()    # Close the serial connection
+
+            # Wait for the reader to finish the frame it is storing, so nothing reopens a worker closed below
+            if hasattr(self, 'thread') and self.thread.is_alive():
+                self.thread.join()
+
+            if hasattr(self, 'reader_task') and not self.reader_task.done():
+                self.serial_loop.call(self.async_port.close)    # The coroutine ends at its next read
+                try:
+                    self.reader_task.result()
+                except concurrent.futures.CancelledError:  # The loop was stopped first
+                    pass
+
+            self.stop_recording()
+            self.close_persist_worker()
+            self.close_csv_export()
+            self.close_archive()
+            self.close_scanner()
+        finally:
+            self.closing = False
+
+    def start_recording(self, directory):
+        """
+            Record every raw chunk from the bench and scanner to a new capture file.
+
+            :param directory: folder for the capture file
+            :return: path of the capture file
+            :rtype: str
+        """
+        self.stop_recording()
+        self.recorder = CaptureRecorder(new_capture_path(directory, self.name), self.name)
+        self.listener.on_message(self, f"Recording to {self.recorder.path}\n")
+        return self.recorder.path
+
+    def stop_recording(self):
+        """
+            Close the capture file, if recording.
+        """
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def replay(self, path, speed=1.0):
+        """
+            Feed a capture file through the same framer/parser/persistence path as a live port.
+
+            :param path: capture file
+            :param speed: 1.0 for real time, N for N times faster, 0 for as fast as possible
+            :return: (records replayed, seconds taken)
+            :rtype: tuple
+        """
+        from QR_Scanner import take_lines
+        framer = FrameParser()
+        scanner_output = bytearray()    # Raw scanner chunks, a barcode can be split over several
+
+        def on_record(channel, data):
+            if channel == CHANNEL_SCANNER:
+                scanner_output.extend(data)
+                for barcode in take_lines(scanner_output):
+                    self.set_serial_number(barcode)
+            else:
+                self.handle_chunk(framer, data)
+
+        self.replayer = CaptureReplayer(path, speed)
+        try:
+            return self.replayer.replay(on_record)
+        finally:
+            self.replayer = None
+
+    def remove_files(self):
+        """
+            Delete the station's temporary CSV file (the journal and archive are kept).
+        """
+        self.close_csv_export()
+        try:
+            if os.path.exists(self.csv_path):   # Only there with "csv_export"
+                unprotect(self.csv_path)
+                os.remove(self.csv_path)
+        except Exception as e:
+            print(f"Failed to delete CSV: {e}")
+
+    def scan(self, scanner_port, serial_loop=None):
+        """
+            Read a serial number from the QR scanner and start a new record with it.
+
+            :param scanner_port: scanner port name
+            :param serial_loop: SerialEventLoop, required when the station uses the async transport
+            :return: the scanned barcode, empty string if nothing was read
+            :rtype: str
+        """
+        if self.use_async:
+            scanned_barcode = serial_loop.submit(self.scan_async(scanner_port)).result()
+        else:
+            scanned_barcode = self.get_scanner(scanner_port).scan()  # The port stays open between scans
+        self.set_serial_number(scanned_barcode)
+        return scanned_barcode
+
+    def get_scanner(self, scanner_port):
+        """
+            :return: the scanner session for scanner_port; the session of a
+                previously used port is closed
+            :rtype: QR_Scanner.ScannerSession
+        """
+        from QR_Scanner import get_session
+        session = get_session(scanner_port)
+        if self.scanner_session is not None and self.scanner_session is not session:
+            self.scanner_session.on_raw = None
+            self.scanner_session.close()
+        self.scanner_session = session
+        session.on_raw = self.record_scanner_output
+        if self.scan_timeout is not None:
+            session.timeout = float(self.scan_timeout)
+        if self.scan_char_timeout is not None:
+            session.char_timeout = float(self.scan_char_timeout)
+        return session
+
+    def configure_scanner(self, scanner_port, force=False):
+        """
+            Apply the station's scanner_profile to the scanner.
+
+            :param scanner_port: scanner port name
+            :param force: resend settings the cache says are already set
+            :return: the result, None if there is no profile or the scanner could not be reached
+            :rtype: scanner_profile.ProfileResult
+        """
+        if not self.scanner_profile:
+            return None
+        from scanner_profile import get_profile_cache
+        try:
+            result = self.get_scanner(scanner_port).configure(self.scanner_profile, get_profile_cache(self.base_path),
+                                                              force)
+        except (OSError, ValueError) as e:  # serial.SerialException is an OSError
+            self.listener.on_message(self, f"Scanner profile not applied: {e}\n")
+            return None
+        text = f"Scanner profile: {len(result.applied)} set, {len(result.skipped)} unchanged in {result.seconds * 1000:.0f} ms"
+        if result.nacked or result.missing:
+            text += f", refused: {', '.join(result.nacked) or '-'}, no answer: {', '.join(result.missing) or '-'}"
+        self.listener.on_message(self, text + "\n")
+        return result
+
+    def start_scanner(self, scanner_port):
+        """
+            Prepare the scanner after connecting: apply scanner_profile and,
+            outside manual scan_mode, start the listener. Can take a couple
+            of seconds for a silent port, so front ends call it off their UI
+            thread; errors are reported through listener.on_message.
+
+            :param scanner_port: scanner port name
+            :return: True if the scanner now reads parts by itself
+            :rtype: bool
+        """
+        result = self.configure_scanner(scanner_port)   # Only changed settings are sent
+        if self.scan_mode == "manual":
+            return False
+        if result is not None and result.missing and not (result.applied or result.nacked):
+            self.listener.on_message(self, f"Scanner not started in {self.scan_mode} mode: no answer\n")
+            return False
+        try:
+            self.start_scan_listener(scanner_port)
+        except (OSError, ValueError) as e:  # serial.SerialException is an OSError
+            self.listener.on_message(self, f"Scanner not started in {self.scan_mode} mode: {e}\n")
+            return False
+        return True
+
+    def start_scan_listener(self, scanner_port):
+        """
+            Let the scanner read parts by itself (scan_mode "continuous" or
+            "motion"): every new barcode becomes the Serial_Number of the
+            next record and is reported through listener.on_scanned.
+
+            :param scanner_port: scanner port name
+        """
+        session = self.get_scanner(scanner_port)
+        session.unsubscribe(self.on_barcode)
+        session.subscribe(self.on_barcode)
+        session.listen(self.scan_mode, self.scan_repeat, self.scan_sensitivity)
+        self.listener.on_message(self, f"Scanner in {self.scan_mode} mode, present a part\n")
+
+    def stop_scan_listener(self):
+        """
+            Put the scanner back into manual trigger mode.
+        """
+        if self.scanner_session is not None:
+            self.scanner_session.unsubscribe(self.on_barcode)
+            self.scanner_session.stop_listening()
+
+    def on_barcode(self, barcode):  # Called from the scanner's listener thread
+        self.set_serial_number(barcode)
+        self.listener.on_scanned(self, barcode)
+
+    def close_scanner(self):
+        """
+            Close the scanner port (it is reopened by the next scan).
+        """
+        if self.scanner_session is not None:
+            self.scanner_session.unsubscribe(self.on_barcode)
+            self.scanner_session.close()
+            self.scanner_session.on_raw = None
+            self.scanner_session = None
+
+    async def scan_async(self, port_name):  # Coroutine version of scan() for async stations
+        # Same long-lived ScannerSession (timeouts, stray ACK handling, reconnect) as the thread transport;
+        # its blocking read runs in the loop's executor so the other ports keep being served
+        import asyncio
+        session = self.get_scanner(port_name)
+        return await asyncio.get_running_loop().run_in_executor(None, session.scan)
+
+    def record_scanner_output(self, data):  # Every raw chunk the scanner session reads, see ScannerSession.on_raw
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(CHANNEL_SCANNER, data)
+
+    def set_serial_number(self, scanned_barcode):
+        """
+            Start a new record for a scanned serial number.
+
+            :param scanned_barcode: the serial number, ignored if empty
+        """
+        if scanned_barcode:  # If barcode was scanned successfully
+            self.result_dict = self.parser.new_record()  # Reset result_dict to "null" for all keys
+            self.result_dict["Serial_Number"] = scanned_barcode  # Update with scanned barcode
+            if self.csv_export:
+                self.export_csv("null", self.result_dict)   # Dummy timestamp until the bench reports
+
+    def read_from_port(self):  # Method to read data from the serial port in a separate thread
+        framer = FrameParser()  # Incremental START/STOP framer for the raw bytes
+        self.listener.on_message(self, "Reading from port...\n")
+
+        while self.connection_active:
+            try:
+                chunk = self.ser.read(self.ser.in_waiting or 1)  # Read whatever is waiting (blocks up to timeout for 1 byte)
+                if chunk:
+                    self.handle_chunk(framer, chunk)
+
+            except Exception as e:
+                if self.connection_active:
+                    self.listener.on_message(self, f"Error reading from port: {str(e)}\n")
+                break
+
+    async def read_from_port_async(self, port):  # Coroutine version of read_from_port, runs on the shared event loop
+        import asyncio
+        from async_serial import read_frames
+        framer = FrameParser()  # Incremental START/STOP framer for the raw bytes
+        self.listener.on_message(self, "Reading from port...\n")
+        loop = asyncio.get_running_loop()
+
+        def on_chunk(chunk, frames, was_in_frame):
+            if self.recorder is not None:
+                self.recorder.record(CHANNEL_BENCH, chunk)
+            self.listener.on_chunk(self, chunk, frames, was_in_frame, framer.in_frame)
+
+        async def on_frame(frame):
+            await loop.run_in_executor(None, self.process_frame, frame)    # Keep DB work off the event loop
+
+        try:
+            await read_frames(port, framer, on_chunk, on_frame)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            if self.connection_active:
+                self.listener.on_message(self, f"Error reading from port: {str(e)}\n")
+        finally:
+            port.close()
+
+    def handle_chunk(self, framer, chunk):  # Record, frame and store one chunk of raw bench bytes
+        if self.recorder is not None:
+            self.recorder.record(CHANNEL_BENCH, chunk)
+        was_in_frame = framer.in_frame
+        frames = framer.feed(chunk)  # Collect every frame completed by this chunk
+        self.listener.on_chunk(self, chunk, frames, was_in_frame, framer.in_frame)
+        for frame in frames:
+            self.process_frame(frame)
+
+    def process_frame(self, frame):  # Store one complete START..STOP frame
+        frame_time = time.perf_counter()   # Latency is measured from here until the result is stored
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Get current timestamp
+        full_message = frame.decode("utf-8", errors="ignore").strip()
+        if self.use_journal:
+            self.get_journal().append(self.station_id, frame)   # Constant cost, the ring keeps the recent history
+
+        def finished(stored, record):  # Runs here, or on the persistence worker with write-behind
+            self.latency.add(time.perf_counter() - frame_time)
+            if stored:
+                # Update last_valid_message to the new message (this is the last good message now)
+                self.last_valid_message = f"[{timestamp}]\n{full_message}"
+            self.listener.on_stored(self, full_message, timestamp, stored, record)
+
+        return self.save_message_exact(full_message, timestamp, finished)
+
+    def save_message_exact(self, full_message, timestamp, on_done=None):  # Parse one message and store the record in the database
+        """
+            :param on_done: called once as on_done(stored, record) when the result is known,
+                from the persistence worker thread with write-behind
+            :return: False if the frame was skipped, dropped or could not be stored
+            :rtype: bool
+        """
+        done = on_done or (lambda stored, record: None)
+
+        # Parse the frame into result_dict (one rule lookup per line, see result_parser)
+        if not self.parser.parse(full_message, self.result_dict):
+            done(False, self.result_dict)
+            return False  # The whole message was a comment, skip it
+
+        # Error check 1: Serial number is null
+        if self.result_dict.get("Serial_Number", "null") == "null":
+            print("ERROR: Please scan Serial number")
+
+        # Error check 2: Too many nulls in the diagnostic columns
+        if self.parser.null_count(self.result_dict, self.schema.diagnostic_columns) > self.schema.max_missing:
+            print(f"ERROR: More than {self.schema.max_missing} missing values in diagnostic range")
+            print("Please Reset Controller and try again")
+
+        if self.csv_export:
+            self.export_csv(timestamp, self.result_dict)    # Written by the export thread, not here
+        if self.use_archive:
+            self.get_archive().submit(timestamp, self.result_dict)    # Batched and written by the archive thread
+
+        if not self.persist:
+            done(True, self.result_dict)
+            return True  # Dry run: parse only, nothing goes to the database
+
+        # Insert the parsed record as is (no CSV round trip), batched with other stations' records if enabled
+        row = self.schema.row(timestamp, self.result_dict)
+        if self.write_behind:
+            record = dict(self.result_dict)     # result_dict moves on with the next frame
+
+            def stored(success, message):
+                if not success:
+                    self.listener.on_message(self, f"Database error: {message}\n")
+                done(success, record)
+            return self.get_persist_worker().submit(self.schema.insert_sql, row, stored)
+
+        result = self.write_record(self.schema.insert_sql, row)
+        success, message = db_loader.wait_result(result) if isinstance(result, concurrent.futures.Future) else result
+        if not success:
+            self.listener.on_message(self, f"Database error: {message}\n")
+        done(success, self.result_dict)
+        return success
+
+    def write_record(self, statement, row):
+        """
+            Store one record: into the outbox (the default), else straight into
+            MySQL, batched with other stations' records with "db_batch".
+
+            :return: (success, message), or a Future of it when batching
+        """
+        if self.use_outbox:
+            return self.get_outbox().put(statement, row, self.name)
+        if self.db_batch:
+            return db_loader.get_batcher().submit(statement, row)
+        return db_loader.insert_record(statement, row)
+
+    def get_outbox(self):
+        """
+            :return: the outbox shared by the stations in base_path, opened on first use
+            :rtype: outbox.Outbox
+        """
+        if self.outbox is None:
+            self.outbox = get_outbox(self.base_path, self.outbox_sync)
+            self.outbox.add_listener(self.on_outbox_status)
+        return self.outbox
+
+    def on_outbox_status(self, text):
+        self.listener.on_message(self, text)
+
+    def get_persist_worker(self):
+        """
+            :return: the station's write-behind worker, started on first use
+            :rtype: PersistWorker
+        """
+        if self.persist_worker is None:
+            self._check_not_closing()
+            self.persist_worker = PersistWorker(self.write_record, max_pending=self.persist_queue,
+                                                overflow=self.persist_overflow, name=f"persist-{self.name}")
+        return self.persist_worker
+
+    def _check_not_closing(self):  # A worker started now would never be closed or flushed
+        if self.closing:
+            raise RuntimeError(f"{self.name} is disconnecting")
+
+    def wait_persisted(self, timeout=None):
+        """
+            Wait until every queued record has been written (or has failed).
+
+            :return: True if nothing is left in the queue
+            :rtype: bool
+        """
+        return self.persist_worker is None or self.persist_worker.wait(timeout)
+
+    def close_persist_worker(self):
+        """
+            Write the queued records and stop the write-behind worker.
+        """
+        if self.persist_worker is not None:
+            self.persist_worker.close()
+            self.persist_worker = None
+        if self.outbox is not None:
+            self.outbox.remove_listener(self.on_outbox_status)
+            self.outbox = None
+
+    def export_csv(self, timestamp, result_dict):
+        """
+            Queue a record for the CSV export (the file holds the latest record).
+        """
+        if self.csv_exporter is None:
+            self._check_not_closing()
+            self.csv_exporter = CsvExporter(self.store_data_in_csv)
+        self.csv_exporter.submit(timestamp, result_dict)
+
+    def close_csv_export(self):
+        """
+            Flush pending CSV exports and stop the export thread.
+        """
+        if self.csv_exporter is not None:
+            self.csv_exporter.close()
+            self.csv_exporter = None
+
+    def get_journal(self):
+        """
+            :return: the raw frame journal shared by the stations in base_path, opened on first use
+            :rtype: journal.MessageJournal
+        """
+        if self.journal is None:
+            self.journal = get_journal(self.base_path, self.journal_size)
+        return self.journal
+
+    def get_archive(self):
+        """
+            :return: the station's result archive, opened on first use
+            :rtype: archive.ResultArchive
+        """
+        if self.archive is None:
+            self._check_not_closing()
+            self.archive = ResultArchive(self.archive_dir, self.archive_prefix, self.schema.column_types,
+                                         station=self.name, max_bytes=self.archive_max_bytes)
+        return self.archive
+
+    def close_archive(self):
+        """
+            Write the records still buffered for the archive and close it.
+        """
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    def store_data_in_csv(self, timestamp, result_dict): 
+        # Use self.result_dict if none is passed
+        if result_dict is None:
+            result_dict = self.result_dict
+
+        # Always open in write mode to overwrite previous content (read-only and hidden between writes)
+        with writable(self.csv_path):
+            with open(self.csv_path, mode="w", newline="") as file:
+                writer = csv.writer(file)
+                # If the file doesn't exist, write the header
+                writer.writerow(["Timestamp"] + self.manual_header)
+                # Then write the new row
+                writer.writerow([timestamp] + [result_dict.get(key, "null") for key in self.manual_header])
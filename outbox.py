@@ -0,0 +1,285 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import db_loader
+
+OUTBOX_FILE = "outbox.db"   # Local store for records on their way to MySQL
+DRAIN_BATCH = 500           # Records sent per executemany while draining
+RETRY_INTERVAL = 5.0        # Seconds between attempts while the database is unreachable
+MAX_ATTEMPTS = 5            # A record the database keeps rejecting is parked after this many tries
+                            # (the n-th retry waits n * retry_interval, so a lock timeout can pass)
+
+# fsync policy (SQLite synchronous setting in WAL mode):
+#   "full"    every record is on disk before put() returns, survives power loss
+#   "normal"  survives a crash of the monitor; the last records may be lost on power loss (default)
+#   "off"     leaves flushing to the OS, fastest
+SYNC_MODES = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}
+
+
+class Outbox:
+    """
+        Durable outbox: every record is committed to a local SQLite (WAL)
+        file first, and a drainer thread replays pending records to MySQL
+        in batches, oldest first.
+
+        A record is deleted from the outbox only after the MySQL commit that
+        contains it, and a single drainer sends each record once, so nothing
+        is inserted twice. The one exception is the monitor dying between
+        the MySQL commit and the delete; those records are sent again on
+        the next start. Records whose commit was cut off by a lost connection
+        (db_loader.COMMIT_UNCONFIRMED) are parked rather than resent, to be
+        checked against the table by hand.
+
+        :param path: outbox file
+        :param sync: one of SYNC_MODES
+        :param batch_size: records per executemany
+        :param retry_interval: seconds between attempts while MySQL is unreachable
+    """
+
+    def __init__(self, path, sync="normal", batch_size=DRAIN_BATCH, retry_interval=RETRY_INTERVAL):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"Unknown outbox sync mode {sync!r}, expected one of {list(SYNC_MODES)}")
+        self.path = path
+        self.sync = sync
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self._listeners = []
+        self._lock = threading.Lock()   # Serializes writers on the put connection
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+        self._db = self._connect()
+        self._db.execute("""CREATE TABLE IF NOT EXISTS outbox (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                created REAL NOT NULL,
+                                station TEXT,
+                                statement TEXT NOT NULL,
+                                row TEXT NOT NULL,
+                                attempts INTEGER NOT NULL DEFAULT 0,
+                                error TEXT,
+                                parked INTEGER NOT NULL DEFAULT 0,
+                                next_attempt REAL NOT NULL DEFAULT 0)""")
+        columns = [column[1] for column in self._db.execute("PRAGMA table_info(outbox)")]
+        if "next_attempt" not in columns:   # Outbox file from before retries were spaced out
+            self._db.execute("ALTER TABLE outbox ADD COLUMN next_attempt REAL NOT NULL DEFAULT 0")
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (parked, id)")
+
+        self.online = True
+        self.saved = 0
+        self.delivered = 0
+        self.parked = 0
+        self.drain_seconds = 0.0    # Time spent sending (for the catch-up rate)
+        self._thread = threading.Thread(target=self._drain, name="outbox-drain", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)  # Autocommit, one transaction per statement
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(f"PRAGMA synchronous={SYNC_MODES[self.sync]}")
+        return db
+
+    def add_listener(self, callback):
+        """
+            :param callback: called with a status line when the database goes offline or comes back
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _status(self, text):
+        for callback in list(self._listeners):
+            try:
+                callback(text)
+            except Exception as e:
+                print(f"Outbox listener failed: {e}")
+
+    def put(self, statement, row, station=""):
+        """
+            Commit one record to the outbox and wake the drainer.
+
+            :param statement: INSERT with %s placeholders
+            :param row: values for the placeholders (JSON serializable)
+            :param station: station name, for inspection
+            :return: (success, message)
+            :rtype: tuple
+        """
+        try:
+            with self._lock:
+                self._db.execute("INSERT INTO outbox (created, station, statement, row) VALUES (?, ?, ?, ?)",
+                                 (time.time(), station, statement, json.dumps(row)))
+                self.saved += 1
+        except sqlite3.Error as e:
+            return False, f"Outbox write failed: {e}"
+        self._wakeup.set()
+        return True, "Saved to outbox"
+
+    def pending(self):
+        """
+            :return: number of records waiting for MySQL (parked ones not included)
+            :rtype: int
+        """
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox WHERE parked = 0").fetchone()[0]
+
+    def _drain(self):
+        db = self._connect()    # The drainer reads and deletes on its own connection
+        try:
+            while not self._stopping.is_set():
+                now = time.time()
+                rows = db.execute("SELECT id, statement, row, attempts FROM outbox WHERE parked = 0 AND next_attempt <= ? "
+                                  "ORDER BY id LIMIT ?", (now, self.batch_size)).fetchall()
+                if not rows:
+                    # Nothing due: sleep until the next rejected record may be retried, or a new one arrives
+                    retry_at = db.execute("SELECT MIN(next_attempt) FROM outbox WHERE parked = 0").fetchone()[0]
+                    wait = self.retry_interval if retry_at is None else min(self.retry_interval, max(0.0, retry_at - now))
+                    self._wakeup.wait(wait)
+                    self._wakeup.clear()
+                    continue
+                if not self._send(db, rows):
+                    self._stopping.wait(self.retry_interval)    # Offline: try again later
+        finally:
+            db.close()
+
+    def _send(self, db, rows):
+        # Send one batch; consecutive rows with the same statement go in one executemany
+        pool = db_loader.get_pool()
+        start = time.perf_counter()
+        groups = []
+        for record in rows:
+            if groups and groups[-1][0] == record[1]:
+                groups[-1][1].append(record)
+            else:
+                groups.append((record[1], [record]))
+
+        for statement, records in groups:
+            success, message = pool.execute_many(statement, [json.loads(r[2]) for r in records])
+            if success:
+                self._delete(db, [r[0] for r in records])
+                continue
+            if message.startswith(db_loader.COMMIT_UNCONFIRMED):
+                for record in records:
+                    self._park(db, record, message)
+                continue
+            if not message.startswith("Error inserting"):
+                self._set_online(False, message)
+                self.drain_seconds += time.perf_counter() - start
+                return False
+
+            for record in records:  # The database rejected the batch: find the row(s) it does not take
+                success, message = pool.execute(statement, json.loads(record[2]))
+                if success:
+                    self._delete(db, [record[0]])
+                elif message.startswith("Error inserting"):
+                    self._reject(db, record, message)
+                elif message.startswith(db_loader.COMMIT_UNCONFIRMED):
+                    self._park(db, record, message)
+                else:
+                    self._set_online(False, message)
+                    self.drain_seconds += time.perf_counter() - start
+                    return False
+
+        self.drain_seconds += time.perf_counter() - start
+        self._set_online(True)
+        return True
+
+    def _delete(self, db, ids):
+        db.execute(f"DELETE FROM outbox WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        self.delivered += len(ids)
+
+    def _reject(self, db, record, message):
+        attempts = record[3] + 1
+        parked = 1 if attempts >= MAX_ATTEMPTS else 0
+        next_attempt = time.time() + self.retry_interval * attempts     # Back off, the cause may go away
+        db.execute("UPDATE outbox SET attempts = ?, error = ?, parked = ?, next_attempt = ? WHERE id = ?",
+                   (attempts, message, parked, next_attempt, record[0]))
+        if parked:
+            self.parked += 1
+            self._status(f"Outbox: record {record[0]} parked after {attempts} attempts: {message}\n")
+
+    def _park(self, db, record, message):
+        db.execute("UPDATE outbox SET error = ?, parked = 1 WHERE id = ?", (message, record[0]))
+        self.parked += 1
+        self._status(f"Outbox: record {record[0]} parked, it may already be in the database: {message}\n")
+
+    def _set_online(self, online, message=""):
+        if online == self.online:
+            return
+        self.online = online
+        if online:
+            self._status("Database reachable again, sending the records kept in the outbox\n")
+        else:
+            self._status(f"Database unreachable ({message}), records are kept in the outbox\n")
+
+    def summary(self):
+        """
+            :return: one line with saved/delivered/pending counts and the drain rate
+            :rtype: str
+        """
+        rate = self.delivered / self.drain_seconds if self.drain_seconds > 0 else 0.0
+        return (f"Outbox: saved {self.saved} | delivered {self.delivered} ({rate:.0f}/s) | "
+                f"pending {self.pending()} | parked {self.parked} | {'online' if self.online else 'offline'}")
+
+    def wait_empty(self, timeout=None):
+        """
+            Wait until every record has been delivered (or parked).
+
+            :return: True if the outbox is empty
+            :rtype: bool
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self._wakeup.set()
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout=5.0):
+        """
+            Stop the drainer. Records not yet delivered stay in the file and
+            are sent the next time the outbox is opened.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        with self._lock:
+            self._db.close()
+
+
+_outboxes = {}      # path -> Outbox, one per file shared by all stations
+_outboxes_lock = threading.Lock()
+
+def get_outbox(directory, sync="normal"):
+    """
+        :param directory: folder of the outbox file
+        :param sync: fsync policy, used when the outbox is first opened
+        :return: the shared outbox for directory, opened (and draining) on first use
+        :rtype: Outbox
+    """
+    path = os.path.abspath(os.path.join(directory, OUTBOX_FILE))
+    with _outboxes_lock:
+        if path not in _outboxes:
+            _outboxes[path] = Outbox(path, sync=sync)
+        return _outboxes[path]
+
+def stats():
+    """
+        :return: one summary line per open outbox
+        :rtype: list
+    """
+    with _outboxes_lock:
+        return [outbox.summary() for outbox in _outboxes.values()]
+
+def close_outboxes():
+    """
+        Stop all drainers and close the outbox files.
+    """
+    with _outboxes_lock:
+        outboxes = list(_outboxes.values())
+        _outboxes.clear()
+    for outbox in outboxes:
+        outbox.close()
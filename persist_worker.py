@@ -0,0 +1,178 @@
+import collections
+import concurrent.futures
+import threading
+import time
+from latency_stats import LatencyStats
+
+PERSIST_QUEUE_SIZE = 1000   # Records waiting for (or in) the database per station
+OVERFLOW_BLOCK = "block"            # Reader waits for room (up to block_timeout), then drops the new record
+OVERFLOW_DROP_OLDEST = "drop_oldest"    # Oldest queued record is dropped to make room
+OVERFLOW_DROP_NEWEST = "drop_newest"    # New record is dropped
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST)
+BLOCK_TIMEOUT = 1.0     # Seconds the reader may wait for room with OVERFLOW_BLOCK
+
+
+class PersistWorker:
+    """
+        Write-behind persistence: the reader thread only queues parsed
+        records, a background thread writes them and reports each result
+        through the record's callback.
+
+        The queue is bounded. Records that are queued or being written count
+        against max_pending; when it is full the overflow policy decides
+        between waiting and dropping.
+
+        :param write: callable (statement, row) returning (success, message),
+            or a concurrent.futures.Future resolving to it (e.g. BatchInserter.submit)
+        :param max_pending: queue bound
+        :param overflow: one of OVERFLOW_POLICIES
+        :param block_timeout: longest wait for room with OVERFLOW_BLOCK
+        :param name: thread name
+    """
+
+    def __init__(self, write, max_pending=PERSIST_QUEUE_SIZE, overflow=OVERFLOW_BLOCK,
+                 block_timeout=BLOCK_TIMEOUT, name="persist"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}, expected one of {OVERFLOW_POLICIES}")
+        self._write = write
+        self.max_pending = max(1, int(max_pending))
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._queue = collections.deque()   # (statement, row, on_done, queued at)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+        self.stored = 0
+        self.failed = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.queue_time = LatencyStats(label="Records")     # Queued -> result known
+
+    @property
+    def pending(self):
+        with self._condition:
+            return len(self._queue) + self._in_flight
+
+    def submit(self, statement, row, on_done=None):
+        """
+            Queue a record. Returns without touching the database.
+
+            :param statement: INSERT with %s placeholders
+            :param row: values for the placeholders
+            :param on_done: called as on_done(success, message) from the worker thread
+            :return: False if the record was dropped (on_done has been called)
+            :rtype: bool
+        """
+        dropped = None
+        accepted = True     # Cleared wherever the new record itself is refused
+        with self._condition:
+            if self._stopping:
+                dropped = (on_done, "Persistence worker is closed")
+                accepted = False
+            elif len(self._queue) + self._in_flight >= self.max_pending:
+                if self.overflow == OVERFLOW_BLOCK:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) + self._in_flight >= self.max_pending and not self._stopping:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    if len(self._queue) + self._in_flight >= self.max_pending or self._stopping:
+                        dropped = (on_done, "Persistence queue full, record dropped")
+                        accepted = False
+                elif self.overflow == OVERFLOW_DROP_OLDEST and self._queue:
+                    oldest = self._queue.popleft()
+                    dropped = (oldest[2], "Persistence queue full, oldest record dropped")
+                else:
+                    dropped = (on_done, "Persistence queue full, record dropped")
+                    accepted = False
+
+            if accepted:
+                self._queue.append((statement, row, on_done, time.perf_counter()))
+                self.high_water = max(self.high_water, len(self._queue) + self._in_flight)
+                self._condition.notify_all()
+            if dropped is not None:
+                self.dropped += 1
+
+        if dropped is not None:
+            self._report(dropped[0], False, dropped[1])
+        return accepted
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                item = self._queue.popleft()
+                self._in_flight += 1
+
+            statement, row, on_done, queued = item
+            try:
+                result = self._write(statement, row)
+            except Exception as e:
+                result = (False, f"Error storing record: {e}")
+            if isinstance(result, concurrent.futures.Future):
+                # Batched: the worker moves on, the batch thread completes the record
+                result.add_done_callback(lambda future, item=item: self._finish(item, future.result()))
+            else:
+                self._finish(item, result)
+
+    def _finish(self, item, result):
+        success, message = result
+        with self._condition:
+            self._in_flight -= 1
+            if success:
+                self.stored += 1
+            else:
+                self.failed += 1
+            self._condition.notify_all()
+        self.queue_time.add(time.perf_counter() - item[3])
+        self._report(item[2], success, message)
+
+    @staticmethod
+    def _report(on_done, success, message):
+        if on_done is None:
+            return
+        try:
+            on_done(success, message)
+        except Exception as e:
+            print(f"Persistence callback failed: {e}")
+
+    def wait(self, timeout=None):
+        """
+            Wait until every queued record has a result.
+
+            :return: True if the queue drained within timeout
+            :rtype: bool
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def summary(self):
+        """
+            :return: one line with stored/failed/dropped counts and queue percentiles
+            :rtype: str
+        """
+        return (f"Stored: {self.stored} | failed {self.failed} | dropped {self.dropped} | "
+                f"queue peak {self.high_water}/{self.max_pending} | {self.queue_time.summary()}")
+
+    def close(self, timeout=10.0):
+        """
+            Write what is queued (up to timeout) and stop the worker thread.
+        """
+        self.wait(timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
@@ -0,0 +1,290 @@
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+import serial
+from serial.tools import list_ports
+from frame_parser import START_MARKER
+from scanner_lib import DE2120BarcodeScanner as DE2120
+
+PORT_CACHE_FILE = "ports.json"      # What was last found on each device, in base_path
+BENCH_BAUDS = (115200, 9600, 4800, 2400)    # Candidate bench baud rates, as offered in the window
+SCANNER_BAUD = 115200
+HANDSHAKE_TIMEOUT = 0.3     # Seconds for a scanner to answer the firmware version command
+SNIFF_TIME = 1.5            # Seconds to listen for a START marker at each bench baud rate
+
+KIND_BENCH = "bench"
+KIND_SCANNER = "scanner"
+
+DiscoveredPort = collections.namedtuple("DiscoveredPort", "device key kind baud description cached")
+DiscoveredPort.__doc__ = """
+    One serial port: device name, cache key (see device_key), kind
+    (KIND_BENCH, KIND_SCANNER or None if not identified), baud rate it was
+    found at, the driver's description and whether it came from the cache.
+"""
+
+
+def device_key(port_name, ports=None):
+    """
+        :param port_name: port device name
+        :param ports: list_ports.comports() result, enumerated here if None
+        :return: a name for the device on port_name that survives a change
+            of port: USB vendor/product id and serial number when the port
+            reports them, else the port name
+        :rtype: str
+    """
+    for port in ports if ports is not None else list_ports.comports():
+        if port.device == port_name and port.vid is not None:
+            identity = f"SER={port.serial_number}" if port.serial_number else port_name
+            return f"USB {port.vid:04X}:{port.pid:04X} {identity}"
+    return port_name
+
+
+def probe_scanner(device, timeout=HANDSHAKE_TIMEOUT):
+    """
+        Ask for the DE2120 firmware version, like DE2120BarcodeScanner.is_connected
+        but with a short timeout. Any answer, ACK or NACK, means a scanner.
+
+        :return: True if a scanner answered
+        :rtype: bool
+    """
+    with serial.Serial(device, SCANNER_BAUD, timeout=timeout, write_timeout=timeout) as port:
+        port.reset_input_buffer()
+        port.write(f"^_^{DE2120.COMMAND_GET_VERSION}.".encode())
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            data = port.read(port.in_waiting or 1)
+            if DE2120.DE2120_COMMAND_ACK in data or DE2120.DE2120_COMMAND_NACK in data:
+                return True
+    return False
+
+
+def sniff_bench(device, bauds=BENCH_BAUDS, sniff_time=SNIFF_TIME):
+    """
+        Listen (without sending anything) for a START marker at each baud
+        rate in turn. A bench that sends nothing is not recognized; if no
+        byte at all arrives at the first rate the others are not tried.
+
+        :return: the baud rate a START marker was seen at, None if none
+        :rtype: int
+    """
+    for index, baud in enumerate(bauds):
+        received = bytearray()
+        heard = False
+        with serial.Serial(device, baud, timeout=0.05) as port:
+            port.reset_input_buffer()
+            deadline = time.perf_counter() + sniff_time
+            while time.perf_counter() < deadline:
+                data = port.read(port.in_waiting or 1)
+                heard = heard or bool(data)
+                received += data
+                if START_MARKER in received:
+                    return baud
+                del received[:-len(START_MARKER)]
+        if index == 0 and not heard:
+            return None     # Idle line, other rates would not hear anything either
+    return None
+
+
+def probe(device, bauds=BENCH_BAUDS, sniff_time=SNIFF_TIME):
+    """
+        Identify the device on one port: a scanner handshake first (short),
+        then START marker sniffing at the bench baud rates.
+
+        :return: (kind, baud), (None, None) if nothing was recognized
+        :rtype: tuple
+    """
+    try:
+        if probe_scanner(device):
+            return KIND_SCANNER, SCANNER_BAUD
+        baud = sniff_bench(device, bauds, sniff_time)
+    except (serial.SerialException, OSError):   # Busy (opened by another program) or gone
+        return None, None
+    return (KIND_BENCH, baud) if baud else (None, None)
+
+
+def recheck(device, known, bauds=BENCH_BAUDS, sniff_time=SNIFF_TIME):
+    """
+        Cheap check that a cached port still has the device the cache says:
+        one scanner handshake. A scanner that stopped answering (or a bench
+        port where a scanner now answers) gets a full probe. An idle bench
+        cannot be told from an empty port, so a bench is kept unless a
+        scanner answers.
+
+        :param known: the cache entry, {"kind", "baud"}
+        :return: (kind, baud, changed)
+        :rtype: tuple
+    """
+    try:
+        if probe_scanner(device):
+            return KIND_SCANNER, SCANNER_BAUD, known["kind"] != KIND_SCANNER
+        if known["kind"] == KIND_BENCH:
+            return KIND_BENCH, known["baud"], False
+        baud = sniff_bench(device, bauds, sniff_time)
+    except (serial.SerialException, OSError):   # Busy: most likely still the same device in use
+        return known["kind"], known["baud"], False
+    return (KIND_BENCH, baud, True) if baud else (None, None, True)
+
+
+def stable_key(key):
+    """
+        :return: True if key names the device itself (USB serial number),
+            False if it is tied to the port name, where another device can
+            be plugged in later
+        :rtype: bool
+    """
+    return " SER=" in key
+
+
+class PortCache:
+    """
+        Kind and baud rate last identified for each device, kept in a JSON
+        file so the next start assigns known devices without probing:
+
+            {"USB 0403:6001 SER=A10K3X": {"kind": "bench", "baud": 115200}}
+
+        :param path: cache file, created on the first update
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as file:
+                self._devices = json.load(file)
+        except (OSError, ValueError):
+            self._devices = {}
+
+    def get(self, key):
+        """
+            :return: {"kind", "baud"} of the device, None if unknown
+            :rtype: dict
+        """
+        with self._lock:
+            entry = self._devices.get(key)
+            return dict(entry) if entry else None
+
+    def update(self, found):
+        """
+            Remember the identified ports of found (DiscoveredPort list).
+        """
+        with self._lock:
+            changed = False
+            for port in found:
+                if port.kind and not port.cached:
+                    self._devices[port.key] = {"kind": port.kind, "baud": port.baud}
+                    changed = True
+                elif not port.kind and not port.cached and port.key in self._devices and not stable_key(port.key):
+                    del self._devices[port.key]     # Something else (or nothing) is on that port now
+                    changed = True
+            if changed:
+                temporary = self.path + ".tmp"
+                with open(temporary, "w") as file:
+                    json.dump(self._devices, file, indent=2, sort_keys=True)
+                os.replace(temporary, self.path)
+
+
+_caches = {}        # path -> PortCache
+_caches_lock = threading.Lock()
+
+def get_port_cache(directory):
+    """
+        :param directory: folder of the cache file
+        :return: the shared port cache for directory
+        :rtype: PortCache
+    """
+    path = os.path.abspath(os.path.join(directory, PORT_CACHE_FILE))
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = PortCache(path)
+        return _caches[path]
+
+
+def discover(cache=None, skip=(), force=False, bauds=BENCH_BAUDS, sniff_time=SNIFF_TIME, devices=None):
+    """
+        Enumerate the serial ports once and identify benches and scanners.
+        Devices the cache knows by USB serial number are taken from it;
+        cached ports known only by port name get a quick recheck (see
+        recheck), the others a full probe, concurrently, one thread per port.
+
+        :param cache: PortCache, or None to probe every port
+        :param skip: device names not to open (in use or configured), listed with kind None
+        :param force: probe cached devices too
+        :param bauds: candidate bench baud rates
+        :param sniff_time: seconds to listen at each bench baud rate
+        :param devices: device names to look at instead of the enumerated
+            ports (e.g. pseudo-terminals, which are not enumerated)
+        :return: one DiscoveredPort per port, in enumeration order
+        :rtype: list
+    """
+    ports = list_ports.comports()
+    descriptions = {port.device: port.description for port in ports}
+    if devices is None:
+        devices = sorted(descriptions)
+    found = {}
+    to_probe = []
+    to_recheck = []
+    for device in devices:
+        key = device_key(device, ports)
+        known = cache.get(key) if cache is not None and not force else None
+        if known and (stable_key(key) or device in skip):
+            found[device] = DiscoveredPort(device, key, known["kind"], known["baud"], descriptions.get(device, ""), True)
+        elif device in skip:
+            found[device] = DiscoveredPort(device, key, None, None, descriptions.get(device, ""), False)
+        elif known:
+            to_recheck.append((device, key, known))
+        else:
+            to_probe.append((device, key))
+
+    if to_probe or to_recheck:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(to_probe) + len(to_recheck)) as executor:
+            probes = {executor.submit(probe, device, _bauds_for(device, key, cache, bauds), sniff_time): (device, key)
+                      for device, key in to_probe}
+            rechecks = {executor.submit(recheck, device, known, bauds, sniff_time): (device, key)
+                        for device, key, known in to_recheck}
+            for future, (device, key) in probes.items():
+                kind, baud = future.result()
+                found[device] = DiscoveredPort(device, key, kind, baud, descriptions.get(device, ""), False)
+            for future, (device, key) in rechecks.items():
+                kind, baud, changed = future.result()
+                found[device] = DiscoveredPort(device, key, kind, baud, descriptions.get(device, ""), not changed)
+
+    result = [found[device] for device in devices]
+    if cache is not None:
+        cache.update(result)
+    return result
+
+
+def _bauds_for(device, key, cache, bauds):
+    # The rate the device was last found at first, even when re-probing
+    known = cache.get(key) if cache is not None else None
+    if known and known.get("baud") in bauds:
+        return (known["baud"],) + tuple(b for b in bauds if b != known["baud"])
+    return bauds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List serial ports and identify benches and QR scanners on them.")
+    parser.add_argument("devices", nargs="*", help="ports to probe (default: all enumerated ports)")
+    parser.add_argument("--cache", help=f"port cache file (default: {PORT_CACHE_FILE} next to this script)")
+    parser.add_argument("--force", action="store_true", help="probe ports the cache already knows")
+    parser.add_argument("--sniff", type=float, default=SNIFF_TIME, help="seconds to listen per bench baud rate")
+    args = parser.parse_args(argv)
+
+    directory = os.path.dirname(os.path.abspath(args.cache)) if args.cache else os.path.dirname(os.path.abspath(__file__))
+    cache = PortCache(os.path.abspath(args.cache)) if args.cache else get_port_cache(directory)
+    start = time.perf_counter()
+    found = discover(cache, force=args.force, sniff_time=args.sniff, devices=args.devices or None)
+    for port in found:
+        kind = f"{port.kind} at {port.baud}" if port.kind else "unknown"
+        print(f"{port.device:14} {kind:20} {'(cached) ' if port.cached else ''}{port.key}  {port.description}")
+    print(f"{len(found)} ports in {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
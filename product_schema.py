@@ -0,0 +1,148 @@
+import json
+import os
+import re
+import threading
+from result_parser import ResultParser, NULL
+from archive import FLOAT, INT8, STR
+
+SCHEMA_DIR = "schemas"      # Product schema files, <product>.json
+ARCHIVE_TYPES = (FLOAT, INT8, STR)  # "column_types" values; columns not listed are archived as text
+DEFAULT_PRODUCT = "am60"
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")    # Table and column names go into SQL as-is
+_cache = {}     # path -> (mtime_ns, size, ProductSchema)
+_cache_lock = threading.Lock()
+
+
+class SchemaError(ValueError):
+    pass
+
+
+class ProductSchema:
+    """
+        A validated, compiled product schema: the result columns, the line
+        parser, the pass/fail columns and the database insert statement.
+
+        :param definition: dict loaded from a schema file
+        :param path: file it came from, for error messages
+    """
+
+    def __init__(self, definition, path=""):
+        self.path = path
+        self.product = _require(definition, "product", str, path)
+        self.table = _identifier(_require(definition, "table", str, path), "table", path)
+        self.file_prefix = _identifier(definition.get("file_prefix", self.product), "file_prefix", path)
+        self.columns = [_identifier(c, "column", path) for c in _require(definition, "columns", list, path)]
+        if len(set(self.columns)) != len(self.columns):
+            raise SchemaError(f"{path}: duplicate column names")
+
+        self.keep_columns = self._columns(definition, "keep_columns")
+        self.status_columns = self._columns(definition, "status_columns")
+        self.diagnostic_columns = self._columns(definition, "diagnostic_columns")
+        self.status_column = definition.get("status_column")
+        if self.status_column is not None and self.status_column not in self.columns:
+            raise SchemaError(f"{path}: status_column {self.status_column!r} is not a column")
+        self.max_missing = definition.get("max_missing", len(self.diagnostic_columns))
+
+        # Typed columns for the result archive (archive.py)
+        column_types = definition.get("column_types", {})
+        if not isinstance(column_types, dict):
+            raise SchemaError(f"{path}: column_types must be an object")
+        unknown = [c for c in column_types if c not in self.columns]
+        if unknown:
+            raise SchemaError(f"{path}: column_types names unknown columns {unknown}")
+        invalid = {c: t for c, t in column_types.items() if t not in ARCHIVE_TYPES}
+        if invalid:
+            raise SchemaError(f"{path}: column_types must be one of {ARCHIVE_TYPES}, got {invalid}")
+        self.column_types = [(c, column_types.get(c, STR)) for c in self.columns]
+
+        try:
+            self.parser = ResultParser(self.columns, _require(definition, "rules", list, path),
+                                       status_columns=self.status_columns, keep_columns=self.keep_columns,
+                                       status_column=self.status_column)
+        except (ValueError, AttributeError, TypeError) as e:
+            raise SchemaError(f"{path}: {e}")
+
+        # Insert statement for one record, Timestamp first (the database uses lower case names)
+        names = ["timestamp"] + [c.lower() for c in self.columns]
+        self.insert_sql = (f"INSERT INTO {self.table} ({', '.join(names)}) "
+                           f"VALUES ({', '.join(['%s'] * len(names))})")
+
+    def row(self, timestamp, record):
+        """
+            :return: the values for insert_sql, "null" columns as None (SQL NULL)
+            :rtype: list
+        """
+        values = [record.get(c, NULL) for c in self.columns]
+        return [timestamp] + [None if value == NULL else value for value in values]
+
+    def _columns(self, definition, key):
+        columns = definition.get(key, [])
+        if not isinstance(columns, list):
+            raise SchemaError(f"{self.path}: {key} must be a list")
+        unknown = [c for c in columns if c not in self.columns]
+        if unknown:
+            raise SchemaError(f"{self.path}: {key} names unknown columns {unknown}")
+        return list(columns)
+
+
+def _require(definition, key, kind, path):
+    value = definition.get(key)
+    if not isinstance(value, kind) or not value:
+        raise SchemaError(f"{path}: '{key}' is missing or not a {kind.__name__}")
+    return value
+
+
+def _identifier(name, what, path):
+    if not isinstance(name, str) or not _IDENTIFIER.match(name):
+        raise SchemaError(f"{path}: invalid {what} name {name!r}")
+    return name
+
+
+def find_schema(product, search_dirs=()):
+    """
+        :param product: schema file path, or a product name looked up as
+            <dir>/schemas/<product>.json in search_dirs and next to this module
+        :return: path of the schema file
+        :rtype: str
+    """
+    if os.path.isfile(product):
+        return os.path.abspath(product)
+    file_name = product.lower() + ".json"
+    for directory in list(search_dirs) + [os.path.dirname(os.path.abspath(__file__))]:
+        path = os.path.join(directory, SCHEMA_DIR, file_name)
+        if os.path.isfile(path):
+            return os.path.abspath(path)
+    raise SchemaError(f"No schema found for product {product!r}")
+
+
+def load_schema(product=DEFAULT_PRODUCT, search_dirs=()):
+    """
+        Load, validate and compile a product schema. Compiled schemas are
+        cached per file (and reloaded if the file changes), so stations of
+        the same product share one parser.
+
+        :param product: product name or schema file path
+        :param search_dirs: extra directories holding a schemas/ folder, searched first
+        :return: the compiled schema
+        :rtype: ProductSchema
+    """
+    path = find_schema(product, search_dirs)
+    stat = os.stat(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            definition = json.load(file)
+    except ValueError as e:
+        raise SchemaError(f"{path}: {e}")
+    if not isinstance(definition, dict):
+        raise SchemaError(f"{path}: a schema must be a JSON object")
+    schema = ProductSchema(definition, path)
+
+    with _cache_lock:
+        _cache[path] = (stat.st_mtime_ns, stat.st_size, schema)
+    return schema
@@ -0,0 +1,149 @@
+import re
+
+# A rule maps bench lines to a result column (see schemas/am60.json):
+#   {"exact": line, "column": c, "value": v}        the whole (stripped) line is known text
+#   {"field": key, "column": c}                     "key = value" lines, the column gets value
+#   {"counted": text, "column": "P_{n}", "value": v} any line containing text (any case) fills
+#                                                   the next P_1, P_2, ... column
+RULE_KINDS = ("exact", "field", "counted")
+
+NULL = "null"   # Value of a column the frame did not fill
+
+
+class ResultParser:
+    """
+        Turns a bench frame into a result record.
+
+        The rule table is compiled once: exact lines and "key =" prefixes go
+        into dicts, so each line costs one lookup whatever the number of
+        rules; counted patterns share one compiled regex that only runs on
+        lines the dicts did not match.
+
+        :param columns: result columns, in record order
+        :param rules: list of rule dicts, see above
+        :param status_columns: columns checked for the Status verdict
+        :param keep_columns: columns kept across frames when they hold a value (e.g. the scanned serial)
+        :param status_column: column that receives GOOD/BAD
+    """
+
+    def __init__(self, columns, rules, status_columns=(), keep_columns=(), status_column=None):
+        self.columns = list(columns)
+        self.status_columns = tuple(status_columns)
+        self.keep_columns = tuple(c for c in keep_columns if c in self.columns)
+        self.status_column = status_column if status_column in self.columns else None
+        self._template = dict.fromkeys(self.columns, NULL)
+
+        self._exact = {}    # line -> (column, value)
+        self._fields = {}   # text before "=" -> column
+        counted = []        # (pattern, column template, value)
+        for rule in rules:
+            kinds = [kind for kind in RULE_KINDS if kind in rule]
+            if len(kinds) != 1:
+                raise ValueError(f"Rule needs exactly one of {RULE_KINDS}: {rule!r}")
+            kind = kinds[0]
+            column = rule.get("column")
+            if kind != "field" and not isinstance(rule.get("value"), str):
+                raise ValueError(f"Rule needs a string value: {rule!r}")
+            if kind == "exact":
+                self._check_column(column, rule)
+                self._exact[rule["exact"]] = (column, rule["value"])
+            elif kind == "field":
+                self._check_column(column, rule)
+                self._fields[rule["field"].strip()] = column
+            else:
+                if not isinstance(column, str) or "{n}" not in column:
+                    raise ValueError(f"Counted rule column needs a {{n}} placeholder: {rule!r}")
+                self._check_column(column.format(n=1), rule)
+                counted.append((rule["counted"], column, rule["value"]))
+
+        # One alternation for all counted patterns; group i+1 is rule i
+        self._counted_values = [value for _, _, value in counted]
+        self._counted_columns = {}  # column template -> [PREFIX_1, PREFIX_2, ...] present in columns
+        for _, template, _ in counted:
+            if template not in self._counted_columns:
+                names = []
+                while template.format(n=len(names) + 1) in self.columns:
+                    names.append(template.format(n=len(names) + 1))
+                self._counted_columns[template] = names
+        self._counted_slots = [self._counted_columns[template] for _, template, _ in counted]
+        self._counted_regex = (re.compile("|".join(f"({re.escape(p)})" for p, _, _ in counted), re.IGNORECASE)
+                               if counted else None)
+
+    def _check_column(self, column, rule):
+        if column not in self.columns:
+            raise ValueError(f"Rule writes to unknown column {column!r}: {rule!r}")
+
+    def new_record(self):
+        """
+            :return: a record with every column set to "null"
+            :rtype: dict
+        """
+        return dict(self._template)
+
+    def parse(self, message, record):
+        """
+            Fill record (in place) from one frame. Every column is reset to
+            "null" first, except keep_columns that already hold a value.
+
+            :param message: decoded frame text
+            :param record: dict from new_record()
+            :return: False if the frame had nothing but comment lines
+            :rtype: bool
+        """
+        kept = [(c, record.get(c)) for c in self.keep_columns if record.get(c, NULL) not in (NULL, "")]
+        record.update(self._template)
+        record.update(kept)
+
+        exact = self._exact
+        fields = self._fields
+        counted_regex = self._counted_regex
+        counters = {}
+        content = False
+
+        for line in message.splitlines():
+            line = line.strip()
+            if not line or (line.startswith("/*") and line.endswith("*/")):
+                continue
+            content = True
+
+            hit = exact.get(line)
+            if hit is not None:
+                record[hit[0]] = hit[1]
+                continue
+            key, sep, value = line.partition("=")
+            if sep:
+                column = fields.get(key.rstrip())
+                if column is not None:
+                    record[column] = value.strip()
+                    continue
+            if counted_regex is not None:
+                match = counted_regex.search(line)
+                if match is not None:
+                    index = match.lastindex - 1
+                    slots = self._counted_slots[index]
+                    n = counters.get(id(slots), 0)
+                    if n < len(slots):
+                        record[slots[n]] = self._counted_values[index]
+                    counters[id(slots)] = n + 1
+
+        if content and self.status_column:
+            self.apply_status(record)
+        return content
+
+    def apply_status(self, record):
+        """
+            Set the status column: BAD if any status column is "0", GOOD if
+            all are "1", left alone otherwise.
+        """
+        values = [record.get(c, NULL) for c in self.status_columns]
+        if "0" in values:
+            record[self.status_column] = "BAD"
+        elif values and all(v == "1" for v in values):
+            record[self.status_column] = "GOOD"
+
+    def null_count(self, record, columns):
+        """
+            :return: how many of columns are still "null"
+            :rtype: int
+        """
+        return sum(1 for c in columns if record.get(c, NULL) == NULL)
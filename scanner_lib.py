@@ -604,7 +604,7 @@ class DE2120BarcodeScanner(object):
             # Wait for command to take effect
             time.sleep(0.01)
             
-            return self.send_command(self.PROPERTY_COMM_MODE, sense)
+            return self.send_command(self.PROPERTY_MOTION_SENSITIVITY, sense)
 
         return False
 
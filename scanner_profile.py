@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+import collections
+from scanner_lib import DE2120BarcodeScanner as DE2120
+
+PROFILE_CACHE_FILE = "scanner_profiles.json"   # Last profile applied to each scanner, in base_path
+BATCH_TIMEOUT = 1.0     # Seconds to wait for the last ACK/NACK of a batch after the last answer before it
+RETRY_TIMEOUT = 1.0     # Seconds per command when a command got no answer and is resent on its own
+
+_ON_OFF = {True: "1", False: "0"}
+
+
+def _setting(prop, arguments):
+    return {value: prop + argument for value, argument in arguments.items()}
+
+
+# Setting name -> {value: command}, in the order settings are sent. The baud rate and USB/TTL mode
+# are not here on purpose: changing them cuts the link the profile is sent over.
+SETTINGS = {
+    "reading_mode": _setting(DE2120.PROPERTY_READING_MODE, {"manual": "MAN", "continuous": "CNT", "motion": "MDH"}),
+    "repeat_interval": _setting(DE2120.PROPERTY_CONTINUOUS_MODE_INTERVAL, {n: str(n) for n in range(4)}),
+    "motion_sensitivity": _setting(DE2120.PROPERTY_MOTION_SENSITIVITY, {n: str(n) for n in (15, 20, 30, 50, 100)}),
+    "reading_area": _setting(DE2120.PROPERTY_READING_AREA, {100: "0", 80: "1", 60: "2", 40: "3", 20: "4"}),
+    "light": _setting(DE2120.PROPERTY_FLASH_LIGHT, _ON_OFF),
+    "reticle": _setting(DE2120.PROPERTY_AIM_LIGHT, _ON_OFF),
+    "image_flipping": _setting(DE2120.PROPERTY_MIRROR_FLIP, _ON_OFF),
+    "decode_beep": _setting(DE2120.PROPERTY_DECODE_BEEP, _ON_OFF),
+    "boot_beep": _setting(DE2120.PROPERTY_BOOT_BEEP, _ON_OFF),
+    "buzzer_tone": _setting(DE2120.PROPERTY_BUZZER_FREQ, {1: "1", 2: "2", 3: "3"}),
+    "transfer_code_id": _setting(DE2120.PROPERTY_TRANSFER_CODE_ID, _ON_OFF),
+    "symbologies_1d": {True: DE2120.PROPERTY_ENABLE_ALL_1D, False: DE2120.PROPERTY_DISABLE_ALL_1D},
+    "symbologies_2d": {True: DE2120.PROPERTY_ENABLE_ALL_2D, False: DE2120.PROPERTY_DISABLE_ALL_2D},
+}
+
+ProfileResult = collections.namedtuple("ProfileResult", "applied skipped nacked missing seconds")
+ProfileResult.__doc__ = """
+    Outcome of apply_profile: lists of setting names that were acknowledged,
+    skipped (cached as already set), refused (NACK) or never answered, and
+    the time taken.
+"""
+
+
+def profile_commands(profile):
+    """
+        :param profile: {setting: value}, see SETTINGS for names and values
+        :return: [(setting, value, command)] in SETTINGS order
+        :rtype: list
+        :raises ValueError: for an unknown setting or a value it does not take
+    """
+    unknown = set(profile) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown scanner setting(s): {', '.join(sorted(unknown))}")
+    commands = []
+    for setting, values in SETTINGS.items():
+        if setting not in profile:
+            continue
+        value = profile[setting]
+        if isinstance(value, bool) != isinstance(next(iter(values)), bool) or value not in values:
+            raise ValueError(f"Scanner setting {setting} must be one of {list(values)}, not {value!r}")
+        commands.append((setting, value, values[value]))
+    return commands
+
+
+def send_batch(port, commands, timeout=BATCH_TIMEOUT):
+    """
+        Write all commands at once and collect one ACK/NACK per command.
+        The DE2120 answers commands in order; anything else that arrives
+        meanwhile (a barcode line) is ignored.
+
+        :param port: open serial port of the scanner
+        :param commands: command strings without the ^_^ prefix and . suffix
+        :param timeout: seconds to wait for each next answer
+        :return: per command True (ACK), False (NACK) or None (no answer)
+        :rtype: list
+    """
+    if not commands:
+        return []
+    port.write(b"".join(f"^_^{command}.".encode() for command in commands))
+    answers = []
+    saved_timeout = port.timeout
+    deadline = time.perf_counter() + timeout
+    try:
+        while len(answers) < len(commands):
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                break
+            port.timeout = left
+            data = port.read(port.in_waiting or 1)
+            for byte in data:
+                if byte == DE2120.DE2120_COMMAND_ACK:
+                    answers.append(True)
+                elif byte == DE2120.DE2120_COMMAND_NACK:
+                    answers.append(False)
+                else:
+                    continue
+                deadline = time.perf_counter() + timeout
+    finally:
+        port.timeout = saved_timeout
+    answers = answers[:len(commands)]
+    return answers + [None] * (len(commands) - len(answers))
+
+
+def apply_profile(scanner, profile, cache=None, device=None, force=False):
+    """
+        Send the settings of profile to the scanner as one pipelined batch.
+        With a cache, settings the device already got the same value for
+        are skipped and acknowledged ones are remembered. Commands that get
+        no answer at all are resent one at a time (some firmware drops
+        input while it stores a setting), until a resend gets no answer
+        either: then the scanner is not listening and the rest is given up.
+
+        :param scanner: DE2120BarcodeScanner with an open port
+        :param profile: {setting: value}, see SETTINGS
+        :param cache: ProfileCache, or None to always send everything
+        :param device: cache key of the scanner (see port_discovery.device_key)
+        :param force: send every setting even if the cache says it is set
+        :return: what was applied, skipped, refused or unanswered
+        :rtype: ProfileResult
+    """
+    start = time.perf_counter()
+    commands = profile_commands(profile)
+    known = cache.get(device) if cache is not None and not force else {}
+    skipped = [setting for setting, value, _ in commands if setting in known and known[setting] == value]
+    commands = [entry for entry in commands if entry[0] not in skipped]
+
+    answers = send_batch(scanner.hard_port, [command for _, _, command in commands])
+    for index, ((_, _, command), answer) in enumerate(zip(commands, answers)):
+        if answer is None:
+            answers[index] = send_batch(scanner.hard_port, [command], RETRY_TIMEOUT)[0]
+            if answers[index] is None:
+                break   # Silent port or not a scanner, at most BATCH_TIMEOUT + RETRY_TIMEOUT spent
+
+    applied = {setting: value for (setting, value, _), answer in zip(commands, answers) if answer}
+    nacked = [setting for (setting, _, _), answer in zip(commands, answers) if answer is False]
+    missing = [setting for (setting, _, _), answer in zip(commands, answers) if answer is None]
+    if cache is not None:
+        cache.update(device, applied, forget=nacked + missing)
+    return ProfileResult(list(applied), skipped, nacked, missing, time.perf_counter() - start)
+
+
+class ProfileCache:
+    """
+        Settings last acknowledged by each scanner, kept in a JSON file so
+        the next start only sends what changed:
+
+            {"USB 1A86:7523 SER=5A2C": {"light": false, "reading_area": 80}}
+
+        :param path: cache file, created on the first update
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as file:
+                self._devices = json.load(file)
+        except (OSError, ValueError):
+            self._devices = {}
+
+    def get(self, device):
+        """
+            :return: {setting: value} last applied to device, empty if unknown
+            :rtype: dict
+        """
+        with self._lock:
+            return dict(self._devices.get(device, {}))
+
+    def update(self, device, applied, forget=()):
+        """
+            Remember applied settings of device and forget the ones in forget
+            (refused or unanswered, so their state is unknown).
+        """
+        with self._lock:
+            settings = self._devices.setdefault(device, {})
+            settings.update(applied)
+            for setting in forget:
+                settings.pop(setting, None)
+            if applied or forget:
+                self._save()
+
+    def clear(self, device=None):
+        """
+            Forget one device (e.g. after a factory reset) or all of them.
+        """
+        with self._lock:
+            if device is None:
+                self._devices.clear()
+            else:
+                self._devices.pop(device, None)
+            self._save()
+
+    def _save(self):
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(self._devices, file, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+_caches = {}        # path -> ProfileCache, shared by all stations
+_caches_lock = threading.Lock()
+
+def get_profile_cache(directory):
+    """
+        :param directory: folder of the cache file
+        :return: the shared profile cache for directory
+        :rtype: ProfileCache
+    """
+    path = os.path.abspath(os.path.join(directory, PROFILE_CACHE_FILE))
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ProfileCache(path)
+        return _caches[path]
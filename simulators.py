@@ -0,0 +1,410 @@
+import abc
+import argparse
+import os
+import random
+import re
+import select
+import sys
+import threading
+import time
+
+try:
+    import pty
+    import tty
+except ImportError:     # Windows has no pseudo-terminals
+    pty = None
+
+ACK = b"\x06"
+NACK = b"\x15"
+
+
+def open_pty():
+    """
+        Create a raw pseudo-terminal pair.
+
+        :return: (master fd, slave fd, slave device name)
+        :rtype: tuple
+    """
+    if pty is None:
+        raise OSError("Pseudo-terminals are only available on Linux/macOS.")
+    master, slave = pty.openpty()
+    tty.setraw(slave)   # No echo, no CR/LF translation, like a real UART
+    os.set_blocking(master, False)
+    return master, slave, os.ttyname(slave)
+
+
+def bench_frame(seq, rng=random, fail_rate=0.0, screens=6, extra_lines=0):
+    """
+        Build one AM60 frame with the lines save_message_exact understands.
+
+        :param seq: sequence number put in a "/* seq N */" comment line
+        :param rng: random.Random (or the random module) for values and failures
+        :param fail_rate: probability of each check line reporting "not OK"
+        :param screens: number of screen check lines
+        :param extra_lines: additional debug lines, to make bigger frames
+        :return: the frame, START to STOP, with CR/LF line endings
+        :rtype: bytes
+    """
+    ok = lambda: rng.random() >= fail_rate
+    uniform = rng.uniform
+    lines = [
+        "START",
+        f"/* seq {seq} */",
+        f"Vcc_avg = {uniform(3.2, 3.4):.3f}",
+        f"plus_5_avg = {uniform(4.9, 5.1):.3f}",
+        f"min_5_avg = {uniform(-5.1, -4.9):.3f}",
+        f"bat_avg = {uniform(3.6, 4.2):.3f}",
+        f"buck_avg = {uniform(3.2, 3.4):.3f}",
+        "LED is OK" if ok() else "LED is not OK",
+        "Vcc Volt is OK !" if ok() else "Vcc Volt is not OK !",
+        "Plus 5 Volt is OK" if ok() else "Plus 5 Volt is not OK",
+        "Minus 5 volt is OK" if ok() else "Minus 5 volt is not OK",
+        "bat is OK" if ok() else "bat is not OK",
+        "buck is OK" if ok() else "buck is not OK",
+        "raspberry pi is OK" if ok() else "Raspberry pi is not working !",
+        "raspberry pi is running",
+    ]
+    for screen in range(1, screens + 1):
+        lines.append(f"Screen {screen} screen is working ok" if ok() else f"Screen {screen} screen is not ok")
+    for line in range(extra_lines):
+        lines.append(f"adc[{line}] raw = {rng.randrange(4096)}")
+    lines.append("STOP")
+    return ("\r\n".join(lines) + "\r\n").encode()
+
+
+class _PtyDevice(abc.ABC):
+    # Common part of the simulators: a PTY pair, a worker thread and baud-rate pacing
+    def __init__(self, baudrate):
+        self.baudrate = baudrate
+        self.master, self._slave, self.port_name = open_pty()
+        self.overrun_bytes = 0      # Bytes dropped because nobody read the port fast enough
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def send(self, data, mark_at=None, on_mark=None):
+        # Write paced at the baud rate (10 bits per byte); bytes that do not fit are lost.
+        # on_mark() is called as soon as the byte at offset mark_at is written, before the pacing wait.
+        bytes_per_second = self.baudrate / 10.0
+        slice_size = max(1, int(bytes_per_second / 100))    # ~10 ms slices
+        for offset in range(0, len(data), slice_size):
+            part = data[offset:offset + slice_size]
+            try:
+                written = os.write(self.master, part)
+            except BlockingIOError:
+                written = 0
+            except OSError:
+                return
+            self.overrun_bytes += len(part) - written
+            if on_mark is not None and offset <= mark_at < offset + len(part):
+                on_mark()
+            self._stop.wait(len(part) / bytes_per_second)
+
+    @abc.abstractmethod
+    def _run(self):
+        """The device's behaviour, run on the worker thread until stop() is called."""
+
+
+class BenchSimulator(_PtyDevice):
+    """
+        Acts like the AM60 test bench firmware on a pseudo-terminal.
+
+        Emits START...STOP frames with the lines save_message_exact
+        understands. Every frame carries a "/* seq N */" comment line, and
+        the send time of each sequence number is kept in sent_times so a
+        test can measure latency and count dropped frames.
+
+        :param frame_rate: frames per second
+        :param baudrate: simulated line speed
+        :param noise: probability of sending random bytes between frames
+        :param truncate_rate: probability that a frame is cut off before STOP
+        :param fail_rate: probability of each check line reporting "not OK"
+        :param screens: number of screen check lines per frame
+        :param count: stop after this many frames, None to run forever
+    """
+
+    def __init__(self, frame_rate=1.0, baudrate=115200, noise=0.0, truncate_rate=0.0,
+                 fail_rate=0.0, screens=6, count=None, seed=None):
+        super().__init__(baudrate)
+        self.frame_rate = frame_rate
+        self.noise = noise
+        self.truncate_rate = truncate_rate
+        self.fail_rate = fail_rate
+        self.screens = screens
+        self.count = count
+        self.random = random.Random(seed)
+
+        self.frames_sent = 0
+        self.truncated = 0
+        self.sent_times = {}    # seq -> time.perf_counter() when the STOP line was written
+        self.done = threading.Event()
+
+    def build_frame(self, seq):
+        """
+            :param seq: sequence number put in the frame's comment line
+            :return: one complete frame, START to STOP, with CR/LF line endings
+            :rtype: bytes
+        """
+        return bench_frame(seq, self.random, fail_rate=self.fail_rate, screens=self.screens)
+
+    def _run(self):
+        interval = 1.0 / self.frame_rate if self.frame_rate > 0 else 0
+        next_time = time.perf_counter()
+        seq = 0
+        while not self._stop.is_set() and (self.count is None or seq < self.count):
+            seq += 1
+            if self.noise and self.random.random() < self.noise:
+                self.send(bytes(self.random.randrange(32, 127) for _ in range(self.random.randrange(1, 64))) + b"\r\n")
+
+            frame = self.build_frame(seq)
+            if self.truncate_rate and self.random.random() < self.truncate_rate:
+                self.send(frame[:self.random.randrange(len(b"START"), frame.rindex(b"STOP"))])
+                self.truncated += 1
+            else:
+                # Stamped when the STOP marker is written: the station may store the frame before send() returns
+                self.send(frame, frame.rindex(b"STOP") + len(b"STOP") - 1, lambda seq=seq: self._stamp(seq))
+                self.frames_sent += 1
+
+            next_time += interval
+            self._stop.wait(max(0.0, next_time - time.perf_counter()))
+        self.done.set()
+
+    def _stamp(self, seq):
+        self.sent_times[seq] = time.perf_counter()
+
+
+class ScannerSimulator(_PtyDevice):
+    """
+        Acts like a DE2120 barcode scanner on a pseudo-terminal.
+
+        Answers "^_^CMD." commands with ACK (0x06) or NACK (0x15) like
+        DE2120BarcodeScanner.send_command expects. After SCAN it sends a
+        barcode ended by CR/LF. In continuous (SCMCNT) or motion (SCMMDH)
+        mode a new part is presented every present_interval seconds and
+        stays in front of the scanner for hold_time seconds; in continuous
+        mode its barcode is repeated meanwhile as set by CNTALW.
+
+        :param baudrate: simulated line speed
+        :param nack_rate: probability of answering a command with NACK
+        :param decode_delay: seconds between SCAN and the barcode
+        :param present_interval: seconds between parts in continuous/motion mode
+        :param hold_time: seconds each part stays in front of the scanner
+        :param command_delay: seconds the scanner takes to store a setting before it answers
+        :param barcodes: list of barcodes to cycle through, generated if None
+    """
+
+    _COMMAND = re.compile(rb"\^_\^([^.]*)\.")
+
+    def __init__(self, baudrate=115200, nack_rate=0.0, decode_delay=0.05, present_interval=2.0,
+                 hold_time=0.0, command_delay=0.0, barcodes=None, seed=None):
+        super().__init__(baudrate)
+        self.nack_rate = nack_rate
+        self.decode_delay = decode_delay
+        self.present_interval = present_interval
+        self.hold_time = hold_time
+        self.command_delay = command_delay
+        self.barcodes = barcodes
+        self.random = random.Random(seed)
+
+        self.mode = "MAN"
+        self.repeat_interval = 2    # CNTALW setting
+        self.sent = 0               # Barcode lines sent, repeats included
+        self.presented = {}         # Barcode -> time.perf_counter() its part was presented
+        self.commands = []      # Every command received, in order
+        self.acks = 0
+        self.nacks = 0
+        self.scans = 0
+        self._pending_scan = None   # Time the next barcode is due
+
+    def next_barcode(self):
+        self.scans += 1
+        if self.barcodes:
+            return self.barcodes[(self.scans - 1) % len(self.barcodes)]
+        return f"AM60-{self.scans:06d}"
+
+    def _run(self):
+        received = bytearray()
+        next_present = time.perf_counter() + self.present_interval
+        held = None     # (barcode, time the part is taken away, time of the next repeat)
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self.master], [], [], 0.005)
+            if readable:
+                try:
+                    received += os.read(self.master, 4096)
+                except BlockingIOError:
+                    pass
+                except OSError:
+                    return
+                self._handle_commands(received)
+
+            now = time.perf_counter()
+            if self._pending_scan is not None and now >= self._pending_scan:
+                self._pending_scan = None
+                self.send(self.next_barcode().encode() + b"\r\n")
+            if self.mode in ("CNT", "MDH") and now >= next_present:
+                next_present = now + self.present_interval
+                barcode = self.next_barcode()
+                self.presented[barcode] = now
+                self._send_barcode(barcode)
+                held = (barcode, now + self.hold_time, now + self._repeat_delay())
+            elif held is not None and (self.mode != "CNT" or now >= held[1]):
+                held = None
+            elif held is not None and self.repeat_interval and now >= held[2]:
+                self._send_barcode(held[0])
+                held = (held[0], held[1], now + self._repeat_delay())
+
+    def _repeat_delay(self):
+        return {1: 0.05, 2: 0.5, 3: 1.0}.get(self.repeat_interval, 0.0)
+
+    def _send_barcode(self, barcode):
+        self.sent += 1
+        self.send(barcode.encode() + b"\r\n")
+
+    def _handle_commands(self, received):
+        while True:
+            match = self._COMMAND.search(received)
+            if match is None:
+                del received[:max(0, len(received) - 64)]  # Drop garbage, keep a possible partial command
+                return
+            command = match.group(1).decode("ascii", errors="replace")
+            del received[:match.end()]
+            self.commands.append(command)
+            if self.command_delay and command not in ("SCAN", "SLEEP"):
+                time.sleep(self.command_delay)
+
+            if self.nack_rate and self.random.random() < self.nack_rate:
+                self.nacks += 1
+                self.send(NACK)
+                continue
+            self.acks += 1
+            self.send(ACK)
+
+            if command == "SCAN":
+                self._pending_scan = time.perf_counter() + self.decode_delay
+            elif command == "SLEEP":
+                self._pending_scan = None
+            elif command.startswith("SCM"):
+                self.mode = command[3:]
+            elif command.startswith("CNTALW") and command[6:].isdigit():
+                self.repeat_interval = int(command[6:])
+
+
+def stress(args):
+    # Run a headless Station against a bench simulator and report drops and latency
+    from latency_stats import LatencyStats
+    from monitor_core import Station, StationListener
+
+    seq_pattern = re.compile(r"/\* seq (\d+) \*/")
+    latency = LatencyStats(window=100000)
+    received = set()
+
+    class Listener(StationListener):
+        def on_stored(self, station, full_message, timestamp, stored, record):
+            match = seq_pattern.search(full_message)
+            if match:
+                seq = int(match.group(1))
+                received.add(seq)
+                sent = bench.sent_times.get(seq)
+                if sent is not None:
+                    latency.add(time.perf_counter() - sent)
+
+    bench = BenchSimulator(frame_rate=args.rate, baudrate=args.baud, noise=args.noise,
+                           truncate_rate=args.truncate, count=args.frames, seed=args.seed)
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    station = Station({"name": "stress", "transport": args.transport, "persist": not args.dry_run,
+                       "archive": False, "journal": False},
+                      base_path, file_suffix="_stress", listener=Listener())
+    serial_loop = None
+    if args.transport == "async":
+        from async_serial import SerialEventLoop
+        serial_loop = SerialEventLoop()
+
+    station.connect(bench.port_name, args.baud, serial_loop)
+    start = time.perf_counter()
+    bench.start()
+    bench.done.wait()
+    time.sleep(args.settle)     # Let the last frames through
+    elapsed = time.perf_counter() - start
+    station.disconnect()
+    station.remove_files()
+    bench.stop()
+    if serial_loop is not None:
+        serial_loop.stop()
+
+    delivered = len(received & set(bench.sent_times))
+    dropped = bench.frames_sent - delivered
+    p50, p99 = latency.percentile(50), latency.percentile(99)
+    print(f"sent {bench.frames_sent} frames (+{bench.truncated} truncated) in {elapsed:.2f} s")
+    print(f"received {delivered}, dropped {dropped} ({100.0 * dropped / max(1, bench.frames_sent):.2f} %), "
+          f"UART overrun {bench.overrun_bytes} bytes")
+    if p50 is not None:
+        print(f"latency STOP sent -> stored: p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms, max {latency.max * 1000:.1f} ms")
+    return 0 if dropped == 0 else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AM60 bench and DE2120 scanner simulators on pseudo-terminals.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    bench = sub.add_parser("bench", help="run a bench simulator and print its port name")
+    scanner = sub.add_parser("scanner", help="run a scanner simulator and print its port name")
+    run_stress = sub.add_parser("stress", help="run a headless station against a bench simulator and report drops/latency")
+    for p in (bench, run_stress):
+        p.add_argument("--rate", type=float, default=1.0, help="frames per second")
+        p.add_argument("--noise", type=float, default=0.0, help="probability of noise between frames")
+        p.add_argument("--truncate", type=float, default=0.0, help="probability of a frame without STOP")
+        p.add_argument("--frames", type=int, default=None, help="number of frames to send")
+        p.add_argument("--seed", type=int, default=None, help="random seed for repeatable runs")
+    for p in (bench, scanner, run_stress):
+        p.add_argument("--baud", type=int, default=115200, help="simulated baud rate")
+    scanner.add_argument("--nack", type=float, default=0.0, help="probability of answering a command with NACK")
+    scanner.add_argument("--delay", type=float, default=0.05, help="seconds from SCAN to barcode")
+    scanner.add_argument("--command-delay", type=float, default=0.0, help="seconds to store a setting before answering")
+    run_stress.add_argument("--transport", choices=["thread", "async"], default="thread")
+    run_stress.add_argument("--dry-run", action="store_true", help="parse frames but do not write to the database")
+    run_stress.add_argument("--settle", type=float, default=1.0, help="seconds to wait for the last frames")
+    args = parser.parse_args(argv)
+
+    if args.command == "stress":
+        if args.frames is None:
+            args.frames = 100
+        return stress(args)
+
+    if args.command == "bench":
+        device = BenchSimulator(frame_rate=args.rate, baudrate=args.baud, noise=args.noise,
+                                truncate_rate=args.truncate, count=args.frames, seed=args.seed)
+    else:
+        device = ScannerSimulator(baudrate=args.baud, nack_rate=args.nack, decode_delay=args.delay,
+                                  command_delay=args.command_delay)
+    print(f"{args.command} simulator on {device.port_name} (Ctrl+C to stop)", flush=True)
+    with device:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
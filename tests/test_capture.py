@@ -0,0 +1,97 @@
+import os
+import pytest
+from capture import (CaptureRecorder, CaptureReplayer, read_capture, capture_info, new_capture_path,
+                     CHANNEL_BENCH, CHANNEL_SCANNER, CAPTURE_EXTENSION)
+
+CHUNKS = [
+    (CHANNEL_SCANNER, b"\x06"),
+    (CHANNEL_SCANNER, b"AM60-000001\r\n"),
+    (CHANNEL_BENCH, b"START\r\nLED is "),
+    (CHANNEL_BENCH, b"OK\r\nSTOP\r\n"),
+]
+
+
+def record(path, chunks, name="Bench 1"):
+    recorder = CaptureRecorder(path, name)
+    for channel, data in chunks:
+        recorder.record(channel, data)
+    recorder.close()
+    return recorder
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "c.fcap")
+    recorder = record(path, CHUNKS + [(CHANNEL_BENCH, b"")])    # Empty reads are not recorded
+    records = list(read_capture(path))
+    assert [(channel, data) for _, channel, data in records] == CHUNKS
+    times = [elapsed for elapsed, _, _ in records]
+    assert times == sorted(times) and times[0] >= 0
+    assert (recorder.records, recorder.bytes) == (4, sum(len(data) for _, data in CHUNKS))
+    assert capture_info(path)[1] == "Bench 1"
+
+
+def test_large_chunk_is_split(tmp_path):
+    path = str(tmp_path / "c.fcap")
+    data = bytes(range(256)) * 700     # More than one record can hold
+    record(path, [(CHANNEL_BENCH, data)])
+    records = list(read_capture(path))
+    assert len(records) == 3
+    assert b"".join(part for _, _, part in records) == data
+
+
+def test_record_cut_short_by_a_crash_is_ignored(tmp_path):
+    path = str(tmp_path / "c.fcap")
+    record(path, CHUNKS)
+    with open(path, "r+b") as file:
+        file.truncate(os.path.getsize(path) - 3)
+    assert [data for _, _, data in read_capture(path)] == [data for _, data in CHUNKS[:-1]]
+
+
+def test_recording_after_close_is_ignored(tmp_path):
+    path = str(tmp_path / "c.fcap")
+    recorder = record(path, CHUNKS[:1])
+    recorder.record(CHANNEL_BENCH, b"late")
+    assert len(list(read_capture(path))) == 1
+
+
+def test_not_a_capture(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"PK\x03\x04 not a capture")
+    with pytest.raises(ValueError):
+        list(read_capture(str(path)))
+    with pytest.raises(ValueError):
+        capture_info(str(path))
+
+
+def test_replay_as_fast_as_possible(tmp_path):
+    path = str(tmp_path / "c.fcap")
+    record(path, CHUNKS)
+    replayed = []
+    count, seconds = CaptureReplayer(path, speed=0).replay(lambda channel, data: replayed.append((channel, data)))
+    assert count == len(CHUNKS)
+    assert replayed == CHUNKS
+
+
+def test_replay_keeps_the_timing(tmp_path):
+    path = str(tmp_path / "c.fcap")
+    recorder = CaptureRecorder(path)
+    recorder.record(CHANNEL_BENCH, b"a")
+    recorder._start -= 200_000_000     # The next chunk arrives 0.2 s later
+    recorder.record(CHANNEL_BENCH, b"b")
+    recorder.close()
+    _, seconds = CaptureReplayer(path, speed=2.0).replay(lambda channel, data: None)
+    assert 0.09 <= seconds < 0.5
+
+
+def test_stopped_replay(tmp_path):
+    path = str(tmp_path / "c.fcap")
+    record(path, CHUNKS)
+    replayer = CaptureReplayer(path, speed=0)
+    replayer.stop()
+    assert replayer.replay(lambda channel, data: None)[0] == 0
+
+
+def test_new_capture_path(tmp_path):
+    path = new_capture_path(str(tmp_path / "captures"), "Bench 1/left")
+    assert os.path.isdir(tmp_path / "captures")
+    assert os.path.basename(path).startswith("Bench_1_left_") and path.endswith(CAPTURE_EXTENSION)
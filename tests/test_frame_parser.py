@@ -0,0 +1,99 @@
+import pytest
+from frame_parser import FrameParser, MAX_BUFFER_SIZE
+
+FRAME = b"START\r\nLED is OK\r\nbat_avg = 3.900\r\nSTOP"
+
+
+def test_frame_in_one_chunk():
+    parser = FrameParser()
+    assert parser.feed(FRAME + b"\r\n") == [FRAME]
+    assert not parser.in_frame
+    assert parser.frames == 1
+
+
+def test_frame_fed_byte_by_byte():
+    parser = FrameParser()
+    frames = []
+    for index in range(len(FRAME)):
+        frames += parser.feed(FRAME[index:index + 1])
+    assert frames == [FRAME]
+
+
+@pytest.mark.parametrize("split", [2, 4, len(FRAME) - 3, len(FRAME) - 1])
+def test_markers_split_across_chunks(split):
+    # Cuts inside START ("ST|ART") and inside STOP ("ST|OP")
+    parser = FrameParser()
+    assert parser.feed(FRAME[:split]) == []
+    assert parser.feed(FRAME[split:]) == [FRAME]
+
+
+def test_several_frames_in_one_chunk():
+    parser = FrameParser()
+    second = FRAME.replace(b"LED is OK", b"LED is not OK")
+    assert parser.feed(FRAME + b"\r\n" + second + b"\r\nSTA") == [FRAME, second]
+    assert not parser.in_frame
+    assert parser.feed(b"RT\r\nSTOP") == [b"START\r\nSTOP"]
+
+
+def test_noise_before_start_is_dropped():
+    parser = FrameParser()
+    noise = b">> boot log\r\nadc = 12\r\n"
+    assert parser.feed(noise + FRAME) == [FRAME]
+    assert parser.dropped_bytes == len(noise)
+
+
+def test_noise_keeps_a_possible_marker_prefix():
+    parser = FrameParser()
+    assert parser.feed(b"x" * 100 + b"STA") == []
+    assert len(parser.buffer) == len(b"START") - 1
+    assert parser.feed(b"RT a STOP") == [b"START a STOP"]
+
+
+def test_nested_start_resyncs_on_the_new_frame():
+    parser = FrameParser()
+    assert parser.feed(b"START\r\ncut off") == []
+    assert parser.feed(b" here\r\n" + FRAME) == [FRAME]
+    assert parser.truncated_frames == 1
+    assert parser.dropped_bytes == len(b"START\r\ncut off here\r\n")
+
+
+def test_nested_start_in_one_chunk():
+    parser = FrameParser()
+    assert parser.feed(b"START first START second STOP") == [b"START second STOP"]
+    assert parser.truncated_frames == 1
+
+
+def test_overflow_drops_the_partial_frame():
+    parser = FrameParser()
+    assert parser.feed(b"START" + b"x" * MAX_BUFFER_SIZE) == []
+    assert parser.overflows == 1
+    assert not parser.in_frame
+    assert parser.buffer == bytearray()
+    # The STOP of the oversized frame does not produce a frame, the next one does
+    assert parser.feed(b"STOP\r\n" + FRAME) == [FRAME]
+
+
+def test_frame_just_under_the_limit_is_kept():
+    parser = FrameParser(max_buffer=64)
+    body = b"x" * (64 - len(b"START"))
+    assert parser.feed(b"START" + body) == []
+    assert parser.overflows == 0
+    assert parser.feed(b"STOP") == [b"START" + body + b"STOP"]
+
+
+def test_custom_string_markers():
+    parser = FrameParser("<<", ">>", max_buffer=16)
+    assert parser.feed(b"..<<ab>>..") == [b"<<ab>>"]
+
+
+def test_max_buffer_must_hold_the_markers():
+    with pytest.raises(ValueError):
+        FrameParser(max_buffer=8)
+
+
+def test_reset_drops_the_partial_frame():
+    parser = FrameParser()
+    parser.feed(b"START half")
+    parser.reset()
+    assert parser.feed(b" STOP") == []
+    assert parser.feed(FRAME) == [FRAME]
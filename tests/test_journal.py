@@ -0,0 +1,131 @@
+import pytest
+from journal import MessageJournal, JournalReader, station_id
+
+SIZE = 64 * 1024    # Smallest ring
+
+
+def frame(seq, size=1000):
+    text = f"START seq {seq} ".encode()
+    return text + b"x" * (size - len(text) - 4) + b"STOP"
+
+
+def seqs(records):
+    return [record.seq for record in records]
+
+
+def test_records_round_trip(tmp_path):
+    journal = MessageJournal(str(tmp_path / "j.fjr"), SIZE)
+    bench, other = station_id("Bench 1"), station_id("Bench 2")
+    assert journal.append(bench, frame(0), timestamp=1000.0) == 0
+    assert journal.append(other, frame(1)) == 1
+    records = list(journal.records())
+    assert [(r.seq, r.station, r.data) for r in records] == [(0, bench, frame(0)), (1, other, frame(1))]
+    assert records[0].time == 1000.0
+    assert seqs(journal.records(station=other)) == [1]
+    journal.close()
+
+
+def test_wrap_keeps_the_newest_records_in_order(tmp_path):
+    journal = MessageJournal(str(tmp_path / "j.fjr"), SIZE)
+    for seq in range(200):      # About three times the ring
+        journal.append(1, frame(seq))
+    kept = seqs(journal.records())
+    assert kept == list(range(kept[0], 200))
+    assert 40 < len(kept) < 66  # Most of the ring, never more than fits
+    assert all(record.data == frame(record.seq) for record in journal.records())
+    journal.close()
+
+
+def test_reopen_continues_after_a_wrap(tmp_path):
+    path = str(tmp_path / "j.fjr")
+    journal = MessageJournal(path, SIZE)
+    for seq in range(150):
+        journal.append(1, frame(seq))
+    before = seqs(journal.records())
+    journal.close()
+
+    journal = MessageJournal(path, SIZE)
+    assert seqs(journal.records()) == before
+    assert journal.append(1, frame(150)) == 150
+    after = seqs(journal.records())
+    assert after[-1] == 150 and after == list(range(after[0], 151))
+    journal.close()
+
+
+def test_reopen_with_another_size_starts_over(tmp_path):
+    path = str(tmp_path / "j.fjr")
+    journal = MessageJournal(path, SIZE)
+    journal.append(1, frame(0))
+    journal.close()
+    journal = MessageJournal(path, 2 * SIZE)
+    assert list(journal.records()) == []
+    assert journal.append(1, frame(0)) == 0
+    journal.close()
+
+
+def test_record_written_before_the_header_update_is_recovered(tmp_path):
+    # A crash between writing a record and publishing the new write offset
+    path = str(tmp_path / "j.fjr")
+    journal = MessageJournal(path, SIZE)
+    journal.append(1, frame(0))
+    head, seq = journal._head, journal._seq
+    journal.append(1, frame(1))
+    journal._advance(head, seq)     # Header as it was before the second append
+    journal.close()
+
+    journal = MessageJournal(path, SIZE)
+    assert seqs(journal.records()) == [0, 1]
+    assert journal.append(1, frame(2)) == 2
+    journal.close()
+
+
+def test_long_frames_are_cut(tmp_path):
+    journal = MessageJournal(str(tmp_path / "j.fjr"), SIZE)
+    journal.append(1, b"y" * SIZE)
+    assert len(next(journal.records()).data) == SIZE // 4
+    journal.close()
+
+
+def test_reader_follows_the_writer(tmp_path):
+    path = str(tmp_path / "j.fjr")
+    journal = MessageJournal(path, SIZE)
+    journal.append(1, frame(0))
+    reader = JournalReader(path)    # Only frames appended from now on
+    assert reader.read_new() == []
+    journal.append(1, frame(1))
+    journal.append(2, frame(2))
+    assert seqs(reader.read_new()) == [1, 2]
+    assert reader.read_new() == []
+    journal.append(2, frame(3))
+    assert seqs(reader.read_new(station=2)) == [3]
+    reader.close()
+    journal.close()
+
+
+def test_lapped_reader_resumes_from_the_oldest_record(tmp_path):
+    path = str(tmp_path / "j.fjr")
+    journal = MessageJournal(path, SIZE)
+    reader = JournalReader(path, from_start=True)
+    journal.append(1, frame(0))
+    assert seqs(reader.read_new()) == [0]
+    for seq in range(1, 200):
+        journal.append(1, frame(seq))
+    found = seqs(reader.read_new())
+    assert found[-1] == 199 and found == list(range(found[0], 200))
+    assert reader.missed == found[0] - 1
+    reader.close()
+    journal.close()
+
+
+def test_closed_journal_refuses_appends(tmp_path):
+    journal = MessageJournal(str(tmp_path / "j.fjr"), SIZE)
+    journal.close()
+    with pytest.raises(ValueError):
+        journal.append(1, frame(0))
+
+
+def test_not_a_journal(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * 1024)
+    with pytest.raises(ValueError):
+        JournalReader(str(path))
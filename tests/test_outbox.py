@@ -0,0 +1,150 @@
+import time
+import pytest
+import db_loader
+import outbox
+from outbox import Outbox, MAX_ATTEMPTS
+
+INSERT = "INSERT INTO t (a) VALUES (%s)"
+
+
+class FakePool:
+    # Stands in for db_loader.ConnectionPool; answer(row) decides each row's (success, message)
+    def __init__(self, answer=None):
+        self.answer = answer or (lambda row: (True, "ok"))
+        self.stored = []
+        self.calls = []
+
+    def execute_many(self, statement, rows):
+        answers = [self.answer(row) for row in rows]
+        for success, message in answers:
+            if not success:
+                return False, message
+        self.stored += rows
+        return True, f"{len(rows)} rows inserted"
+
+    def execute(self, statement, row):
+        self.calls.append((time.monotonic(), row))
+        success, message = self.answer(row)
+        if success:
+            self.stored.append(row)
+        return success, message
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(db_loader, "get_pool", lambda: pool)
+    return pool
+
+
+@pytest.fixture
+def make_outbox(tmp_path):
+    boxes = []
+
+    def make(**options):
+        box = Outbox(str(tmp_path / "outbox.db"), **options)
+        boxes.append(box)
+        return box
+    yield make
+    for box in boxes:
+        box.close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_records_are_delivered_and_removed(pool, make_outbox):
+    box = make_outbox()
+    for value in range(20):
+        assert box.put(INSERT, [value], "Bench 1") == (True, "Saved to outbox")
+    assert box.wait_empty(5)
+    assert pool.stored == [[value] for value in range(20)]
+    assert (box.saved, box.delivered, box.pending()) == (20, 20, 0)
+
+
+def test_records_wait_while_the_database_is_down(pool, make_outbox):
+    statuses = []
+    pool.answer = lambda row: (False, "Database connection failed: down")
+    box = make_outbox(retry_interval=0.05)
+    box.add_listener(statuses.append)
+    box.put(INSERT, [1])
+    wait_for(lambda: not box.online)
+    assert box.pending() == 1 and pool.stored == []
+
+    pool.answer = lambda row: (True, "ok")
+    assert box.wait_empty(5)
+    wait_for(lambda: box.online)
+    assert pool.stored == [[1]]
+    assert [text.split()[1] for text in statuses] == ["unreachable", "reachable"]
+
+
+def test_pending_records_survive_a_restart(pool, make_outbox):
+    pool.answer = lambda row: (False, "Database connection failed: down")
+    box = make_outbox(retry_interval=0.05)
+    box.put(INSERT, [1])
+    box.put(INSERT, [2])
+    box.close()
+
+    pool.answer = lambda row: (True, "ok")
+    box = make_outbox()
+    assert box.wait_empty(5)
+    assert pool.stored == [[1], [2]]
+
+
+def test_bad_row_does_not_hold_back_the_others(pool, make_outbox):
+    pool.answer = lambda row: (False, "Error inserting data: bad value") if row == ["bad"] else (True, "ok")
+    box = make_outbox(retry_interval=0.02)
+    for row in (["a"], ["bad"], ["b"]):
+        box.put(INSERT, row)
+    wait_for(lambda: len(pool.stored) == 2)
+    assert pool.stored == [["a"], ["b"]]
+
+
+def test_rejected_record_backs_off_then_is_parked(pool, make_outbox):
+    pool.answer = lambda row: (False, "Error inserting data: lock wait timeout")
+    statuses = []
+    box = make_outbox(retry_interval=0.02)
+    box.add_listener(statuses.append)
+    box.put(INSERT, [1])
+    assert box.wait_empty(5)     # Parked records do not count as pending
+    assert box.parked == 1
+    times = [moment for moment, _ in pool.calls]
+    assert len(times) == MAX_ATTEMPTS
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    for attempt, gap in enumerate(gaps, start=1):
+        assert gap >= 0.02 * attempt * 0.9     # n-th retry waits n * retry_interval
+    assert "parked after" in statuses[-1]
+
+
+def test_transient_rejection_is_delivered_on_a_retry(pool, make_outbox):
+    answers = iter([(False, "Error inserting data: lock wait timeout")] * 2)
+    pool.answer = lambda row: next(answers, (True, "ok"))
+    box = make_outbox(retry_interval=0.02)
+    box.put(INSERT, [1])
+    assert box.wait_empty(5)
+    assert pool.stored == [[1]] and box.parked == 0
+
+
+def test_unconfirmed_commit_is_parked_not_resent(pool, make_outbox):
+    pool.answer = lambda row: (False, f"{db_loader.COMMIT_UNCONFIRMED}, connection lost: gone")
+    box = make_outbox(retry_interval=0.02)
+    box.put(INSERT, [1])
+    assert box.wait_empty(5)
+    assert box.parked == 1
+    assert pool.calls == []     # Not retried row by row either
+
+
+def test_unknown_sync_mode(tmp_path):
+    with pytest.raises(ValueError):
+        Outbox(str(tmp_path / "outbox.db"), sync="sometimes")
+
+
+def test_shared_outbox_per_directory(pool, tmp_path):
+    try:
+        assert outbox.get_outbox(str(tmp_path)) is outbox.get_outbox(str(tmp_path))
+    finally:
+        outbox.close_outboxes()
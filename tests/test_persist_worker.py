@@ -0,0 +1,135 @@
+import concurrent.futures
+import threading
+import pytest
+from persist_worker import PersistWorker, OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST
+
+
+class GatedWriter:
+    # Write function that holds every write until release() is called
+    def __init__(self):
+        self.written = []
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def __call__(self, statement, row):
+        self.started.set()
+        self.gate.wait(5)
+        self.written.append(row)
+        return True, "ok"
+
+    def release(self):
+        self.gate.set()
+
+
+def full_worker(overflow, results, block_timeout=1.0):
+    # A worker with max_pending 2: row 1 being written, row 2 queued
+    writer = GatedWriter()
+    worker = PersistWorker(writer, max_pending=2, overflow=overflow, block_timeout=block_timeout)
+    assert worker.submit("INSERT", 1, lambda ok, message: results.append((1, ok)))
+    assert writer.started.wait(5)
+    assert worker.submit("INSERT", 2, lambda ok, message: results.append((2, ok)))
+    assert worker.pending == 2
+    return worker, writer
+
+
+def test_records_are_written_in_order():
+    written = []
+    worker = PersistWorker(lambda statement, row: (written.append(row) or (True, "ok")))
+    for row in range(100):
+        assert worker.submit("INSERT", row)
+    assert worker.wait(5)
+    worker.close()
+    assert written == list(range(100))
+    assert (worker.stored, worker.failed, worker.dropped) == (100, 0, 0)
+
+
+def test_drop_newest_refuses_the_new_record():
+    results = []
+    worker, writer = full_worker(OVERFLOW_DROP_NEWEST, results)
+    assert worker.submit("INSERT", 3, lambda ok, message: results.append((3, ok))) is False
+    assert results == [(3, False)]     # Reported at once
+    writer.release()
+    worker.close()
+    assert writer.written == [1, 2]
+    assert (worker.stored, worker.dropped) == (2, 1)
+    assert sorted(results) == [(1, True), (2, True), (3, False)]
+
+
+def test_drop_oldest_accepts_the_new_record():
+    results = []
+    worker, writer = full_worker(OVERFLOW_DROP_OLDEST, results)
+    assert worker.submit("INSERT", 3, lambda ok, message: results.append((3, ok))) is True
+    assert results == [(2, False)]     # The queued one made room, the one being written is kept
+    assert worker.pending == 2
+    writer.release()
+    worker.close()
+    assert writer.written == [1, 3]
+    assert (worker.stored, worker.dropped) == (2, 1)
+
+
+def test_block_gives_up_after_the_timeout():
+    results = []
+    worker, writer = full_worker(OVERFLOW_BLOCK, results, block_timeout=0.05)
+    assert worker.submit("INSERT", 3, lambda ok, message: results.append((3, ok))) is False
+    assert results == [(3, False)]
+    writer.release()
+    worker.close()
+    assert writer.written == [1, 2]
+    assert worker.dropped == 1
+
+
+def test_block_waits_for_room():
+    results = []
+    worker, writer = full_worker(OVERFLOW_BLOCK, results, block_timeout=5)
+    threading.Timer(0.05, writer.release).start()
+    assert worker.submit("INSERT", 3) is True
+    worker.close()
+    assert writer.written == [1, 2, 3]
+    assert worker.dropped == 0
+    assert worker.high_water == 2
+
+
+def test_failures_and_exceptions_are_reported():
+    def write(statement, row):
+        if row == "raise":
+            raise RuntimeError("boom")
+        return False, "rejected"
+    messages = []
+    worker = PersistWorker(write)
+    worker.submit("INSERT", "fail", lambda ok, message: messages.append((ok, message)))
+    worker.submit("INSERT", "raise", lambda ok, message: messages.append((ok, message)))
+    worker.close()
+    assert messages == [(False, "rejected"), (False, "Error storing record: boom")]
+    assert worker.failed == 2
+
+
+def test_future_results_are_completed_by_the_writer():
+    futures = []
+
+    def write(statement, row):
+        future = concurrent.futures.Future()
+        futures.append(future)
+        return future
+    results = []
+    worker = PersistWorker(write)
+    worker.submit("INSERT", 1, lambda ok, message: results.append(ok))
+    while not futures:
+        threading.Event().wait(0.001)
+    assert worker.pending == 1     # Still in flight until the future resolves
+    futures[0].set_result((True, "ok"))
+    assert worker.wait(5)
+    worker.close()
+    assert results == [True]
+
+
+def test_closed_worker_refuses_records():
+    worker = PersistWorker(lambda statement, row: (True, "ok"))
+    worker.close()
+    results = []
+    assert worker.submit("INSERT", 1, lambda ok, message: results.append(ok)) is False
+    assert results == [False]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        PersistWorker(lambda statement, row: (True, "ok"), overflow="drop_random")
@@ -0,0 +1,90 @@
+import json
+import os
+import pytest
+from product_schema import load_schema, ProductSchema, SchemaError
+from result_parser import NULL
+
+DEFINITION = {
+    "product": "Widget",
+    "table": "widget_results",
+    "columns": ["Serial_Number", "Volt", "Status"],
+    "keep_columns": ["Serial_Number"],
+    "status_column": "Status",
+    "status_columns": ["Volt"],
+    "column_types": {"Volt": "int8"},
+    "rules": [{"exact": "Volt OK", "column": "Volt", "value": "1"}],
+}
+
+
+def write_schema(directory, name, definition):
+    os.makedirs(os.path.join(directory, "schemas"), exist_ok=True)
+    path = os.path.join(directory, "schemas", name + ".json")
+    with open(path, "w") as file:
+        json.dump(definition, file)
+    return path
+
+
+def test_am60_schema_loads():
+    schema = load_schema("am60")
+    assert schema.table == "product_station3"
+    assert schema.insert_sql.startswith("INSERT INTO product_station3 (timestamp, serial_number,")
+    assert schema.insert_sql.count("%s") == len(schema.columns) + 1
+
+
+def test_row_turns_null_into_none():
+    schema = ProductSchema(DEFINITION)
+    record = schema.parser.new_record()
+    record["Volt"] = "1"
+    assert schema.row("2025-01-01 12:00:00", record) == ["2025-01-01 12:00:00", None, "1", None]
+    assert schema.column_types == [("Serial_Number", "str"), ("Volt", "int8"), ("Status", "str")]
+    assert schema.file_prefix == "Widget"
+
+
+@pytest.mark.parametrize("change", [
+    {"table": "results; DROP TABLE x"},
+    {"columns": ["Serial Number"]},
+    {"columns": ["A", "A"]},
+    {"columns": []},
+    {"keep_columns": ["Nope"]},
+    {"status_column": "Nope"},
+    {"column_types": {"Volt": "double"}},
+    {"column_types": {"Nope": "int8"}},
+    {"rules": [{"exact": "x", "column": "Nope", "value": "1"}]},
+    {"rules": "not a list"},
+])
+def test_invalid_definitions(change):
+    with pytest.raises(SchemaError):
+        ProductSchema(dict(DEFINITION, **change))
+
+
+def test_load_from_search_dir_and_reload_on_change(tmp_path):
+    path = write_schema(str(tmp_path), "widget", DEFINITION)
+    first = load_schema("widget", search_dirs=[str(tmp_path)])
+    assert load_schema("widget", search_dirs=[str(tmp_path)]) is first     # Cached
+
+    write_schema(str(tmp_path), "widget", dict(DEFINITION, table="widget_results_v2"))
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+    second = load_schema("widget", search_dirs=[str(tmp_path)])
+    assert second is not first
+    assert second.table == "widget_results_v2"
+
+
+def test_load_by_path_and_missing_product(tmp_path):
+    path = write_schema(str(tmp_path), "widget", DEFINITION)
+    assert load_schema(path).product == "Widget"
+    with pytest.raises(SchemaError):
+        load_schema("no_such_product", search_dirs=[str(tmp_path)])
+
+
+def test_invalid_json(tmp_path):
+    os.makedirs(tmp_path / "schemas")
+    (tmp_path / "schemas" / "broken.json").write_text("{not json")
+    with pytest.raises(SchemaError):
+        load_schema("broken", search_dirs=[str(tmp_path)])
+
+
+def test_parsed_frame_keeps_null_for_missing_lines():
+    schema = ProductSchema(DEFINITION)
+    record = schema.parser.new_record()
+    schema.parser.parse("START\r\nVolt OK\r\nSTOP", record)
+    assert record == {"Serial_Number": NULL, "Volt": "1", "Status": "GOOD"}
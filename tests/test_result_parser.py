@@ -0,0 +1,124 @@
+import pytest
+from result_parser import ResultParser, NULL
+
+COLUMNS = ["Serial_Number", "LED_status", "VCC_AVERAGE", "SCREEN_1", "SCREEN_2", "SCREEN_3", "Status"]
+RULES = [
+    {"field": "Vcc_avg", "column": "VCC_AVERAGE"},
+    {"counted": "screen is working ok", "column": "SCREEN_{n}", "value": "1"},
+    {"counted": "screen is not ok", "column": "SCREEN_{n}", "value": "0"},
+    {"exact": "LED is OK", "column": "LED_status", "value": "1"},
+    {"exact": "LED is not OK", "column": "LED_status", "value": "0"},
+]
+
+
+def make_parser():
+    return ResultParser(COLUMNS, RULES, status_columns=["LED_status", "SCREEN_1"],
+                        keep_columns=["Serial_Number"], status_column="Status")
+
+
+def frame(*lines):
+    return "\r\n".join(("START",) + lines + ("STOP",))
+
+
+def test_new_record_is_all_null():
+    assert make_parser().new_record() == dict.fromkeys(COLUMNS, NULL)
+
+
+def test_exact_and_field_rules():
+    parser = make_parser()
+    record = parser.new_record()
+    assert parser.parse(frame("LED is OK", "Vcc_avg = 3.301"), record)
+    assert record["LED_status"] == "1"
+    assert record["VCC_AVERAGE"] == "3.301"
+
+
+def test_field_key_tolerates_spaces_around_equals():
+    parser = make_parser()
+    record = parser.new_record()
+    parser.parse(frame("Vcc_avg=3.2", ), record)
+    assert record["VCC_AVERAGE"] == "3.2"
+    parser.parse(frame("  Vcc_avg   =   3.4  "), record)
+    assert record["VCC_AVERAGE"] == "3.4"
+
+
+def test_counted_lines_fill_the_numbered_columns_in_order():
+    parser = make_parser()
+    record = parser.new_record()
+    parser.parse(frame("Screen 1 screen is working ok",
+                       "Screen 2 SCREEN IS NOT OK",     # Counted patterns ignore case
+                       "Screen 3 screen is working ok"), record)
+    assert [record["SCREEN_1"], record["SCREEN_2"], record["SCREEN_3"]] == ["1", "0", "1"]
+
+
+def test_counted_lines_beyond_the_columns_are_ignored():
+    parser = make_parser()
+    record = parser.new_record()
+    parser.parse(frame(*[f"Screen {n} screen is not ok" for n in range(1, 6)]), record)
+    assert [record["SCREEN_1"], record["SCREEN_2"], record["SCREEN_3"]] == ["0", "0", "0"]
+    assert "SCREEN_4" not in record
+
+
+def test_counted_slots_restart_with_every_frame():
+    parser = make_parser()
+    record = parser.new_record()
+    parser.parse(frame("a screen is working ok", "b screen is working ok"), record)
+    parser.parse(frame("c screen is not ok"), record)
+    assert [record["SCREEN_1"], record["SCREEN_2"]] == ["0", NULL]
+
+
+def test_exact_rule_wins_over_a_counted_match():
+    parser = ResultParser(["A", "P_1"], [{"exact": "screen is not ok", "column": "A", "value": "x"},
+                                         {"counted": "screen is not ok", "column": "P_{n}", "value": "0"}])
+    record = parser.new_record()
+    parser.parse("screen is not ok", record)
+    assert record == {"A": "x", "P_1": NULL}
+
+
+def test_comment_only_frame_is_skipped():
+    parser = make_parser()
+    record = parser.new_record()
+    assert not parser.parse("/* seq 1 */\r\n\r\n   /* idle */", record)
+    assert record["Status"] == NULL
+
+
+def test_columns_reset_but_keep_columns_survive():
+    parser = make_parser()
+    record = parser.new_record()
+    record["Serial_Number"] = "AM60-1"
+    parser.parse(frame("LED is OK"), record)
+    parser.parse(frame("Vcc_avg = 3.3"), record)
+    assert record["Serial_Number"] == "AM60-1"
+    assert record["LED_status"] == NULL
+
+
+@pytest.mark.parametrize("lines, status", [
+    (("LED is OK", "x screen is working ok"), "GOOD"),
+    (("LED is OK", "x screen is not ok"), "BAD"),
+    (("LED is not OK",), "BAD"),
+    (("LED is OK",), NULL),     # SCREEN_1 unknown: no verdict
+])
+def test_status(lines, status):
+    parser = make_parser()
+    record = parser.new_record()
+    parser.parse(frame(*lines), record)
+    assert record["Status"] == status
+
+
+def test_null_count():
+    parser = make_parser()
+    record = parser.new_record()
+    parser.parse(frame("LED is OK"), record)
+    assert parser.null_count(record, ["LED_status", "VCC_AVERAGE", "SCREEN_1"]) == 2
+
+
+@pytest.mark.parametrize("rule", [
+    {"column": "LED_status", "value": "1"},                             # No kind
+    {"exact": "a", "field": "b", "column": "LED_status", "value": "1"}, # Two kinds
+    {"exact": "a", "column": "Nope", "value": "1"},                     # Unknown column
+    {"exact": "a", "column": "LED_status", "value": 1},                 # Value not a string
+    {"counted": "a", "column": "SCREEN_1", "value": "1"},               # No {n}
+    {"counted": "a", "column": "OTHER_{n}", "value": "1"},              # No OTHER_1 column
+])
+def test_invalid_rules(rule):
+    with pytest.raises(ValueError):
+        ResultParser(COLUMNS, [rule])
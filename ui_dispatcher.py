@@ -0,0 +1,97 @@
+import queue
+import tkinter as tk
+
+UI_FRAME_RATE = 30  # Default number of UI updates per second
+
+
+class UIDispatcher:
+    """
+        Queue-backed bridge between worker threads and the Tk main loop.
+
+        Worker threads only put events on a queue. A master.after() loop
+        drains the queue on the Tk thread at a fixed frame rate, and all text
+        queued for the same widget since the last tick is written with a
+        single insert.
+
+        :param master: the Tk root (or any widget) that owns the main loop
+        :param fps: how many times per second the queue is drained
+    """
+
+    def __init__(self, master, fps=UI_FRAME_RATE):
+        self.master = master
+        self.interval_ms = max(1, int(1000 / fps))
+        self._queue = queue.SimpleQueue()
+        self._after_id = None
+
+    def start(self):
+        """
+            Start draining the queue. Must be called on the Tk thread.
+        """
+        if self._after_id is None:
+            self._after_id = self.master.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        """
+            Stop the drain loop and apply whatever is still queued.
+        """
+        if self._after_id is not None:
+            self.master.after_cancel(self._after_id)
+            self._after_id = None
+        self._apply_pending()
+
+    def log(self, widget, text, scroll=True):
+        """
+            Queue text to be appended to a Text widget. Safe from any thread.
+
+            :param widget: the Text/ScrolledText to append to
+            :param text: the text to append
+            :param scroll: scroll the widget to the end after inserting
+        """
+        self._queue.put(("log", widget, text, scroll))
+
+    def call(self, func, *args):
+        """
+            Queue a function to be run on the Tk thread. Safe from any thread.
+
+            :param func: the callable to run
+            :param args: positional arguments for func
+        """
+        self._queue.put(("call", func, args, None))
+
+    def _drain(self):
+        try:
+            self._apply_pending()
+        finally:
+            self._after_id = self.master.after(self.interval_ms, self._drain)
+
+    def _apply_pending(self):
+        pending = {}    # widget -> [list of text pieces, scroll flag]
+        while True:
+            try:
+                kind, target, payload, scroll = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "log":
+                entry = pending.setdefault(target, [[], False])
+                entry[0].append(payload)
+                entry[1] = entry[1] or scroll
+            else:
+                # Keep ordering: text queued before a call is shown before it runs
+                self._flush_text(pending)
+                pending = {}
+                try:
+                    target(*payload)
+                except Exception as e:
+                    print(f"UI update failed: {e}")
+
+        self._flush_text(pending)
+
+    def _flush_text(self, pending):
+        for widget, (pieces, scroll) in pending.items():
+            try:
+                widget.insert(tk.END, "".join(pieces))   # One insert per widget per tick
+                if scroll:
+                    widget.see(tk.END)
+            except tk.TclError as e:
+                print(f"UI update failed: {e}")